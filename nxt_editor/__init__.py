@@ -21,6 +21,24 @@ class DIRECTIONS:
     RIGHT = 'right'
 
 
+class MODEL_SIGNALS:
+    """Names of the StageModel signals its SignalDispatcher coalesces, in
+    the order they're emitted. Structural changes go first so views have
+    graphics for the nodes by the time the selection and framing arrive.
+    """
+    COMP_LAYER_CHANGED = 'comp_layer_changed'
+    NODES_CHANGED = 'nodes_changed'
+    ATTRS_CHANGED = 'attrs_changed'
+    COLLAPSE_CHANGED = 'collapse_changed'
+    NODE_MOVED = 'node_moved'
+    SELECTION_CHANGED = 'selection_changed'
+    FRAME_ITEMS = 'frame_items'
+    ORDER = (COMP_LAYER_CHANGED, NODES_CHANGED, ATTRS_CHANGED,
+             COLLAPSE_CHANGED, NODE_MOVED, SELECTION_CHANGED, FRAME_ITEMS)
+    # Signals that only emit the last value queued
+    LAST_VALUE = (SELECTION_CHANGED, FRAME_ITEMS)
+
+
 class LoggingSignaler(QtCore.QObject):
     """Qt object used to emit logging messages. This object allows us to make
     thread safe visual loggers.
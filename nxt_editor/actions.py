@@ -351,6 +351,15 @@ class AppActions(NxtActionContainer):
                                             'widget.')
         self.available_without_model.append(self.build_view_action)
 
+        # Profiler View
+        self.profiler_view_action = NxtAction(text='Profiler View',
+                                              parent=self)
+        self.profiler_view_action.setCheckable(True)
+        self.profiler_view_action.setShortcutContext(context)
+        self.profiler_view_action.setWhatsThis('Toggle the build profiler '
+                                               'widget.')
+        self.available_without_model.append(self.profiler_view_action)
+
         # Workflow tools
         self.workflow_tools_action = NxtAction(text='Workflow Tools',
                                                parent=self)
@@ -454,6 +463,7 @@ class AppActions(NxtActionContainer):
                                      self.code_editor_action,
                                      self.history_view_action,
                                      self.build_view_action,
+                                     self.profiler_view_action,
                                      self.output_log_action,
                                      self.hotkey_editor_action,
                                      self.workflow_tools_action,
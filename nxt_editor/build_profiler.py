@@ -0,0 +1,152 @@
+# Built-in
+import json
+import logging
+import sys
+import time
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+# Internal
+import nxt_editor
+
+logger = logging.getLogger(nxt_editor.LOGGER_NAME)
+
+
+class PROFILE_KEYS(object):
+    NODE_PATH = 'node_path'
+    START = 'start'
+    WALL = 'wall_time'
+    CPU = 'cpu_time'
+    RSS = 'peak_rss_delta'
+
+
+def get_peak_rss():
+    """Get the peak resident set size of this process in bytes, None if it
+    can't be found on this platform.
+
+    :rtype: int or None
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    if sys.platform != 'darwin':
+        peak *= 1024
+    return peak
+
+
+class NodeTimer(object):
+    """Measures the wall time, cpu time and peak rss growth of one node
+    execution. Must be started and stopped on the thread that runs the node
+    as cpu time is per thread.
+    """
+    def __init__(self, node_path):
+        self.node_path = node_path
+        self.start = None
+        self.wall_time = None
+        self.cpu_time = None
+        self.peak_rss_delta = None
+        self._cpu_start = None
+        self._rss_start = None
+
+    def __enter__(self):
+        self._rss_start = get_peak_rss()
+        self._cpu_start = time.thread_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.wall_time = time.perf_counter() - self.start
+        self.cpu_time = time.thread_time() - self._cpu_start
+        if self._rss_start is not None:
+            self.peak_rss_delta = get_peak_rss() - self._rss_start
+        return False
+
+
+class BuildProfile(object):
+    """Per node timing records of a single build, in execution order. A node
+    that is run more than once, by stepping back over it, gets a record for
+    every run.
+    """
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.records = []
+
+    def __len__(self):
+        return len(self.records)
+
+    def add(self, timer):
+        """Add the results of a stopped NodeTimer.
+
+        :param timer: NodeTimer that has run
+        :type timer: NodeTimer
+        """
+        self.records += [{
+            PROFILE_KEYS.NODE_PATH: timer.node_path,
+            PROFILE_KEYS.START: timer.start - self.start,
+            PROFILE_KEYS.WALL: timer.wall_time,
+            PROFILE_KEYS.CPU: timer.cpu_time,
+            PROFILE_KEYS.RSS: timer.peak_rss_delta
+        }]
+
+    @property
+    def total_wall_time(self):
+        return sum(r[PROFILE_KEYS.WALL] for r in self.records)
+
+    def get_hot_nodes(self, key=PROFILE_KEYS.WALL):
+        """Get the total of `key` per node path, slowest first.
+
+        :param key: PROFILE_KEYS to total and sort by
+        :return: list of (node_path, total) tuples
+        :rtype: list
+        """
+        totals = {}
+        for record in self.records:
+            path = record[PROFILE_KEYS.NODE_PATH]
+            totals[path] = totals.get(path, 0) + (record[key] or 0)
+        return sorted(totals.items(), key=lambda item: item[1],
+                      reverse=True)
+
+    def to_json(self):
+        return json.dumps({'records': self.records}, indent=4)
+
+    def to_chrome_trace(self):
+        """Formats the records as the json Chrome's about:tracing and
+        Perfetto load. Times are in microseconds.
+
+        :rtype: str
+        """
+        events = []
+        for record in self.records:
+            events += [{
+                'name': record[PROFILE_KEYS.NODE_PATH],
+                'cat': 'node',
+                'ph': 'X',
+                'ts': record[PROFILE_KEYS.START] * 1e6,
+                'dur': record[PROFILE_KEYS.WALL] * 1e6,
+                'pid': 0,
+                'tid': 0,
+                'args': {
+                    PROFILE_KEYS.CPU: record[PROFILE_KEYS.CPU],
+                    PROFILE_KEYS.RSS: record[PROFILE_KEYS.RSS]
+                }
+            }]
+        return json.dumps({'traceEvents': events,
+                           'displayTimeUnit': 'ms'})
+
+    def save(self, filepath, chrome_trace=False):
+        """Write the profile to `filepath` as json, or Chrome trace json.
+
+        :param filepath: Path to write to
+        :param chrome_trace: If True the Chrome trace format is written
+        """
+        if chrome_trace:
+            data = self.to_chrome_trace()
+        else:
+            data = self.to_json()
+        with open(filepath, 'w') as fp:
+            fp.write(data)
+        logger.info('Saved build profile to: {}'.format(filepath))
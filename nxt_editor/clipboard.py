@@ -0,0 +1,109 @@
+"""
+Compact clipboard format for copied nodes.
+
+`StageModel.copy_nodes` puts the nodes on the clipboard twice: as indented
+JSON text for pasting into other apps and editors, and under `MIME_TYPE` as
+a fixed size binary header followed by the payload:
+
+    magic (3s) | version (B) | encoding (B)
+
+The payload is the same list of `{node_path: node_data}` dicts as the JSON,
+marshaled and zlib compressed. Pasting between nxt sessions reads this form
+and falls back to the JSON text when it is missing or unreadable.
+"""
+# Built-in
+import logging
+import marshal
+import struct
+import zlib
+
+# Internal
+import nxt_editor
+
+logger = logging.getLogger(nxt_editor.LOGGER_NAME)
+
+MIME_TYPE = 'application/x-nxt-nodes'
+MAGIC = b'NXC'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('!3sBB')
+# Every Python 3 can read marshal version 4, newer versions may not be read
+# by older interpreters.
+MARSHAL_VERSION = 4
+COMPRESS_LEVEL = 1
+
+
+class ENCODING(object):
+    MARSHAL_ZLIB = 0
+
+
+class ClipboardError(Exception):
+    """Raised when clipboard bytes aren't nodes we can read."""
+    pass
+
+
+def to_builtins(data):
+    """Copy of `data` with dict subclasses, such as the OrderedDicts of
+    `get_node_as_dict`, as dicts and tuples as lists, as a JSON round trip
+    would give. Marshal only encodes builtin types.
+
+    :param data: Node data
+    :return: Copy of the data
+    """
+    if isinstance(data, dict):
+        return {key: to_builtins(value) for key, value in data.items()}
+    if isinstance(data, (list, tuple)):
+        return [to_builtins(item) for item in data]
+    return data
+
+
+def encode_nodes(node_data, encoding=ENCODING.MARSHAL_ZLIB):
+    """Encode copied nodes in the compact clipboard format.
+
+    :param node_data: list of {node_path: node_data} dicts
+    :param encoding: ENCODING constant
+    :raises ClipboardError: If the node data holds values marshal can't
+    encode
+    :rtype: bytes
+    """
+    if encoding != ENCODING.MARSHAL_ZLIB:
+        raise ClipboardError('Unknown clipboard encoding: '
+                             '{}'.format(encoding))
+    try:
+        dumped = marshal.dumps(node_data, MARSHAL_VERSION)
+    except ValueError:
+        try:
+            dumped = marshal.dumps(to_builtins(node_data), MARSHAL_VERSION)
+        except ValueError as err:
+            raise ClipboardError('Nodes can not be encoded: {}'.format(err))
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, encoding)
+    return header + zlib.compress(dumped, COMPRESS_LEVEL)
+
+
+def decode_nodes(data):
+    """Decode nodes encoded by `encode_nodes`.
+
+    :param data: bytes, or a QByteArray
+    :raises ClipboardError: If the data is invalid or from a newer version
+    :return: list of {node_path: node_data} dicts
+    :rtype: list
+    """
+    data = bytes(data)
+    if len(data) < HEADER.size:
+        raise ClipboardError('Clipboard data is too short.')
+    magic, version, encoding = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ClipboardError('Invalid clipboard header: '
+                             '{!r}'.format(data[:HEADER.size]))
+    if version > FORMAT_VERSION:
+        raise ClipboardError('Unsupported clipboard version {}, expected {} '
+                             'or lower.'.format(version, FORMAT_VERSION))
+    if encoding != ENCODING.MARSHAL_ZLIB:
+        raise ClipboardError('Unknown clipboard encoding: '
+                             '{}'.format(encoding))
+    try:
+        node_data = marshal.loads(zlib.decompress(data[HEADER.size:]))
+    except (zlib.error, ValueError, EOFError, TypeError) as err:
+        raise ClipboardError('Clipboard data is corrupt: {}'.format(err))
+    if not isinstance(node_data, list):
+        raise ClipboardError('Clipboard data is not a list of nodes.')
+    return node_data
@@ -16,6 +16,7 @@ from nxt.nxt_node import (INTERNAL_ATTRS, META_ATTRS, get_node_as_dict,
 from nxt import nxt_io
 from nxt import GRID_SIZE
 import nxt_editor
+from nxt_editor import MODEL_SIGNALS
 
 logger = logging.getLogger(nxt_editor.LOGGER_NAME)
 
@@ -29,12 +30,149 @@ def processing(func):
     return wrapper
 
 
+class DELTA_KEYS(object):
+    NEW_ATTR = 'NewAttr'
+    CHANGED_ATTR = 'ChangedAttr'
+    NEW_NODE = 'NewNode'
+    REMOVED_NODE = 'RemovedNode'
+
+
+# Stands in for the value of an attr that doesn't exist, as in
+# stage_model.compare_data
+MISSING = object()
+
+
+class CommandDelta(object):
+    """The node and attr changes a command made to each layer, recorded as
+    the command makes them so they never have to be found by diffing layers.
+    Changes are stored per layer real path, then per node path, in the
+    format of `stage_model.compare_data`:
+        {'layer/real/path':
+            {'node/path':
+                {'NewAttr': [('attr_name', value)],
+                'ChangedAttr': [{'attr_name': (old_val, new_val)}],
+                'NewNode': False,
+                'RemovedNode': False}}}
+    An attr that was removed is changed to `MISSING`. A node that was
+    removed and added again, for example renamed back, has both flags.
+    """
+    def __init__(self):
+        self.layers = {}
+
+    def __bool__(self):
+        return bool(self.layers)
+
+    def get_node_changes(self, layer_path, node_path):
+        nodes = self.layers.setdefault(layer_path, {})
+        changes = nodes.get(node_path)
+        if changes is None:
+            changes = {DELTA_KEYS.NEW_ATTR: [], DELTA_KEYS.CHANGED_ATTR: [],
+                       DELTA_KEYS.NEW_NODE: False,
+                       DELTA_KEYS.REMOVED_NODE: False}
+            nodes[node_path] = changes
+        return changes
+
+    def add_node(self, layer_path, node_path):
+        changes = self.get_node_changes(layer_path, node_path)
+        changes[DELTA_KEYS.NEW_NODE] = True
+
+    def remove_node(self, layer_path, node_path):
+        changes = self.get_node_changes(layer_path, node_path)
+        changes[DELTA_KEYS.REMOVED_NODE] = True
+
+    def set_attr(self, layer_path, node_path, attr_name, old_value=MISSING,
+                 new_value=MISSING):
+        """Record an attr being added, changed or removed (`new_value` of
+        MISSING).
+
+        :param layer_path: String of layer real path
+        :param node_path: String of node path
+        :param attr_name: String of attr name
+        :param old_value: Value before the change, MISSING if the attr is new
+        :param new_value: Value after the change, MISSING if it was removed
+        :return: None
+        """
+        changes = self.get_node_changes(layer_path, node_path)
+        if old_value is MISSING:
+            changes[DELTA_KEYS.NEW_ATTR] += [(attr_name, new_value)]
+        else:
+            changes[DELTA_KEYS.CHANGED_ATTR] += [{attr_name: (old_value,
+                                                              new_value)}]
+
+    def set_node_data(self, layer_path, node_path, old_data, new_data):
+        """Record the differences between two `get_node_as_dict` results of
+        the same node. User attrs are recorded by name, everything else by
+        save key.
+
+        :param layer_path: String of layer real path
+        :param node_path: String of node path
+        :param old_data: Node dict before the change
+        :param new_data: Node dict after the change
+        :return: None
+        """
+        old_data = dict(old_data)
+        new_data = dict(new_data)
+        old_attrs = old_data.pop(SAVE_KEY.ATTRS, None) or {}
+        new_attrs = new_data.pop(SAVE_KEY.ATTRS, None) or {}
+        for old, new in ((old_attrs, new_attrs), (old_data, new_data)):
+            for attr_name in set(old) | set(new):
+                old_value = old.get(attr_name, MISSING)
+                new_value = new.get(attr_name, MISSING)
+                if old_value != new_value:
+                    self.set_attr(layer_path, node_path, attr_name,
+                                  old_value, new_value)
+
+    def update(self, other):
+        """Append the changes of `other`, a delta applied after this one.
+
+        :param other: CommandDelta
+        :return: None
+        """
+        for layer_path, nodes in other.layers.items():
+            for node_path, other_changes in nodes.items():
+                changes = self.get_node_changes(layer_path, node_path)
+                for key in (DELTA_KEYS.NEW_ATTR, DELTA_KEYS.CHANGED_ATTR):
+                    changes[key] += other_changes[key]
+                for key in (DELTA_KEYS.NEW_NODE, DELTA_KEYS.REMOVED_NODE):
+                    changes[key] = changes[key] or other_changes[key]
+
+    def inverted(self):
+        """Get the delta that reverts this one, the changes an undo makes.
+
+        :rtype: CommandDelta
+        """
+        inverse = CommandDelta()
+        for layer_path, nodes in self.layers.items():
+            for node_path, changes in nodes.items():
+                inv_changes = inverse.get_node_changes(layer_path, node_path)
+                inv_changes[DELTA_KEYS.NEW_NODE] = \
+                    changes[DELTA_KEYS.REMOVED_NODE]
+                inv_changes[DELTA_KEYS.REMOVED_NODE] = \
+                    changes[DELTA_KEYS.NEW_NODE]
+                inv_attrs = []
+                for attr_name, value in changes[DELTA_KEYS.NEW_ATTR]:
+                    inv_attrs += [(attr_name, value, MISSING)]
+                for change in changes[DELTA_KEYS.CHANGED_ATTR]:
+                    for attr_name, (old, new) in change.items():
+                        inv_attrs += [(attr_name, new, old)]
+                # Undo reverts the changes last to first
+                for attr_name, old, new in reversed(inv_attrs):
+                    inverse.set_attr(layer_path, node_path, attr_name, old,
+                                     new)
+        return inverse
+
+
 class NxtCommand(QUndoCommand):
     def __init__(self, model):
         super(NxtCommand, self).__init__()
         self.model = model
         self.model.layer_saved.connect(self.reset_layer_effected)
         self._layers_effected_by_me = {}
+        # Real paths of every layer this command has changed, see
+        # NxtUndoStack.get_touched_layer_paths
+        self.layer_paths = set()
+        # Node changes made by the last redo, undo reverts them.
+        self.delta = CommandDelta()
 
     def _get_effects(self, layer_path):
         """Gets the effected state for a given layer with context to this
@@ -91,6 +229,7 @@ class NxtCommand(QUndoCommand):
         :param layer_path: string of layer real path
         :return: None
         """
+        self.layer_paths.add(layer_path)
         layer_unsaved = layer_path in self.model.effected_layers
         eff_by_undo, eff_by_redo = self._get_effects(layer_path)
         if not eff_by_undo and layer_unsaved:
@@ -115,6 +254,7 @@ class NxtCommand(QUndoCommand):
         :param layer_path: string of layer real path
         :return: None
         """
+        self.layer_paths.add(layer_path)
         eff_by_undo, eff_by_redo = self._get_effects(layer_path)
         layer_saved = layer_path not in self.model.effected_layers
         if layer_saved:
@@ -130,6 +270,44 @@ class NxtCommand(QUndoCommand):
         self._layers_effected_by_me[layer_path] = {'undo': eff_by_undo,
                                                    'redo': eff_by_redo}
 
+    @staticmethod
+    def _get_child_orders(layer, parent_paths):
+        """Copies the child order of each parent that exists on the layer,
+        for `_record_child_orders` to compare with once the command ran.
+
+        :param layer: SpecLayer
+        :param parent_paths: Iterable of node paths
+        :return: {parent path: child order list}
+        """
+        child_orders = {}
+        for parent_path in parent_paths:
+            if not parent_path:
+                continue
+            parent = layer.lookup(parent_path)
+            if parent is not None:
+                child_order = getattr(parent, INTERNAL_ATTRS.CHILD_ORDER, [])
+                child_orders[parent_path] = list(child_order)
+        return child_orders
+
+    def _record_child_orders(self, layer, child_orders):
+        """Records the parents whose child order changed since
+        `_get_child_orders` in `self.delta`. Adding, removing and moving a
+        node edits its parent's child order in place.
+
+        :param layer: SpecLayer
+        :param child_orders: {parent path: child order list} from before
+        :return: None
+        """
+        for parent_path, old_child_order in child_orders.items():
+            parent = layer.lookup(parent_path)
+            if parent is None:
+                continue
+            child_order = getattr(parent, INTERNAL_ATTRS.CHILD_ORDER, [])
+            if list(child_order) != old_child_order:
+                self.delta.set_attr(layer.real_path, parent_path,
+                                    INTERNAL_ATTRS.CHILD_ORDER,
+                                    old_child_order, list(child_order))
+
 
 class AddNode(NxtCommand):
 
@@ -178,7 +356,8 @@ class AddNode(NxtCommand):
         dirty_nodes += self.created_node_paths
         dirty_nodes += [self.node_path]
         self.undo_effected_layer(self.layer_path)
-        self.model.nodes_changed.emit(tuple(set(dirty_nodes)))
+        self.model.dispatcher.queue(MODEL_SIGNALS.NODES_CHANGED,
+                                    tuple(set(dirty_nodes)))
         self.model.selection = self.prev_selection
 
     @processing
@@ -186,15 +365,21 @@ class AddNode(NxtCommand):
         layer = self.model.lookup_layer(self.layer_path)
         self.created_node_paths = []
         dirty_nodes = []
+        parent_path = self.parent_path or nxt_path.WORLD
+        child_orders = self._get_child_orders(layer, [parent_path])
         nodes, dirty = self.stage.add_node(name=self.name, data=self.data,
                                            parent=self.parent_path,
                                            layer=layer.layer_idx(),
                                            comp_layer=self.model.comp_layer)
         dirty_nodes += dirty
         self.node_path = layer.get_node_path(nodes[0])
+        self.delta = CommandDelta()
+        self.delta.add_node(layer.real_path, self.node_path)
+        self._record_child_orders(layer, child_orders)
         self.model._set_node_pos(node_path=self.node_path, pos=self.pos,
                                  layer=layer)
-        self.model.nodes_changed.emit(tuple(set(dirty_nodes)))
+        self.model.dispatcher.queue(MODEL_SIGNALS.NODES_CHANGED,
+                                    tuple(set(dirty_nodes)))
         self.model.selection = [self.node_path]
         self.redo_effected_layer(layer.real_path)
         self.setText('Added node: {}'.format(self.node_path))
@@ -220,7 +405,6 @@ class DeleteNode(NxtCommand):
         # get undo data
         self.prev_selection = self.model.selection
         self.prev_starts = []
-        self.prev_breaks = {}
         self.node_path = node_path
         self.node_data = {}
         self.others = other_removed_nodes
@@ -252,7 +436,6 @@ class DeleteNode(NxtCommand):
         attr_display = self.node_data.get('attr_display')
         if attr_display is not None:
             self.model._set_attr_display_state(self.node_path, attr_display)
-        user_dir.breakpoints = self.prev_breaks
         ancestor_tuple = self.node_data.get('ancestor_child_order')
         if ancestor_tuple:
             ancestor_path, ancestor_child_order = ancestor_tuple
@@ -261,13 +444,8 @@ class DeleteNode(NxtCommand):
                 setattr(ancestor, INTERNAL_ATTRS.CHILD_ORDER,
                         ancestor_child_order)
         self.model.selection = self.prev_selection
-        # Fixme: Does not account for rebuilding proxy nodes for the dirty nodes
-        dirty_set = tuple(set(dirty))
         self.undo_effected_layer(self.layer_path)
-        if dirty_set != (self.node_path,):
-            self.model.update_comp_layer(rebuild=True)
-        else:
-            self.model.nodes_changed.emit(dirty_set)
+        self.model.recomp_paths(self._get_recomp_paths(layer, dirty))
 
     @processing
     def redo(self):
@@ -275,7 +453,6 @@ class DeleteNode(NxtCommand):
         comp_layer = self.model.comp_layer
         self.node_data = {}
         self.prev_starts = self.model.get_start_nodes(layer)
-        self.prev_breaks = user_dir.breakpoints
         dirty_nodes = []
         node = layer.lookup(self.node_path)
         # get node info
@@ -319,19 +496,42 @@ class DeleteNode(NxtCommand):
             rm_layer_data = False
         for p in self.others[:]:
             self.others += comp_layer.get_node_dirties(p)
+        child_orders = self._get_child_orders(layer, (parent,
+                                                      closest_ancestor_path))
         _, dirty = self.stage.delete_node(node, layer,
                                           comp_layer=comp_layer,
                                           remove_layer_data=rm_layer_data,
                                           other_removed_nodes=self.others)
         dirty_nodes += dirty + [self.node_path]
+        self.delta = CommandDelta()
+        self.delta.remove_node(layer.real_path, self.node_path)
+        self._record_child_orders(layer, child_orders)
         if self.node_path in self.model.selection:
             fix_selection = self.model.selection[:]
             fix_selection.remove(self.node_path)
             self.model.selection = fix_selection
-        self.model.nodes_changed.emit(tuple(set(dirty_nodes)))
+        self.model.dispatcher.queue(MODEL_SIGNALS.NODES_CHANGED,
+                                    tuple(set(dirty_nodes)))
+        # The comp nodes left by delete_node, the node's descendants and
+        # anything instancing it, still inherit from the deleted node.
+        self.model.recomp_paths(self._get_recomp_paths(layer, dirty_nodes))
         self.redo_effected_layer(layer.real_path)
         self.setText("Delete node: {}".format(self.node_path))
 
+    def _get_recomp_paths(self, layer, dirties):
+        """Returns the node paths to re-comp after deleting or restoring
+        this node, its root is always included.
+
+        :param layer: SpecLayer the node is deleted from
+        :param dirties: List of node paths the stage reported as dirty
+        :return: list of node paths
+        """
+        descendants = layer.descendants(self.node_path,
+                                        return_type=layer.RETURNS.Path,
+                                        include_implied=True)
+        paths = [nxt_path.get_root_path(self.node_path), self.node_path]
+        return paths + list(dirties) + list(descendants)
+
 
 class SetNodeAttributeData(NxtCommand):
 
@@ -386,18 +586,25 @@ class SetNodeAttributeData(NxtCommand):
             attr_path = nxt_path.make_attr_path(dirty, self.attr_name)
             changed_attrs += (attr_path,)
         if self.recomp:
-            self.model.update_comp_layer(rebuild=self.recomp)
+            prev_value = self.prev_data.get(META_ATTRS.VALUE)
+            if self.attr_name == INTERNAL_ATTRS.NAME and prev_value:
+                parent_path = nxt_path.get_parent_path(self.node_path)
+                dirties += [nxt_path.join_node_paths(parent_path, prev_value)]
+            self.model.recomp_paths(self._get_recomp_paths(dirties,
+                                                           prev_value))
         else:
             if (self.remove_attr or self.created_node_paths or
                     self.attr_name in (INTERNAL_ATTRS.INSTANCE_PATH,
                                        INTERNAL_ATTRS.PARENT_PATH,
                                        INTERNAL_ATTRS.ENABLED)):
-                self.model.nodes_changed.emit(dirties)
+                self.model.dispatcher.queue(MODEL_SIGNALS.NODES_CHANGED,
+                                            dirties)
             else:
-                self.model.attrs_changed.emit(changed_attrs)
+                self.model.dispatcher.queue(MODEL_SIGNALS.ATTRS_CHANGED,
+                                            changed_attrs)
         if not self.recomp:
             changed = tuple([self.node_path] + self.created_node_paths)
-            self.model.nodes_changed.emit(changed)
+            self.model.dispatcher.queue(MODEL_SIGNALS.NODES_CHANGED, changed)
         self.model.selection = self.prev_selection
         # undo_debug(self, start)
 
@@ -414,6 +621,10 @@ class SetNodeAttributeData(NxtCommand):
         # get the node
         node = layer.lookup(self.node_path)
         dirties = [self.node_path]
+        parent_paths = [nxt_path.get_parent_path(self.node_path)]
+        if self.attr_name == INTERNAL_ATTRS.PARENT_PATH:
+            parent_paths += [self.data.get(META_ATTRS.VALUE)]
+        child_orders = self._get_child_orders(layer, parent_paths)
         if node is None:
             parent_path = nxt_path.get_parent_path(self.node_path)
             name = nxt_path.node_name_from_node_path(self.node_path)
@@ -451,29 +662,86 @@ class SetNodeAttributeData(NxtCommand):
             if self.attr_name in (INTERNAL_ATTRS.INSTANCE_PATH,
                                   INTERNAL_ATTRS.ENABLED):
                 dirties += self.return_value
+        self._record_delta(layer.real_path, created_node)
+        self._record_child_orders(layer, child_orders)
         if self.attr_name in INTERNAL_ATTRS.ALL:
             # TODO: Some functions already calculated the dirty nodes,
             #  do we really need to do it again here?
             dirties += comp.get_node_dirties(self.node_path)
         if self.recomp:
-            self.model.update_comp_layer(rebuild=self.recomp)
+            if (self.attr_name in (INTERNAL_ATTRS.NAME,
+                                   INTERNAL_ATTRS.PARENT_PATH) and
+                    isinstance(self.return_value, str) and
+                    self.return_value.startswith(nxt_path.NODE_SEP)):
+                # Renames and re-parents return the node's new path
+                dirties += [self.return_value]
+            value = self.data.get(META_ATTRS.VALUE)
+            self.model.recomp_paths(self._get_recomp_paths(dirties, value))
         else:
             if (self.remove_attr or self.created_node_paths or
                     self.attr_name in (INTERNAL_ATTRS.INSTANCE_PATH,
                                        INTERNAL_ATTRS.PARENT_PATH,
                                        INTERNAL_ATTRS.ENABLED)):
-                self.model.nodes_changed.emit(dirties)
+                self.model.dispatcher.queue(MODEL_SIGNALS.NODES_CHANGED,
+                                            dirties)
             else:
                 changed_attrs = ()
                 for dirty in dirties:
                     attr_path = nxt_path.make_attr_path(dirty, self.attr_name)
                     changed_attrs += (attr_path,)
-                self.model.attrs_changed.emit(changed_attrs)
+                self.model.dispatcher.queue(MODEL_SIGNALS.ATTRS_CHANGED,
+                                            changed_attrs)
         attr_path = nxt_path.make_attr_path(self.node_path, self.nice_attr_name)
         val = str(self.data.get(META_ATTRS.VALUE))
         self.setText("Set {} to {}".format(attr_path, val))
         # redo_debug(self, start)
 
+    def _record_delta(self, layer_path, created_node):
+        """Record the change the last redo made in `self.delta`.
+
+        :param layer_path: String of layer real path
+        :param created_node: True if the redo created the node
+        :return: None
+        """
+        self.delta = CommandDelta()
+        if created_node:
+            self.delta.add_node(layer_path, self.node_path)
+            return
+        new_path = self.return_value
+        if (self.attr_name in (INTERNAL_ATTRS.NAME,
+                               INTERNAL_ATTRS.PARENT_PATH) and
+                isinstance(new_path, str) and
+                new_path.startswith(nxt_path.NODE_SEP) and
+                new_path != self.node_path):
+            # Renames and re-parents move the node
+            self.delta.remove_node(layer_path, self.node_path)
+            self.delta.add_node(layer_path, new_path)
+            return
+        if self.remove_attr:
+            old_value = MISSING
+            new_value = dict(self.data)
+        else:
+            old_value = self.prev_data
+            new_value = dict(self.prev_data or {})
+            new_value.update(self.data)
+        self.delta.set_attr(layer_path, self.node_path, self.attr_name,
+                            old_value, new_value)
+
+    def _get_recomp_paths(self, dirties, value):
+        """Returns the node paths to re-comp after setting this attr to
+        `value`, including where the node lands if it was re-parented.
+
+        :param dirties: List of node paths already known to be dirty
+        :param value: Value the attr was set to
+        :return: list of node paths
+        """
+        paths = [p for p in dirties if isinstance(p, str)]
+        paths += [self.node_path] + self.created_node_paths
+        if self.attr_name == INTERNAL_ATTRS.PARENT_PATH and value:
+            name = nxt_path.node_name_from_node_path(self.node_path)
+            paths += [nxt_path.join_node_paths(value, name)]
+        return paths
+
 
 class SetNodeAttributeValue(SetNodeAttributeData):
     def __init__(self, node_path, attr_name, value, model, layer_path):
@@ -547,13 +815,14 @@ class DuplicateNodes(NxtCommand):
                                        remove_layer_data=True)
 
         self.model.selection = self.prev_selection
-        self.model.update_comp_layer(rebuild=True)
+        self.model.recomp_paths(self.new_node_paths)
         self.undo_effected_layer(target_layer.real_path)
 
     @processing
     def redo(self):
         new_selection = []
         self.new_node_paths = []
+        self.delta = CommandDelta()
         source_layer = self.model.lookup_layer(self.source_layer_path)
         target_layer = self.model.lookup_layer(self.target_layer_path)
         self.redo_effected_layer(target_layer.real_path)
@@ -570,6 +839,7 @@ class DuplicateNodes(NxtCommand):
                 # add new node path to the list and emit model signal
                 new_node_path = target_layer.get_node_path(new_node)
                 self.new_node_paths += [new_node_path]
+                self.delta.add_node(target_layer.real_path, new_node_path)
                 # self.model.node_added.emit(new_node_path)
 
                 # set position
@@ -582,7 +852,7 @@ class DuplicateNodes(NxtCommand):
                                              layer=target_layer)
 
         self.model.selection = new_selection
-        self.model.update_comp_layer(rebuild=True)
+        self.model.recomp_paths(self.new_node_paths)
         if len(self.node_paths) == 1:
             nodes_str = self.node_paths[0]
         else:
@@ -590,6 +860,63 @@ class DuplicateNodes(NxtCommand):
         self.setText('Duplicated {}'.format(nodes_str))
 
 
+class PasteNodes(NxtCommand):
+
+    """Add many nodes to a layer and re-comp once"""
+
+    def __init__(self, node_entries, model, layer_path):
+        """
+        :param node_entries: list of (name, data, parent_path, pos) tuples,
+        added in order so parents must come before their children.
+        :param model: StageModel
+        :param layer_path: String of layer realpath
+        """
+        super(PasteNodes, self).__init__(model)
+        self.node_entries = node_entries
+        self.layer_path = layer_path
+        self.stage = model.stage
+        self.prev_selection = self.model.selection
+        # resulting nodes
+        self.new_node_paths = []
+
+    @processing
+    def undo(self):
+        layer = self.model.lookup_layer(self.layer_path)
+        for node_path in reversed(self.new_node_paths):
+            node = layer.lookup(node_path)
+            if node is not None:
+                self.stage.delete_node(node, layer, remove_layer_data=True)
+        self.model.recomp_paths(self.new_node_paths)
+        self.model.selection = self.prev_selection
+        self.undo_effected_layer(layer.real_path)
+
+    @processing
+    def redo(self):
+        layer = self.model.lookup_layer(self.layer_path)
+        self.redo_effected_layer(layer.real_path)
+        self.new_node_paths = []
+        self.delta = CommandDelta()
+        new_selection = []
+        for name, data, parent_path, pos in self.node_entries:
+            nodes, _ = self.stage.add_node(name=name, data=data,
+                                           parent=parent_path,
+                                           layer=layer.layer_idx())
+            node_path = layer.get_node_path(nodes[0])
+            self.model._set_node_pos(node_path, pos, layer=layer)
+            new_selection += [node_path]
+            for node in nodes:
+                new_path = layer.get_node_path(node)
+                self.new_node_paths += [new_path]
+                self.delta.add_node(layer.real_path, new_path)
+        self.model.recomp_paths(self.new_node_paths)
+        self.model.selection = new_selection
+        if len(new_selection) == 1:
+            nodes_str = new_selection[0]
+        else:
+            nodes_str = '{} nodes'.format(len(new_selection))
+        self.setText('Pasted {}'.format(nodes_str))
+
+
 class InstanceNode(SetNodeAttributeValue):
 
     """Instance nodes on this graph"""
@@ -746,7 +1073,8 @@ class LocalizeNodes(NxtCommand):
             for attr in local_attrs:
                 if attr not in attrs_to_keep:
                     self.stage.delete_node_attr(node=node, attr_name=attr)
-        self.model.update_comp_layer(rebuild=True)
+        self.model.recomp_paths(list(self.node_paths) +
+                                self.created_node_paths)
         self.undo_effected_layer(layers[0].real_path)
         self.model.selection = self.prev_selection
 
@@ -754,6 +1082,7 @@ class LocalizeNodes(NxtCommand):
     def redo(self):
         self.prev_node_data = {}
         self.created_node_paths = []
+        self.delta = CommandDelta()
         layer = self.model.target_layer
         for node_path in self.node_paths:
             node_data = {}
@@ -768,6 +1097,8 @@ class LocalizeNodes(NxtCommand):
                                                                   layer)
                 target_node = new_nodes[-1]
                 self.created_node_paths += new_paths
+                for new_path in new_paths:
+                    self.delta.add_node(layer.real_path, new_path)
                 # self.model.node_added.emit(node_path)
             # preserve original data
             node_data['data'] = get_node_as_dict(target_node)
@@ -775,9 +1106,16 @@ class LocalizeNodes(NxtCommand):
             self.stage.transfer_node_data(target_node, self.model.target_layer,
                                           display_node,
                                           self.model.comp_layer)
+            self.delta.set_node_data(layer.real_path, node_path,
+                                     node_data['data'],
+                                     get_node_as_dict(target_node))
 
             self.prev_node_data[node_path] = node_data
-        self.model.update_comp_layer(rebuild=bool(self.created_node_paths))
+        if self.created_node_paths:
+            self.model.recomp_paths(list(self.node_paths) +
+                                    self.created_node_paths)
+        else:
+            self.model.update_comp_layer()
         self.redo_effected_layer(layer.real_path)
         self.model.selection = self.prev_selection
         if len(self.node_paths) == 1:
@@ -882,7 +1220,7 @@ class RevertNode(DeleteNode):
             if n is not None:
                 self.stage.delete_node(n, layer, remove_layer_data=False)
         super(RevertNode, self).undo()
-        self.model.update_comp_layer(rebuild=True)
+        self.model.recomp_paths([self.node_path] + self.created_node_paths)
         self.model.selection = self.prev_selection
 
     def redo(self):
@@ -893,7 +1231,13 @@ class RevertNode(DeleteNode):
         new_nodes, new_paths, dirty = _add_node_hierarchy(self.node_path,
                                                           self.model, layer)
         self.created_node_paths += new_paths
-        self.model.update_comp_layer(rebuild=bool(self.created_node_paths))
+        for node_path in new_paths:
+            self.delta.add_node(layer.real_path, node_path)
+        if self.created_node_paths:
+            self.model.recomp_paths([self.node_path] +
+                                    self.created_node_paths)
+        else:
+            self.model.update_comp_layer()
         self.model.selection = self.prev_selection
         self.setText('Revert {}'.format(self.node_path))
 
@@ -974,7 +1318,8 @@ class ParentNodes(NxtCommand):
             if attr_state is not None:
                 self.model._set_attr_display_state(old_node_path, attr_state)
             idx += 1
-        self.model.update_comp_layer(rebuild=True)
+        self.model.recomp_paths(list(self.node_paths) + self.new_node_paths +
+                                self.created_node_paths)
         self.model.selection = self.prev_selection
 
     @processing
@@ -1030,10 +1375,21 @@ class ParentNodes(NxtCommand):
             if not node_hierarchy_data:
                 return
         # parent
+        parent_paths = [self.parent_node_path]
+        for node_data in self.prev_node_data.values():
+            parent_paths += [node_data['parent'],
+                             node_data[INTERNAL_ATTRS.CHILD_ORDER][0]]
+        child_orders = self._get_child_orders(layer, set(parent_paths))
         self.node_path_data = self.stage.parent_nodes(nodes,
                                                       self.parent_node_path,
                                                       layer)
         self.new_node_paths = list(self.node_path_data.values())
+        self.delta = CommandDelta()
+        for old_node_path, new_node_path in self.node_path_data.items():
+            if new_node_path != old_node_path:
+                self.delta.remove_node(layer.real_path, old_node_path)
+                self.delta.add_node(layer.real_path, new_node_path)
+        self._record_child_orders(layer, child_orders)
         idx = 0
         for new_node_path in self.new_node_paths:
             old_node_path = self.node_paths[idx]
@@ -1048,7 +1404,7 @@ class ParentNodes(NxtCommand):
                                                     self.model.top_layer)
                 self.model._set_node_pos(new_node_path, new_pos, layer)
             idx += 1
-        self.model.update_comp_layer(rebuild=True)
+        self.model.recomp_paths(list(self.node_paths) + self.new_node_paths)
 
         self.model.selection = list(self.node_path_data.values())
         if len(self.node_paths) == 1:
@@ -1087,7 +1443,10 @@ class DeleteAttribute(AddAttribute):
         self.data = self.stage.get_node_attr_data(node, self.attr_name, layer)
 
     def undo(self):
+        # Our redo's delta, not the one recorded by the super redo
+        delta = self.delta
         super(DeleteAttribute, self).redo()
+        self.delta = delta
         layer = self.model.lookup_layer(self.layer_path)
         self.undo_effected_layer(layer.real_path)
 
@@ -1097,6 +1456,9 @@ class DeleteAttribute(AddAttribute):
         super(DeleteAttribute, self).undo()
         layer = self.model.lookup_layer(self.layer_path)
         self.redo_effected_layer(layer.real_path)
+        self.delta = CommandDelta()
+        self.delta.set_attr(layer.real_path, self.node_path, self.attr_name,
+                            self.data)
         self.setText("Remove {} attr from {}".format(self.attr_name,
                                                      self.node_path))
 
@@ -1139,6 +1501,14 @@ class RenameAttribute(NxtCommand):
         layer = self.model.lookup_layer(self.layer_path)
         self.rename_attribute(layer, self.attr_name, self.new_attr_name)
         self.redo_effected_layer(layer.real_path)
+        node = layer.lookup(self.node_path)
+        data = self.stage.get_node_attr_data(node, self.new_attr_name, layer,
+                                             quiet=True)
+        self.delta = CommandDelta()
+        self.delta.set_attr(layer.real_path, self.node_path, self.attr_name,
+                            data)
+        self.delta.set_attr(layer.real_path, self.node_path,
+                            self.new_attr_name, new_value=data)
 
     def rename_attribute(self, layer, attr_name, new_attr_name):
 
@@ -1248,7 +1618,8 @@ class SetNodeCollapse(NxtCommand):
         for node_path, prev_value in self.prev_values.items():
             layer.collapse[node_path] = prev_value
             self.model.comp_layer.collapse[node_path] = prev_value
-        self.model.collapse_changed.emit(list(self.prev_values.keys()))
+        self.model.dispatcher.queue(MODEL_SIGNALS.COLLAPSE_CHANGED,
+                                    list(self.prev_values.keys()))
 
     @processing
     def redo(self):
@@ -1261,7 +1632,8 @@ class SetNodeCollapse(NxtCommand):
             layer.collapse[node_path] = self.value
             self.model.comp_layer.collapse[node_path] = self.value
 
-        self.model.collapse_changed.emit(list(self.prev_values.keys()))
+        self.model.dispatcher.queue(MODEL_SIGNALS.COLLAPSE_CHANGED,
+                                    list(self.prev_values.keys()))
         if len(self.node_paths) == 1:
             path_str = self.node_paths[0]
         else:
@@ -1310,7 +1682,8 @@ class SetNodesAreSkipPoints(QUndoCommand):
             func = self.model._remove_skippoint
         for node_path in self.node_paths:
             func(node_path, self.layer_path)
-        self.model.nodes_changed.emit(tuple(self.node_paths))
+        self.model.dispatcher.queue(MODEL_SIGNALS.NODES_CHANGED,
+                                    tuple(self.node_paths))
         if len(self.node_paths) == 1:
             path_str = self.node_paths[0]
         else:
@@ -1350,7 +1723,8 @@ class SetNodeBreakPoint(QUndoCommand):
             func = self.model._remove_breakpoint
         for node_path in self.node_paths:
             func(node_path, layer)
-        self.model.nodes_changed.emit(tuple(self.node_paths))
+        self.model.dispatcher.queue(MODEL_SIGNALS.NODES_CHANGED,
+                                    tuple(self.node_paths))
 
     @processing
     def redo(self):
@@ -1361,7 +1735,8 @@ class SetNodeBreakPoint(QUndoCommand):
             func = self.model._remove_breakpoint
         for node_path in self.node_paths:
             func(node_path, layer)
-        self.model.nodes_changed.emit(tuple(self.node_paths))
+        self.model.dispatcher.queue(MODEL_SIGNALS.NODES_CHANGED,
+                                    tuple(self.node_paths))
         if len(self.node_paths) == 1:
             path_str = self.node_paths[0]
         else:
@@ -1384,15 +1759,15 @@ class ClearBreakpoints(QUndoCommand):
 
     @processing
     def undo(self):
-        user_dir.breakpoints[self.layer_path] = self.prev_breaks
-        self.model.nodes_changed.emit(tuple(self.prev_breaks))
+        user_dir.breakpoint_index.set(self.layer_path, self.prev_breaks)
+        self.model.dispatcher.queue(MODEL_SIGNALS.NODES_CHANGED,
+                                    tuple(self.prev_breaks))
 
     @processing
     def redo(self):
-        self.prev_breaks = user_dir.breakpoints.get(self.layer_path, [])
-        if self.layer_path in list(user_dir.breakpoints.keys()):
-            user_dir.breakpoints.pop(self.layer_path)
-        self.model.nodes_changed.emit(tuple(self.prev_breaks))
+        self.prev_breaks = user_dir.breakpoint_index.clear(self.layer_path)
+        self.model.dispatcher.queue(MODEL_SIGNALS.NODES_CHANGED,
+                                    tuple(self.prev_breaks))
         self.setText("Clear all breakpoints")
 
 
@@ -1555,6 +1930,8 @@ class ReferenceLayer(NxtCommand):
                       }
         layer_data.update(extra_data)
         self.stage.new_sublayer(layer_data=layer_data, idx=self.insert_idx)
+        # Freshly loaded, so it matches its file.
+        self.model.set_layer_clean(self.real_path)
         # Fixme: The next 2 lines each build once
         self.model.update_comp_layer(rebuild=True)
         self.model.set_target_layer(self.real_path)
@@ -1588,31 +1965,32 @@ class MuteToggleLayer(NxtCommand):
         super(MuteToggleLayer, self).__init__(model)
         self.layer_path = layer_path
         self.model = model
-        self.layer_paths = []
+        self.toggled_layer_paths = []
 
     def undo(self):
         self.toggle_state()
-        for layer_path in self.layer_paths:
+        for layer_path in self.toggled_layer_paths:
             self.undo_effected_layer(layer_path)
 
     def redo(self):
-        self.layer_paths = []
+        self.toggled_layer_paths = []
         self.toggle_state()
-        for layer_path in self.layer_paths:
+        for layer_path in self.toggled_layer_paths:
             self.redo_effected_layer(layer_path)
 
     @processing
     def toggle_state(self):
         layer = self.model.lookup_layer(self.layer_path)
+        prev_layers = self.model.active_layers
         if layer is self.model.top_layer:
             state = not layer.get_muted(local=True)
             layer.set_muted(state)
-            self.layer_paths.append(layer.real_path)
+            self.toggled_layer_paths.append(layer.real_path)
         else:
             state = not layer.get_muted(local=False)
             self.model.top_layer.set_mute_over(layer.filepath, state)
-            self.layer_paths.append(self.model.top_layer.real_path)
-        self.model.update_comp_layer(rebuild=True)
+            self.toggled_layer_paths.append(self.model.top_layer.real_path)
+        self.model.rebuild_comp_layer(prev_layers)
         self.model.layer_mute_changed.emit((self.layer_path,))
         self.setText("Toggle {} muted.".format(layer.get_alias()))
 
@@ -1625,32 +2003,32 @@ class SoloToggleLayer(NxtCommand):
         super(SoloToggleLayer, self).__init__(model)
         self.layer_path = layer_path
         self.model = model
-        self.layer_paths = []
+        self.toggled_layer_paths = []
 
     def undo(self):
         self.toggle_state()
-        for layer_path in self.layer_paths:
+        for layer_path in self.toggled_layer_paths:
             self.undo_effected_layer(layer_path)
 
     def redo(self):
-        self.layer_paths = []
+        self.toggled_layer_paths = []
         self.toggle_state()
-        for layer_path in self.layer_paths:
+        for layer_path in self.toggled_layer_paths:
             self.redo_effected_layer(layer_path)
 
     @processing
     def toggle_state(self):
         layer = self.model.lookup_layer(self.layer_path)
-
+        prev_layers = self.model.active_layers
         if layer is self.model.top_layer:
             state = not layer.get_soloed(local=True)
             layer.set_soloed(state)
-            self.layer_paths.append(layer.real_path)
+            self.toggled_layer_paths.append(layer.real_path)
         else:
             state = not layer.get_soloed(local=False)
             self.model.top_layer.set_solo_over(layer.filepath, state)
-            self.layer_paths.append(self.model.top_layer.real_path)
-        self.model.update_comp_layer(rebuild=True)
+            self.toggled_layer_paths.append(self.model.top_layer.real_path)
+        self.model.rebuild_comp_layer(prev_layers)
         self.model.layer_solo_changed.emit((self.layer_path,))
         self.setText("Toggle {} soloed.".format(layer.get_alias()))
 
@@ -465,7 +465,8 @@ class UnsavedLayersDialogue(QtWidgets.QDialog):
             for lay_dict in layer.sub_layers:
                 r_add(stage_model, lay_dict['layer'], item, dirty)
         for s_m in stage_models:
-            r_add(s_m, s_m.top_layer, model, s_m.get_unsaved_changes())
+            r_add(s_m, s_m.top_layer, model,
+                  s_m.get_unsaved_changes(deep_check=True))
         return model
 
     def on_save_released(self):
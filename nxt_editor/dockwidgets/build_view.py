@@ -438,9 +438,15 @@ class BuildModel(QtCore.QAbstractTableModel):
             next_run = row == self.stage_model.last_built_idx
         elif row == 0:
             next_run = True
-        is_start = self.stage_model.get_is_node_start(idx_path)
-        is_break = self.stage_model.get_is_node_breakpoint(idx_path)
-        is_skip = self.stage_model.is_node_skippoint(idx_path)
+        # Only query the state this column displays, data is called for
+        # every cell and every role.
+        is_start = is_break = is_skip = False
+        if column == self.START_COLUMN:
+            is_start = self.stage_model.get_is_node_start(idx_path)
+        elif column == self.BREAK_COLUMN:
+            is_break = self.stage_model.get_is_node_breakpoint(idx_path)
+        elif column == self.SKIP_COLUMN:
+            is_skip = self.stage_model.is_node_skippoint(idx_path)
         if role == QtCore.Qt.CheckStateRole:
             if column == self.START_COLUMN:
                 return QtCore.Qt.Checked if is_start else QtCore.Qt.Unchecked
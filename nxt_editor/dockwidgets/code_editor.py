@@ -255,6 +255,12 @@ class CodeEditor(DockWidgetBase):
         self.editor.hide()
         self.update_background()
 
+    def closeEvent(self, event):
+        # Embedded in a host app the window closes long before the app
+        # quits, the highlighter's thread is started again when needed.
+        self.editor.stop_highlighting()
+        super(CodeEditor, self).closeEvent(event)
+
     def handle_lock_changed(self, *args):
         # TODO: Make it a user pref to lock the code editor when node is locked?
         # self.locked = self.stage_model.get_node_locked(self.node_path)
@@ -642,12 +648,38 @@ class NxtCodeEditor(QtWidgets.QPlainTextEdit):
         # apply syntax highlighting
         self.syntax_highlighter = syntax_highlighter
         self.highlighter = self.syntax_highlighter(self.document())
+        if isinstance(self.highlighter, syntax.PythonHighlighter):
+            self.highlighter.get_visible_blocks = self.get_visible_blocks
 
         # scroll bar memory
         func = self.update_previous_scroll_positions
         self.verticalScrollBar().valueChanged.connect(func)
         self.installEventFilter(self)
 
+    def setPlainText(self, text):
+        """Large code is highlighted in the background so the text shows
+        without waiting on the highlighter.
+        """
+        if not isinstance(self.highlighter, syntax.PythonHighlighter):
+            super(NxtCodeEditor, self).setPlainText(text)
+            return
+        with self.highlighter.highlight_in_background(text):
+            super(NxtCodeEditor, self).setPlainText(text)
+
+    def stop_highlighting(self):
+        """Stops any background highlighting and its worker thread."""
+        if isinstance(self.highlighter, syntax.PythonHighlighter):
+            self.highlighter.stop_worker()
+
+    def get_visible_blocks(self):
+        """
+        :return: tuple of the first and last visible block numbers
+        """
+        first = self.firstVisibleBlock().blockNumber()
+        bottom_left = self.viewport().rect().bottomLeft()
+        last = self.cursorForPosition(bottom_left).blockNumber()
+        return first, last
+
     def dragEnterEvent(self, event):
         if event.mimeData().hasFormat("text/plain"):
             event.acceptProposedAction()
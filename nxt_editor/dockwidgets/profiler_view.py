@@ -0,0 +1,227 @@
+# Builtin
+import logging
+
+# External
+from Qt import QtWidgets, QtGui, QtCore
+
+# Internal
+from nxt_editor.dockwidgets.dock_widget_base import DockWidgetBase
+from nxt_editor.build_profiler import PROFILE_KEYS
+import nxt_editor
+from nxt_editor import colors
+
+logger = logging.getLogger(nxt_editor.LOGGER_NAME)
+
+
+class ProfilerView(DockWidgetBase):
+    """Displays the per node timings of the last build. A table lists the
+    nodes slowest first and a timeline draws each node's run as a bar. The
+    profile can be exported as json or as a Chrome trace.
+    """
+
+    def __init__(self, parent=None):
+        super(ProfilerView, self).__init__(title='Profiler', parent=parent)
+        self.main_window = parent
+        self.main_widget = QtWidgets.QWidget()
+        self.main_layout = QtWidgets.QVBoxLayout()
+        self.main_widget.setLayout(self.main_layout)
+        self.setWidget(self.main_widget)
+
+        self.summary_label = QtWidgets.QLabel()
+        self.export_json_button = QtWidgets.QPushButton('Export JSON')
+        self.export_json_button.pressed.connect(self.export_json)
+        self.export_trace_button = QtWidgets.QPushButton('Export Trace')
+        self.export_trace_button.setToolTip('Export as a Chrome trace, '
+                                            'viewable in chrome://tracing '
+                                            'or Perfetto.')
+        self.export_trace_button.pressed.connect(self.export_chrome_trace)
+        self.controls_layout = QtWidgets.QHBoxLayout()
+        self.controls_layout.addWidget(self.summary_label, 1)
+        self.controls_layout.addWidget(self.export_json_button, 0)
+        self.controls_layout.addWidget(self.export_trace_button, 0)
+        self.main_layout.addLayout(self.controls_layout)
+
+        self.splitter = QtWidgets.QSplitter(QtCore.Qt.Vertical)
+        self.hot_table = QtWidgets.QTableWidget(0, 3)
+        self.hot_table.setHorizontalHeaderLabels(['Path', 'Wall (s)',
+                                                  'CPU (s)'])
+        self.hot_table.verticalHeader().hide()
+        self.hot_table.setEditTriggers(QtWidgets.QTableWidget.NoEditTriggers)
+        self.hot_table.setSelectionBehavior(QtWidgets.QTableWidget.SelectRows)
+        header = self.hot_table.horizontalHeader()
+        header.setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        self.hot_table.cellClicked.connect(self.on_row_clicked)
+        self.timeline = ProfileTimeline()
+        self.timeline.node_clicked.connect(self.select_node)
+        self.timeline_scroll = QtWidgets.QScrollArea()
+        self.timeline_scroll.setWidgetResizable(True)
+        self.timeline_scroll.setWidget(self.timeline)
+        self.splitter.addWidget(self.hot_table)
+        self.splitter.addWidget(self.timeline_scroll)
+        self.main_layout.addWidget(self.splitter)
+
+        self.profile = None
+        self.on_build_profile_changed(None)
+
+    def set_stage_model(self, model):
+        super(ProfilerView, self).set_stage_model(model)
+        if not self.stage_model:
+            return
+        self.main_widget.setEnabled(True)
+        self.on_build_profile_changed(self.stage_model.build_profile)
+
+    def set_stage_model_connections(self, model, connect):
+        self.model_signal_connections = [
+            (model.build_profile_changed, self.on_build_profile_changed)
+        ]
+        super(ProfilerView, self).set_stage_model_connections(model, connect)
+
+    def on_stage_model_destroyed(self):
+        super(ProfilerView, self).on_stage_model_destroyed()
+        self.on_build_profile_changed(None)
+        self.main_widget.setEnabled(False)
+
+    def on_build_profile_changed(self, profile):
+        self.profile = profile
+        self.timeline.set_profile(profile)
+        self.hot_table.setRowCount(0)
+        has_records = bool(profile)
+        self.export_json_button.setEnabled(has_records)
+        self.export_trace_button.setEnabled(has_records)
+        if not has_records:
+            self.summary_label.setText('No build profiled')
+            return
+        msg = '{} node(s) in {:.3f} second(s)'
+        self.summary_label.setText(msg.format(len(profile),
+                                              profile.total_wall_time))
+        cpu_times = dict(profile.get_hot_nodes(PROFILE_KEYS.CPU))
+        hot_nodes = profile.get_hot_nodes()
+        self.hot_table.setRowCount(len(hot_nodes))
+        for row, (path, wall_time) in enumerate(hot_nodes):
+            cells = (path, '{:.4f}'.format(wall_time),
+                     '{:.4f}'.format(cpu_times[path]))
+            for column, text in enumerate(cells):
+                item = QtWidgets.QTableWidgetItem(text)
+                self.hot_table.setItem(row, column, item)
+
+    def on_row_clicked(self, row, column):
+        self.select_node(self.hot_table.item(row, 0).text())
+
+    def select_node(self, node_path):
+        if not self.stage_model:
+            return
+        if self.stage_model.node_exists(node_path):
+            self.stage_model.select_and_frame(node_path)
+
+    def export_json(self):
+        self._export('JSON (*.json)', chrome_trace=False)
+
+    def export_chrome_trace(self):
+        self._export('Chrome Trace (*.json)', chrome_trace=True)
+
+    def _export(self, file_filter, chrome_trace):
+        if not self.profile:
+            return
+        file_path = QtWidgets.QFileDialog.getSaveFileName(self,
+                                                          'Export Profile',
+                                                          filter=file_filter)
+        file_path = file_path[0]
+        if not file_path:
+            return
+        self.profile.save(file_path, chrome_trace=chrome_trace)
+
+
+class ProfileTimeline(QtWidgets.QWidget):
+    """Draws each node run of a BuildProfile as a bar, left to right by start
+    time with one row per run. The timeline is as tall as its rows, it is
+    meant to be shown in a scroll area and only the exposed rows are drawn.
+    """
+    node_clicked = QtCore.Signal(str)
+    ROW_HEIGHT = 14
+    MARGIN = 4
+
+    def __init__(self, parent=None):
+        super(ProfileTimeline, self).__init__(parent=parent)
+        self.profile = None
+        self.end = 1
+        self.setMinimumHeight(60)
+
+    def set_profile(self, profile):
+        self.profile = profile
+        rows = len(profile) if profile else 0
+        if rows:
+            self.end = max(r[PROFILE_KEYS.START] + r[PROFILE_KEYS.WALL]
+                           for r in profile.records) or 1
+        self.setMinimumHeight(max(60, rows * self.ROW_HEIGHT +
+                                  self.MARGIN * 2))
+        self.update()
+
+    def get_rows(self, top, bottom):
+        """Get the range of rows between the given y positions.
+
+        :rtype: range
+        """
+        if not self.profile:
+            return range(0)
+        first = int((top - self.MARGIN) // self.ROW_HEIGHT)
+        last = int((bottom - self.MARGIN) // self.ROW_HEIGHT)
+        return range(max(0, first), min(len(self.profile), last + 1))
+
+    def get_bar_rects(self, rows=None):
+        """Get the rect of each record's bar for the current widget size.
+
+        :param rows: Range of rows to get, defaults to every row
+        :return: list of (QRectF, record) tuples
+        :rtype: list
+        """
+        if not self.profile:
+            return []
+        records = self.profile.records
+        if rows is None:
+            rows = range(len(records))
+        width = self.width() - self.MARGIN * 2
+        rects = []
+        for row in rows:
+            record = records[row]
+            x = self.MARGIN + width * record[PROFILE_KEYS.START] / self.end
+            w = max(1.0, width * record[PROFILE_KEYS.WALL] / self.end)
+            y = self.MARGIN + row * self.ROW_HEIGHT
+            rect = QtCore.QRectF(x, y, w, self.ROW_HEIGHT - 2)
+            rects += [(rect, record)]
+        return rects
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        exposed = event.rect()
+        painter.fillRect(exposed, QtGui.QColor(40, 40, 40))
+        painter.setPen(QtCore.Qt.NoPen)
+        painter.setBrush(colors.START_COLOR)
+        rows = self.get_rows(exposed.top(), exposed.bottom())
+        for rect, record in self.get_bar_rects(rows):
+            painter.drawRect(rect)
+        painter.end()
+
+    def mousePressEvent(self, event):
+        y = event.pos().y()
+        for rect, record in self.get_bar_rects(self.get_rows(y, y)):
+            if rect.top() <= y <= rect.bottom():
+                self.node_clicked.emit(record[PROFILE_KEYS.NODE_PATH])
+                return
+        super(ProfileTimeline, self).mousePressEvent(event)
+
+    def event(self, event):
+        if event.type() == QtCore.QEvent.ToolTip:
+            pos = QtCore.QPointF(event.pos())
+            rows = self.get_rows(pos.y(), pos.y())
+            for rect, record in self.get_bar_rects(rows):
+                if rect.contains(pos):
+                    tip = '{}\nwall: {:.4f}s\ncpu: {:.4f}s'
+                    tip = tip.format(record[PROFILE_KEYS.NODE_PATH],
+                                     record[PROFILE_KEYS.WALL],
+                                     record[PROFILE_KEYS.CPU])
+                    QtWidgets.QToolTip.showText(event.globalPos(), tip)
+                    return True
+            QtWidgets.QToolTip.hideText()
+            event.ignore()
+            return True
+        return super(ProfileTimeline, self).event(event)
@@ -27,6 +27,10 @@ from nxt import tokens
 
 # Fixme: Should this be a pref?
 HISTORICAL_MAX_CHARS = 50
+ATTR_TYPE_ICON_SIZE = 10
+DEFAULT_ATTR_TYPE_COLOR = QtGui.QColor(QtCore.Qt.gray)
+# {(rgba, size): QPixmap}
+_attr_type_icons = {}
 
 logger = logging.getLogger(LOGGER_NAME)
 
@@ -521,10 +525,19 @@ class PropertyEditor(DockWidgetBase):
             self.set_represented_node()
 
     def handle_attrs_changed(self, attr_paths):
+        attr_names = []
         for path in attr_paths:
-            if self.node_path == nxt_path.node_path_from_attr_path(path):
+            if self.node_path != nxt_path.node_path_from_attr_path(path):
+                continue
+            attr_name = nxt_path.attr_name_from_attr_path(path)
+            if attr_name in INTERNAL_ATTRS.ALL:
                 self.set_represented_node()
                 return
+            attr_names += [attr_name]
+        if attr_names:
+            # Only the changed rows need to be queried again
+            self.model.set_represented_node(node_path=self.node_path,
+                                            attr_names=attr_names)
 
     def handle_node_moved(self, node_path):
         if node_path == self.node_path:
@@ -1079,6 +1092,7 @@ class PropertyEditor(DockWidgetBase):
 
 class PropertyModel(QtCore.QAbstractTableModel):
     """Property Editor model"""
+    RESIZE_PRECISION = 20
 
     def __init__(self, parent=None, graph_model=None, node_path=None, view=None, headers=None):
         """Initialize the data structure and get header labels.
@@ -1111,8 +1125,22 @@ class PropertyModel(QtCore.QAbstractTableModel):
         self.attr_data = []
         self.attr_data_resolved = []
         self.attr_data_cached = []
+        self.attr_memo = {}
+        self.data_state = None
+        # {(node_path, attr_name, column): tooltip} of the generation in
+        # tooltip_generation, see SignalDispatcher.generation
+        self.tooltips = {}
+        self.tooltip_generation = None
+        # {(color, lighter): QColor}
+        self.foreground_colors = {}
+        self.instanced_font = QtGui.QFont()
+        self.instanced_font.setItalic(True)
         self.selected_indexes = []
         self.horizontal_header = self.view.horizontalHeader()
+        # Size columns to a limited number of rows, by default Qt checks
+        # 1000 rows which would resolve every attr, see `resolve_row`.
+        self.horizontal_header.setResizeContentsPrecision(
+            self.RESIZE_PRECISION)
         self.state = None
         self.horizontal_header.sortIndicatorChanged.connect(self.save_state)
         self.horizontal_header.sectionResized.connect(self.save_state)
@@ -1123,14 +1151,23 @@ class PropertyModel(QtCore.QAbstractTableModel):
     def resolved(self):
         return self.stage_model.data_state
 
-    def set_represented_node(self, node_path=None):
-        """Sends node data for selected node to the model.
+    def set_represented_node(self, node_path=None, attr_names=None):
+        """Sends node data for selected node to the model. Only the attr
+        names and localities are queried here, the rest of a row is resolved
+        the first time the view asks for it, see `resolve_row`.
+        When the node is already represented the previous and new attrs are
+        diffed and only the rows that were added, removed or changed are
+        updated, so the view keeps its scroll position and selection.
 
-        :param node_path:
+        :param node_path: String of node path
+        :param attr_names: Optional list of attr names that changed, when
+        given only those attrs (and attrs whose locality or tokens may have
+        changed) are queried again. By default every attr is queried again.
         :return:
         """
         comp_layer = self.stage_model.comp_layer
         stage_model = self.stage_model
+        prev_node_path = self.node_path
         self.node_path = node_path
         if not self.node_path or not stage_model.node_exists(node_path,
                                                              comp_layer):
@@ -1147,79 +1184,36 @@ class PropertyModel(QtCore.QAbstractTableModel):
         inst_attrs = stage_model.get_node_instanced_attr_names(node_path,
                                                                comp_layer)
         inst_attrs = sorted(inst_attrs)
-        self.node_attr_names = []
-        for attr_list in (local_attrs, parent_attrs, inst_attrs):
+        node_attr_names = []
+        localities = {}
+        for attr_list, locality in ((local_attrs, LOCALITIES.local),
+                                    (parent_attrs, LOCALITIES.inherited),
+                                    (inst_attrs, LOCALITIES.instanced)):
             for attr in attr_list:
-                if attr not in self.node_attr_names:
-                    self.node_attr_names += [attr]
-        cached_attrs = stage_model.get_cached_attr_names(node_path)
+                if attr not in localities:
+                    localities[attr] = locality
+                    node_attr_names += [attr]
         if stage_model.data_state == DATA_STATE.CACHED:
+            cached_attrs = stage_model.get_cached_attr_names(node_path)
             for attr_name in cached_attrs:
-                if attr_name not in self.node_attr_names:
-                    self.node_attr_names += [attr_name]
+                if attr_name not in localities:
+                    localities[attr_name] = LOCALITIES.code
+                    node_attr_names += [attr_name]
+        data_state = stage_model.data_state
+        if (node_path == prev_node_path and data_state == self.data_state and
+                self.attr_data and node_attr_names):
+            self.update_rows(node_attr_names, localities, attr_names)
+            return
+        self.data_state = data_state
+        self.node_attr_names = node_attr_names
+        self.node_attr_draw_details = {}
+        self.attr_memo = {}
         self.attr_data = []
-        self.attr_data_resolved = []
-        self.attr_data_cached = []
         for attr_name in self.node_attr_names:
-            # get cached data
-            cached = DATA_STATE.CACHED
-            attr_cached = stage_model.get_node_attr_value(self.node_path,
-                                                          attr_name,
-                                                          data_state=cached,
-                                                          as_string=True)
-            self.attr_data_cached += [attr_cached]
-            # get resolved data
-            resolved = DATA_STATE.RESOLVED
-            resolved_val = stage_model.get_node_attr_value(node_path,
-                                                           attr_name,
-                                                           comp_layer,
-                                                           data_state=resolved)
-            self.attr_data_resolved += [resolved_val]
-
-            # Get locality
-            if attr_name in local_attrs:
-                locality = LOCALITIES.local
-            elif attr_name in parent_attrs:
-                locality = LOCALITIES.inherited
-            elif attr_name in inst_attrs:
-                locality = LOCALITIES.instanced
-            elif attr_name in cached_attrs:
-                locality = LOCALITIES.code
-            # get raw data
-            raw = DATA_STATE.RAW
-            attr_value = stage_model.get_node_attr_value(node_path, attr_name,
-                                                         comp_layer,
-                                                         data_state=raw,
-                                                         as_string=True)
-            type_layer = comp_layer
-            if (stage_model.data_state == DATA_STATE.CACHED and
-                stage_model.current_rt_layer):
-                type_layer = stage_model.current_rt_layer.cache_layer
-            attr_type = stage_model.get_node_attr_type(node_path, attr_name,
-                                                       type_layer)
-            if locality == LOCALITIES.code:
-                attr_source = node_path
-            else:
-                attr_source = stage_model.get_node_attr_source_path(node_path,
-                                                                    attr_name,
-                                                                    comp_layer)
-            attr_comment = stage_model.get_node_attr_comment(node_path,
-                                                             attr_name,
-                                                             comp_layer)
-            # add data row
-            row_dict = {COLUMNS.name: attr_name,
-                        COLUMNS.value: attr_value,
-                        COLUMNS.nxt_type: attr_type,
-                        COLUMNS.source: attr_source,
-                        COLUMNS.locality: locality,
-                        COLUMNS.comment: attr_comment}
-            row_data = COLUMNS.column_dict_to_list(row_dict)
-            self.attr_data += [row_data]
-
-            # get draw details for this attr
-            color = stage_model.get_node_attr_color(node_path, attr_name,
-                                                    comp_layer)
-            self.node_attr_draw_details[attr_name] = {'color': color}
+            locality = localities[attr_name]
+            self.attr_data += [self.get_unresolved_row(attr_name, locality)]
+        self.attr_data_resolved = [None] * len(self.attr_data)
+        self.attr_data_cached = [None] * len(self.attr_data)
 
         # set model data
         self.horizontal_header.sortIndicatorChanged.disconnect(self.save_state)
@@ -1258,11 +1252,184 @@ class PropertyModel(QtCore.QAbstractTableModel):
                     self.state = ''
             self.view.resizeColumnToContents(COLUMNS.nxt_type)
 
+    def get_row_values(self, attr_name, locality):
+        """Queries the stage for everything a row of the given attr shows.
+
+        :param attr_name: String of attr name
+        :param locality: LOCALITIES constant
+        :return: tuple of (row_data, cached_value, resolved_value, color)
+        """
+        stage_model = self.stage_model
+        node_path = self.node_path
+        comp_layer = stage_model.comp_layer
+        # get cached data
+        cached = DATA_STATE.CACHED
+        attr_cached = stage_model.get_node_attr_value(node_path, attr_name,
+                                                      data_state=cached,
+                                                      as_string=True)
+        # get resolved data
+        resolved = DATA_STATE.RESOLVED
+        resolved_val = stage_model.get_node_attr_value(node_path, attr_name,
+                                                       comp_layer,
+                                                       data_state=resolved)
+        # get raw data
+        raw = DATA_STATE.RAW
+        attr_value = stage_model.get_node_attr_value(node_path, attr_name,
+                                                     comp_layer,
+                                                     data_state=raw,
+                                                     as_string=True)
+        type_layer = comp_layer
+        if (stage_model.data_state == DATA_STATE.CACHED and
+                stage_model.current_rt_layer):
+            type_layer = stage_model.current_rt_layer.cache_layer
+        attr_type = stage_model.get_node_attr_type(node_path, attr_name,
+                                                   type_layer)
+        if locality == LOCALITIES.code:
+            attr_source = node_path
+        else:
+            attr_source = stage_model.get_node_attr_source_path(node_path,
+                                                                attr_name,
+                                                                comp_layer)
+        attr_comment = stage_model.get_node_attr_comment(node_path, attr_name,
+                                                         comp_layer)
+        row_dict = {COLUMNS.name: attr_name,
+                    COLUMNS.value: attr_value,
+                    COLUMNS.nxt_type: attr_type,
+                    COLUMNS.source: attr_source,
+                    COLUMNS.locality: locality,
+                    COLUMNS.comment: attr_comment}
+        row_data = COLUMNS.column_dict_to_list(row_dict)
+        # get draw details for this attr
+        color = stage_model.get_node_attr_color(node_path, attr_name,
+                                                comp_layer)
+        return row_data, attr_cached, resolved_val, color
+
+    def get_unresolved_row(self, attr_name, locality):
+        """Row data for an attr that hasn't been resolved yet, only the name
+        and locality columns are filled in.
+
+        :param attr_name: String of attr name
+        :param locality: LOCALITIES constant
+        :return: list of row data
+        """
+        row_dict = {COLUMNS.name: attr_name,
+                    COLUMNS.locality: locality}
+        return COLUMNS.column_dict_to_list(row_dict)
+
+    def resolve_row(self, row):
+        """Queries the stage for the values of the given row, unless they
+        are memoized from an earlier call. Rows are resolved lazily so that
+        representing a node only costs as much as the rows that are shown.
+
+        :param row: Int of row
+        :return: None
+        """
+        if not 0 <= row < len(self.node_attr_names):
+            return
+        attr_name = self.node_attr_names[row]
+        if attr_name in self.attr_memo:
+            return
+        locality = self.attr_data[row][COLUMNS.locality]
+        self.set_row(row, self.get_row_values(attr_name, locality))
+
+    def update_rows(self, node_attr_names, localities, attr_names=None):
+        """Brings the rows of the represented node in line with the given
+        attrs, using targeted row removes, inserts and data changes rather
+        than a model reset. Rows that were never resolved are left for the
+        view to resolve when it shows them.
+
+        :param node_attr_names: Ordered list of the node's attr names
+        :param localities: dict of {attr_name: LOCALITIES constant}
+        :param attr_names: Optional list of attr names known to have
+        changed, if None every attr is queried again.
+        :return: None
+        """
+        if attr_names is None:
+            stale = set(node_attr_names)
+        else:
+            stale = set(attr_names)
+        self.horizontal_header.sortIndicatorChanged.disconnect(self.save_state)
+        self.horizontal_header.sectionResized.disconnect(self.save_state)
+        for row in reversed(range(len(self.node_attr_names))):
+            if self.node_attr_names[row] not in localities:
+                self.remove_row(row)
+        last_column = len(self.headers) - 1
+        for row, attr_name in enumerate(node_attr_names):
+            locality = localities[attr_name]
+            current = None
+            if row < len(self.node_attr_names):
+                current = self.node_attr_names[row]
+            if current != attr_name:
+                if attr_name in self.node_attr_names:
+                    # The attr moved, i.e. its locality changed
+                    self.remove_row(self.node_attr_names.index(attr_name))
+                self.insert_row(row, attr_name, locality)
+                continue
+            memo = self.attr_memo.get(attr_name)
+            if locality != self.attr_data[row][COLUMNS.locality]:
+                self.attr_memo.pop(attr_name, None)
+                self.attr_data[row] = self.get_unresolved_row(attr_name,
+                                                              locality)
+            elif memo is None:
+                # Nothing to invalidate, it is resolved when shown
+                continue
+            else:
+                raw_value = self.attr_data[row][COLUMNS.value] or ''
+                # Tokens may refer to any of the changed attrs
+                if (attr_name not in stale and
+                        tokens.TOKEN_PREFIX not in raw_value):
+                    continue
+                # Resolved rows have likely been shown, only signal the
+                # view if they really changed.
+                row_values = self.get_row_values(attr_name, locality)
+                if row_values == memo:
+                    continue
+                self.set_row(row, row_values)
+            self.dataChanged.emit(self.index(row, 0),
+                                  self.index(row, last_column))
+        self.horizontal_header.sortIndicatorChanged.connect(self.save_state)
+        self.horizontal_header.sectionResized.connect(self.save_state)
+
+    def set_row(self, row, row_values):
+        row_data, cached, resolved, color = row_values
+        attr_name = row_data[COLUMNS.name]
+        self.attr_memo[attr_name] = row_values
+        self.attr_data[row] = row_data
+        self.attr_data_cached[row] = cached
+        self.attr_data_resolved[row] = resolved
+        self.node_attr_draw_details[attr_name] = {'color': color}
+        self.tooltips.pop((self.node_path, attr_name, COLUMNS.value), None)
+
+    def insert_row(self, row, attr_name, locality):
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self.node_attr_names.insert(row, attr_name)
+        self.attr_data.insert(row, self.get_unresolved_row(attr_name,
+                                                           locality))
+        self.attr_data_cached.insert(row, None)
+        self.attr_data_resolved.insert(row, None)
+        self.endInsertRows()
+
+    def remove_row(self, row):
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        attr_name = self.node_attr_names.pop(row)
+        self.attr_data.pop(row)
+        self.attr_data_cached.pop(row)
+        self.attr_data_resolved.pop(row)
+        self.attr_memo.pop(attr_name, None)
+        self.node_attr_draw_details.pop(attr_name, None)
+        self.endRemoveRows()
+
     def get_data(self):
         return self._data
 
     def clear(self):
         self.beginResetModel()
+        self.node_attr_names = []
+        self.node_attr_draw_details = {}
+        self.attr_data = []
+        self.attr_data_resolved = []
+        self.attr_data_cached = []
+        self.attr_memo = {}
         self._data = [[]]
         self.endResetModel()
 
@@ -1283,6 +1450,7 @@ class PropertyModel(QtCore.QAbstractTableModel):
 
         row = index.row()
         column = index.column()
+        self.resolve_row(row)
         if value == self.attr_data[row][column] and column != COLUMNS.source:
             return False
 
@@ -1325,6 +1493,10 @@ class PropertyModel(QtCore.QAbstractTableModel):
 
         row = index.row()
         column = index.column()
+        # Sorting by name or locality doesn't need the row resolved
+        if (role not in (None, QtCore.Qt.DisplayRole, QtCore.Qt.FontRole) or
+                column not in (COLUMNS.name, COLUMNS.locality)):
+            self.resolve_row(row)
         cached_state = DATA_STATE.CACHED
         resolved_state = DATA_STATE.RESOLVED
         if role is None:
@@ -1364,62 +1536,81 @@ class PropertyModel(QtCore.QAbstractTableModel):
                 return self._data[row][column]
 
         if role == QtCore.Qt.ToolTipRole:
-            if column == COLUMNS.value:
-                value = '   value : ' + (',\n ' + (' ' * 10)).join(
-                    textwrap.wrap(self._data[row][COLUMNS.value], 100))
-                resolved_state = 'resolved : ' + (',\n ' + (' ' * 10)).join(
-                    textwrap.wrap(str(self.attr_data_resolved[row]), 100))
-                cached_state = '  cached : ' + (',\n ' + (' ' * 10)).join(
-                    textwrap.wrap(str(self.attr_data_cached[row]), 100))
-                return '\n'.join([value, resolved_state, cached_state])
-            elif column == COLUMNS.source:
-                path = self.node_path
-                name = index.sibling(index.row(), COLUMNS.name).data()
-                historicals = self.stage_model.get_historical_opinions(path,
-                                                                       name)
-                lines = []
-                for historical in historicals:
-                    _, source = historical.get(META_ATTRS.SOURCE)
-                    val = historical.get(META_ATTRS.VALUE)
-                    if len(val) > 50:
-                        val = val[:50] + '...'
-                    text = source + '.' + name + '\t' + val
-                    lines += [text]
-                if not historicals:
-                    lines = ['No Historical Opinions']
-                return '\n'.join(lines)
+            return self.get_tooltip(row, column)
 
         if role == QtCore.Qt.ForegroundRole:
             attr_name = self._data[row][COLUMNS.name]
             locality_idx = self._data[row][COLUMNS.locality]
             color = self.node_attr_draw_details[attr_name]['color']
-            if locality_idx in (LOCALITIES.local, LOCALITIES.code):
-                return QtGui.QColor(color).lighter(150)
-            else:
-                return QtGui.QColor(color).darker(150)
+            lighter = locality_idx in (LOCALITIES.local, LOCALITIES.code)
+            key = (color, lighter)
+            foreground = self.foreground_colors.get(key)
+            if foreground is None:
+                if lighter:
+                    foreground = QtGui.QColor(color).lighter(150)
+                else:
+                    foreground = QtGui.QColor(color).darker(150)
+                self.foreground_colors[key] = foreground
+            return foreground
 
         if role == QtCore.Qt.FontRole:
             if self._data[row][COLUMNS.locality] == LOCALITIES.instanced:
-                font = QtGui.QFont()
-                font.setItalic(True)
-                return font
+                return self.instanced_font
 
         if role == QtCore.Qt.DecorationRole and column == COLUMNS.nxt_type:
             attr_type = self._data[row][column]
-            color = colors.ATTR_COLORS.get(attr_type, QtCore.Qt.gray)
-            icon = QtGui.QPixmap(QtCore.QSize(10, 10))
-            icon.fill(QtCore.Qt.transparent)
-            painter = QtGui.QPainter(icon)
-            painter.setRenderHint(QtGui.QPainter.Antialiasing)
-            painter.setBrush(color)
-            painter.setPen(QtCore.Qt.NoPen)
-            painter.drawEllipse(QtCore.QPointF(7, 5), 3, 3)
-            del painter
-            return icon
+            color = colors.ATTR_COLORS.get(attr_type, DEFAULT_ATTR_TYPE_COLOR)
+            return get_attr_type_icon(color)
 
         if role == QtCore.Qt.EditRole:
             return self._data[row][column]
 
+    def get_tooltip(self, row, column):
+        """Tooltip of the value or source column of the given row. Tooltips
+        are memoized per node, attr and column until the comp changes, see
+        SignalDispatcher.generation, so hovering doesn't query the stage.
+
+        :param row: Int of row
+        :param column: COLUMNS constant
+        :return: String tooltip or None
+        """
+        if column not in (COLUMNS.value, COLUMNS.source):
+            return None
+        generation = self.stage_model.dispatcher.generation
+        if generation != self.tooltip_generation:
+            self.tooltips = {}
+            self.tooltip_generation = generation
+        name = self._data[row][COLUMNS.name]
+        key = (self.node_path, name, column)
+        tooltip = self.tooltips.get(key)
+        if tooltip is not None:
+            return tooltip
+        if column == COLUMNS.value:
+            value = '   value : ' + (',\n ' + (' ' * 10)).join(
+                textwrap.wrap(self._data[row][COLUMNS.value], 100))
+            resolved_state = 'resolved : ' + (',\n ' + (' ' * 10)).join(
+                textwrap.wrap(str(self.attr_data_resolved[row]), 100))
+            cached_state = '  cached : ' + (',\n ' + (' ' * 10)).join(
+                textwrap.wrap(str(self.attr_data_cached[row]), 100))
+            tooltip = '\n'.join([value, resolved_state, cached_state])
+        else:
+            path = self.node_path
+            historicals = self.stage_model.get_historical_opinions(path,
+                                                                   name)
+            lines = []
+            for historical in historicals:
+                _, source = historical.get(META_ATTRS.SOURCE)
+                val = historical.get(META_ATTRS.VALUE)
+                if len(val) > 50:
+                    val = val[:50] + '...'
+                text = source + '.' + name + '\t' + val
+                lines += [text]
+            if not historicals:
+                lines = ['No Historical Opinions']
+            tooltip = '\n'.join(lines)
+        self.tooltips[key] = tooltip
+        return tooltip
+
     def flags(self, index):
         column = index.column()
         if column in (COLUMNS.name, COLUMNS.value, COLUMNS.comment):
@@ -1441,6 +1632,9 @@ class PropertyModel(QtCore.QAbstractTableModel):
         return len(self._data)
 
     def columnCount(self, parent):
+        if not self._data:
+            # Every row was removed part way through an update
+            return len(self.headers)
         return len(self._data[0])
 
 
@@ -1821,6 +2015,32 @@ class COLUMNS:
         return columns
 
 
+def get_attr_type_icon(color, size=ATTR_TYPE_ICON_SIZE):
+    """Gets the dot drawn next to attr types, pixmaps are cached by color
+    and size.
+
+    :param color: QColor
+    :param size: Int of pixmap width and height
+    :return: QPixmap
+    """
+    key = (color.rgba(), size)
+    icon = _attr_type_icons.get(key)
+    if icon is not None:
+        return icon
+    icon = QtGui.QPixmap(QtCore.QSize(size, size))
+    icon.fill(QtCore.Qt.transparent)
+    painter = QtGui.QPainter(icon)
+    painter.setRenderHint(QtGui.QPainter.Antialiasing)
+    painter.setBrush(color)
+    painter.setPen(QtCore.Qt.NoPen)
+    scale = size / 10.0
+    painter.drawEllipse(QtCore.QPointF(7 * scale, 5 * scale), 3 * scale,
+                        3 * scale)
+    del painter
+    _attr_type_icons[key] = icon
+    return icon
+
+
 def line_edit_style_factory(txt_color='white', tgt_layer_color='white',
                             bg_color='#232323'):
     """Generates a string of a qss style sheet for a line edit. Colors can be
@@ -1,13 +1,46 @@
+# Builtin
+from contextlib import contextmanager
+import queue
+import re
+import time
+
 # External
-from Qt.QtCore import QRegExp
+from Qt import QtCore, QtWidgets
 from Qt.QtGui import QColor, QTextCharFormat, QFont, QSyntaxHighlighter
 # Internal
 from nxt import tokens
 
 
+class BLOCK_STATE(object):
+    """Block states, a block ending inside a multi-line string passes the
+    string's state on to the next block."""
+    NONE = 0
+    TRI_SINGLE = 1
+    TRI_DOUBLE = 2
+
+
+TRIPLE_QUOTES = {"'''": BLOCK_STATE.TRI_SINGLE,
+                 '"""': BLOCK_STATE.TRI_DOUBLE}
+TRIPLE_QUOTE_LEN = 3
+
+
 class PythonHighlighter(QSyntaxHighlighter):
     """Syntax highlighter for the Python language.
+
+    Every rule is compiled into one alternation of named groups, so a block
+    is scanned once from left to right and the first rule to match at a
+    position wins. Strings and comments consume their text, so rules don't
+    apply inside them, except for todos in comments and nxt tokens, which
+    are highlighted everywhere. See `tokenize`.
+
+    Text of `BACKGROUND_MIN_LINES` or more lines set inside
+    `highlight_in_background` is tokenized on a worker thread, so the text
+    shows right away. Tokenized blocks are formatted on the GUI thread for
+    up to `APPLY_BUDGET` seconds per event loop tick, the blocks returned by
+    `get_visible_blocks` first.
     """
+    BACKGROUND_MIN_LINES = 300
+    APPLY_BUDGET = .008
     # Syntax styles that can be shared by all languages
     styles = {
         'keyword':   ('#619ea8', None),
@@ -39,144 +72,285 @@ class PythonHighlighter(QSyntaxHighlighter):
         # Comparison
         '==', '!=', '<', '<=', '>', '>=',
         # Arithmetic
-        '\+', '-', '\*', '/', '//', '\%', '\*\*',
+        r'\+', '-', r'\*', '/', '//', r'\%', r'\*\*',
         # In-place
-        '\+=', '-=', '\*=', '/=', '\%=',
+        r'\+=', '-=', r'\*=', '/=', r'\%=',
         # Bitwise
-        '\^', '\|', '\&', '\~', '>>', '<<'
+        r'\^', r'\|', r'\&', r'\~', '>>', '<<'
     ]
 
     # Python braces
-    braces = ['\{', '\}', '\(', '\)', '\[', '\]']
+    braces = [r'\{', r'\}', r'\(', r'\)', r'\[', r'\]']
+
+    todo_pattern = re.compile(r'(?:todo|Todo)[^\n]*')
+    token_pattern = re.compile(r'\$\{[\w\./:\$\{]*\}')
 
     def __init__(self, document=None):
         super(PythonHighlighter, self).__init__(document)
+        self.formats = {}
+        for style in self.styles:
+            self.formats[style] = self.lookup(style)
+        # Optional callable returning the (first, last) visible block
+        # numbers, set by the editor showing the document.
+        self.get_visible_blocks = None
+        self.job = None  # TokenizeJob
+        self.loading = False
+        self.applying = None  # Number of the block being applied
+        self.pending_blocks = set()
+        self.next_block = 0
+        self._worker = None
+        self.apply_timer = QtCore.QTimer(self)
+        self.apply_timer.setInterval(0)
+        self.apply_timer.timeout.connect(self.apply_results)
+        app = QtWidgets.QApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.stop_worker)
+
+    @property
+    def worker(self):
+        """The long lived thread text is tokenized on, started the first
+        time it is needed.
+        """
+        if self._worker is None:
+            self._worker = TokenizeWorker()
+            self._worker.lines_tokenized.connect(self.on_lines_tokenized)
+            self._worker.start()
+            # The highlighter is deleted with its document, which may be
+            # long before the app quits.
+            self.destroyed.connect(self._worker.stop)
+        return self._worker
 
-        # Multi-line strings (expression, flag, style)
-        # FIXME: The triple-quotes in these two lines will mess up the
-        # syntax highlighting from this point onward
-        self.tri_single = (QRegExp("'''"), 1, self.lookup('string2'))
-        self.tri_double = (QRegExp('"""'), 2, self.lookup('string2'))
-
-        rules = []
-
-        # Keyword, operator, and brace rules
-        rules += [(r'\b%s\b' % w, 0, self.lookup('keyword')) for w in PythonHighlighter.keywords]
-        rules += [(r'%s' % o, 0, self.lookup('operator')) for o in PythonHighlighter.operators]
-        rules += [(r'%s' % b, 0, self.lookup('brace')) for b in PythonHighlighter.braces]
-
-        # All other rules
-        rules += [
-            # 'STAGE'
-            (r'\bSTAGE\b', 0, self.lookup('STAGE')),
-            # 'self'
-            (r'\bself\b', 0, self.lookup('self')),
-            (r'\b__init__\b', 0, self.lookup('self')),
-
-            # Double-quoted string, possibly containing escape sequences
-            (r'"[^"\\]*(\\.[^"\\]*)*"', 0, self.lookup('string')),
-            # Single-quoted string, possibly containing escape sequences
-            (r"'[^'\\]*(\\.[^'\\]*)*'", 0, self.lookup('string')),
-            # Decorator
-            (r'\@\w*', 0, self.lookup('decorator')),
-
-            # 'def' followed by an identifier
-            (r'\bdef\b\s*(\w+)', 1, self.lookup('defclass')),
-            # 'class' followed by an identifier
-            (r'\bclass\b\s*(\w+)', 1, self.lookup('defclass')),
+    def stop_worker(self):
+        self.cancel_job()
+        if self._worker is None:
+            return
+        self._worker.stop()
+        self._worker = None
 
-            # From '#' until a newline
-            (r'#[^\n]*', 0, self.lookup('comment')),
-            # from 'todo' until a new line
-            (r'(todo|Todo)[^\n]*', 0, self.lookup('todo')),
+    @contextmanager
+    def highlight_in_background(self, text):
+        """Highlights `text`, set on the document inside the with block, in
+        the background if it is large.
+
+        :param text: String the document is about to be set to
+        """
+        self.cancel_job()
+        lines = text.split('\n')
+        if len(lines) < self.BACKGROUND_MIN_LINES:
+            yield
+            return
+        self.job = TokenizeJob(self, lines)
+        self.pending_blocks = set(range(len(lines)))
+        self.next_block = 0
+        self.loading = True
+        try:
+            yield
+        except Exception:
+            self.cancel_job()
+            raise
+        finally:
+            self.loading = False
+        self.worker.submit(self.job)
+
+    def restart_job(self):
+        """Highlights the document's current text again, in the background
+        if it is large. Used when the document changes under a job.
+        """
+        if self.job is not None or self.document() is None:
+            return
+        with self.highlight_in_background(self.document().toPlainText()):
+            pass
+        if self.job is None:
+            self.rehighlight()
+
+    def cancel_job(self):
+        if self.job is None:
+            return
+        self.job.cancelled = True
+        self.job = None
+        self.pending_blocks = set()
+        self.apply_timer.stop()
+
+    def on_lines_tokenized(self, job):
+        if job is self.job and not self.apply_timer.isActive():
+            self.apply_timer.start()
+
+    def iter_pending_blocks(self):
+        """Yields the numbers of tokenized blocks that haven't been
+        formatted yet, visible blocks first.
+        """
+        tokenized = self.job.tokenized
+        if self.get_visible_blocks is not None:
+            first, last = self.get_visible_blocks()
+            for number in range(max(first, 0), min(last + 1, tokenized)):
+                if number in self.pending_blocks:
+                    yield number
+        while self.next_block < tokenized:
+            number = self.next_block
+            self.next_block += 1
+            if number in self.pending_blocks:
+                yield number
+
+    def apply_results(self):
+        """Formats tokenized blocks until the apply budget is spent."""
+        job = self.job
+        if job is None:
+            self.apply_timer.stop()
+            return
+        deadline = time.perf_counter() + self.APPLY_BUDGET
+        document = self.document()
+        for number in self.iter_pending_blocks():
+            self.pending_blocks.discard(number)
+            self.applying = number
+            try:
+                self.rehighlightBlock(document.findBlockByNumber(number))
+            finally:
+                self.applying = None
+            if self.job is not job or time.perf_counter() > deadline:
+                break
+        if self.job is not job:
+            return
+        if not self.pending_blocks:
+            self.job = None
+            self.apply_timer.stop()
+        elif self.next_block >= job.tokenized:
+            # Waiting on the worker, see on_lines_tokenized
+            self.apply_timer.stop()
+
+    @classmethod
+    def get_pattern(cls):
+        """Compiles the rules into a single pattern, once per class. Each
+        alternative is a group named after the style it is highlighted
+        with, other than `name` which skips plain identifiers in one step.
+        The order of the alternatives is their priority.
 
+        :rtype: re.Pattern
+        """
+        pattern = cls.__dict__.get('_pattern')
+        if pattern is not None:
+            return pattern
+        keywords = '|'.join(cls.keywords)
+        # Longest first so '==' isn't matched as two '='
+        operators = sorted(cls.operators,
+                           key=lambda o: len(o.replace('\\', '')),
+                           reverse=True)
+        rules = [
+            # Start of a multi-line string
+            ('string2', r"'''|\"\"\""),
+            # From '#' until a newline
+            ('comment', r'#[^\n]*'),
+            # Double and single-quoted strings, possibly containing escape
+            # sequences
+            ('string', r'"[^"\\]*(?:\\.[^"\\]*)*"'
+                       r"|'[^'\\]*(?:\\.[^'\\]*)*'"),
+            ('decorator', r'@\w*'),
+            # 'def' or 'class' followed by an identifier
+            ('defclass', r'(?P<defkeyword>\bdef|\bclass)\b\s*'
+                         r'(?P<defname>\w+)'),
+            ('STAGE', r'\bSTAGE\b'),
+            ('self', r'\b(?:self|__init__)\b'),
+            ('keyword', r'\b(?:{})\b'.format(keywords)),
+            # From 'todo' until a new line
+            ('todo', cls.todo_pattern.pattern),
             # Numeric literals
-            (r'\b[+-]?[0-9]+[lL]?\b', 0, self.lookup('numbers')),
-            (r'\b[+-]?0[xX][0-9A-Fa-f]+[lL]?\b', 0, self.lookup('numbers')),
-            (r'\b[+-]?[0-9]+(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?\b', 0, self.lookup('numbers')),
+            ('numbers', r'\b[+-]?(?:0[xX][0-9A-Fa-f]+[lL]?'
+                        r'|[0-9]+(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?[lL]?)\b'),
+            ('name', r'\w+'),
+            ('operator', '|'.join(operators)),
+            ('brace', '|'.join(cls.braces)),
         ]
+        pattern = re.compile('|'.join('(?P<{}>{})'.format(name, rule)
+                                      for name, rule in rules))
+        cls._pattern = pattern
+        return pattern
 
-        # Build a QRegExp for each pattern
-        special_rules = [
-            # tokens.TOKEN_PREFIX
-            (r'\$\{[\w\./:\$\{]*\}', 0, self.lookup('${}')),
-            (r'(?<=\$\{)(\})', 0, self.lookup('${}'))
-        ]
-        self.rules = []
-        for (pat, index, fmt) in rules:
-            self.rules.append((QRegExp(pat), index, fmt))
-        # Rules that need more than regex to work
-        self.special_rules = []
-        for (pat, index, fmt) in special_rules:
-            self.rules.append((QRegExp(pat), index, fmt))
-            self.special_rules.append((QRegExp(pat), index, fmt))
+    @classmethod
+    def tokenize(cls, text, state=BLOCK_STATE.NONE):
+        """Splits a block of text into highlighted spans. Doesn't touch Qt
+        so it can be called from any thread.
 
-    def highlightBlock(self, text):
-        """Apply syntax highlighting to the given block of text.
+        :param text: String of block text
+        :param state: BLOCK_STATE the previous block ended in
+        :return: tuple of ([(start, length, style)], end BLOCK_STATE), the
+        positions are in characters of `text`, later spans take priority.
         """
-        # Do other syntax formatting
-        for rule in self.rules:
-            expression, nth, formatting = rule
-            index = expression.indexIn(text, 0)
+        spans = []
+        pos = 0
+        for delimiter, in_state in TRIPLE_QUOTES.items():
+            if state != in_state:
+                continue
+            end = text.find(delimiter)
+            if end < 0:
+                return [(0, len(text), 'string2')], state
+            pos = end + TRIPLE_QUOTE_LEN
+            spans += [(0, pos, 'string2')]
+        state = BLOCK_STATE.NONE
+        pattern = cls.get_pattern()
+        match = pattern.search(text, pos)
+        while match:
+            style = match.lastgroup
+            start, end = match.span()
+            if style == 'string2':
+                delimiter = match.group()
+                close = text.find(delimiter, end)
+                if close < 0:
+                    spans += [(start, len(text) - start, style)]
+                    state = TRIPLE_QUOTES[delimiter]
+                    break
+                end = close + TRIPLE_QUOTE_LEN
+                spans += [(start, end - start, style)]
+            elif style == 'defclass':
+                keyword_end = match.end('defkeyword')
+                spans += [(start, keyword_end - start, 'keyword')]
+                name_start = match.start('defname')
+                spans += [(name_start, end - name_start, style)]
+            elif style == 'comment':
+                spans += [(start, end - start, style)]
+                todo = cls.todo_pattern.search(text, start, end)
+                if todo:
+                    spans += [(todo.start(), end - todo.start(), 'todo')]
+            elif style != 'name':
+                spans += [(start, end - start, style)]
+            match = pattern.search(text, end)
+        if tokens.TOKEN_PREFIX in text:
             # This is here because you can't do nested logic in regex
             nested = 0
-            if rule in self.special_rules:
-                if text.count(tokens.TOKEN_PREFIX) > 1:
-                    nested = 1
-
-            while index >= 0:
-                # We actually want the index of the nth match
-                index = expression.pos(nth)
-                length = len(expression.cap(nth))
-                self.setFormat(index, length + nested, formatting)
-                index = expression.indexIn(text, index + length)
-
-        self.setCurrentBlockState(0)
-
-        # Do multi-line strings
-        in_multiline = self.match_multiline(text, *self.tri_single)
-        if not in_multiline:
-            in_multiline = self.match_multiline(text, *self.tri_double)
-
-    def match_multiline(self, text, delimiter, in_state, style):
-        """Do highlighting of multi-line strings. ``delimiter`` should be a
-        ``QRegExp`` for triple-single-quotes or triple-double-quotes, and
-        ``in_state`` should be a unique integer to represent the corresponding
-        state changes when inside those strings. Returns True if we're still
-        inside a multi-line string when this function is finished.
+            if text.count(tokens.TOKEN_PREFIX) > 1:
+                nested = 1
+            for match in cls.token_pattern.finditer(text):
+                start, end = match.span()
+                spans += [(start, end - start + nested, '${}')]
+        return spans, state
+
+    def highlightBlock(self, text):
+        """Apply syntax highlighting to the given block of text.
         """
-        # If inside triple-single quotes, start at 0
-        if self.previousBlockState() == in_state:
-            start = 0
-            add = 0
-        # Otherwise, look for the delimiter on this line
-        else:
-            start = delimiter.indexIn(text)
-            # Move past this match
-            add = delimiter.matchedLength()
-
-        # As long as there's a delimiter match on this line...
-        while start >= 0:
-            # Look for the ending delimiter
-            end = delimiter.indexIn(text, start + add)
-            # Ending delimiter on this line?
-            if end >= add:
-                length = end - start + add + delimiter.matchedLength()
-                self.setCurrentBlockState(0)
-            # No; multi-line string
-            else:
-                self.setCurrentBlockState(in_state)
-                length = len(text) - start + add
-            # Apply formatting
-            self.setFormat(start, length, style)
-            # Look for the next match
-            start = delimiter.indexIn(text, start + length)
-
-        # Return True if still inside a multi-line string, False otherwise
-        if self.currentBlockState() == in_state:
-            return True
-        else:
-            return False
+        if self.job is not None:
+            if self.loading or self.applying is not None:
+                number = self.currentBlock().blockNumber()
+                if number in self.pending_blocks:
+                    # Formatted once tokenized, see apply_results
+                    return
+                # The block being applied, or one after it that Qt goes on
+                # to highlight because the applied block's state changed.
+                if (number < len(self.job.lines) and
+                        self.job.lines[number] == text):
+                    spans, state = self.job.results[number]
+                    self.apply_spans(text, spans, state)
+                    return
+            # The document changed under the job
+            self.cancel_job()
+            QtCore.QTimer.singleShot(0, self.restart_job)
+        state = self.previousBlockState()
+        if state < 0:
+            state = BLOCK_STATE.NONE
+        spans, state = self.tokenize(text, state)
+        self.apply_spans(text, spans, state)
+
+    def apply_spans(self, text, spans, state):
+        for start, length, style in to_utf16_spans(text, spans):
+            self.setFormat(start, length, self.formats[style])
+        self.setCurrentBlockState(state)
 
     def lookup(self, key):
         """Return a QTextCharFormat with the given attributes.
@@ -195,3 +369,99 @@ class PythonHighlighter(QSyntaxHighlighter):
                 _format.setFontItalic(True)
 
         return _format
+
+
+class TokenizeJob(object):
+    """Lines of a document to tokenize on the TokenizeWorker. Results are
+    read on the GUI thread as the worker goes, up to `tokenized`.
+    """
+    CHUNK_SIZE = 100
+
+    def __init__(self, highlighter, lines):
+        self.tokenize = highlighter.tokenize
+        self.lines = lines
+        # [(spans, BLOCK_STATE)] per line
+        self.results = [None] * len(lines)
+        self.tokenized = 0
+        self.cancelled = False
+
+    def run(self, on_chunk):
+        """Tokenizes the lines in order, calling `on_chunk` every
+        CHUNK_SIZE lines and when done.
+        """
+        state = BLOCK_STATE.NONE
+        for number, line in enumerate(self.lines):
+            if self.cancelled:
+                return
+            self.results[number] = self.tokenize(line, state)
+            state = self.results[number][1]
+            self.tokenized = number + 1
+            if not self.tokenized % self.CHUNK_SIZE:
+                on_chunk(self)
+        on_chunk(self)
+
+
+class TokenizeWorker(QtCore.QThread):
+    """Long lived thread that runs the TokenizeJobs put in its queue, one
+    at a time. `lines_tokenized` is emitted as each job makes progress.
+    """
+    lines_tokenized = QtCore.Signal(object)
+
+    def __init__(self):
+        super(TokenizeWorker, self).__init__()
+        self._queue = queue.Queue()
+        self.job = None  # The job being run
+
+    def submit(self, job):
+        self._queue.put(job)
+
+    def stop(self):
+        """Cancels the queued and running jobs and waits for the thread to
+        exit.
+        """
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job.cancelled = True
+        job = self.job
+        if job is not None:
+            job.cancelled = True
+        self._queue.put(None)
+        self.wait()
+
+    def run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self.job = job
+            try:
+                job.run(self.lines_tokenized.emit)
+            finally:
+                self.job = None
+
+
+def to_utf16_spans(text, spans):
+    """Qt positions text in UTF-16 code units, which differ from Python's
+    character positions after any character outside the BMP.
+
+    :param text: String the spans were found in
+    :param spans: list of (start, length, style) in characters
+    :return: list of (start, length, style) in UTF-16 code units
+    """
+    if text.isascii():
+        return spans
+    offsets = [0]
+    for char in text:
+        offsets += [offsets[-1] + (2 if ord(char) > 0xFFFF else 1)]
+    if offsets[-1] == len(text):
+        return spans
+    utf16_spans = []
+    last = len(text)
+    for start, length, style in spans:
+        end = offsets[min(start + length, last)]
+        utf16_spans += [(offsets[start], end - offsets[start], style)]
+    return utf16_spans
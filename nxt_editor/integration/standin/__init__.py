@@ -0,0 +1,177 @@
+"""
+A stand-in for a DCC's command port, for developing and benchmarking the
+editor's remote execution without a DCC installed.
+
+`StandInServer` speaks the same protocol as Maya's `commandPort`: it reads
+newline terminated lines of Python and runs them one at a time in a single
+persistent namespace. Each command can be delayed by a fixed `latency` to
+emulate a busy or distant host, and every node the remote runs can have
+`payload_size` bytes of padding added to its cache to emulate heavy caches.
+
+The remote model's log and cache messages are sent to the editor as frames,
+see `nxt_editor.ipc`. Run the server in its own process, the remote logging
+handler forwards everything logged to the `nxt` logger and would echo the
+editor's own logs back to it if both ran in one process:
+
+    python -m nxt_editor.integration.standin --latency 0.005
+
+See `nxt_editor.integration.standin.benchmark` for timing builds against it.
+"""
+# Builtin
+import logging
+import socket
+import threading
+import time
+import traceback
+
+# Internal
+import nxt_editor
+from nxt.remote import nxt_socket
+from nxt_editor import ipc
+
+logger = logging.getLogger(nxt_editor.LOGGER_NAME)
+
+READY_MSG = 'nxt stand-in listening on'
+PAYLOAD_ATTR = 'standin_payload'
+
+
+def send_to_server(data_dict):
+    """Framed replacement for `nxt_socket.send_to_server`. Called by the
+    remote's logging handler, so it must not log.
+
+    :param data_dict: Dict formatted by nxt_socket.format_msg
+    """
+    server = getattr(nxt_socket, '__nxt_server__', None)
+    if not server:
+        return
+    try:
+        ipc.send_frame(server, data_dict)
+    except Exception:
+        setattr(nxt_socket, '__nxt_server__', None)
+
+
+def send_log(record):
+    """Replacement for `nxt_socket.send_log` that doesn't rely on another
+    handler having formatted the record first, as a DCC's console would.
+
+    :param record: logging record
+    """
+    links = getattr(record, 'links', None)
+    data_dict = nxt_socket.format_msg([record.levelno, record.getMessage(),
+                                       links], nxt_socket.COM_TYPE.LOG)
+    send_to_server(data_dict)
+
+
+class StandInClientModel(nxt_socket.SocketClientModel):
+    """Socket client model that pads the cache of every node it runs with
+    `payload_size` bytes.
+    """
+    payload_size = 0
+
+    def _run(self, *args, **kwargs):
+        result = super(StandInClientModel, self)._run(*args, **kwargs)
+        if not self.payload_size or not self.runtime_layer:
+            return result
+        cache_layer = self.runtime_layer.cache_layer
+        padding = 'x' * self.payload_size
+        for node in cache_layer.nodes.values():
+            if not hasattr(node, PAYLOAD_ATTR):
+                setattr(node, PAYLOAD_ATTR, padding)
+        return result
+
+
+class StandInCmds(object):
+    """Stands in for `maya.cmds`, the editor suspends the remote's viewport
+    refreshes during builds.
+    """
+    @staticmethod
+    def refresh(*args, **kwargs):
+        pass
+
+
+def install_remote_hooks(payload_size=0):
+    """Point `nxt_socket` at the stand-in's model, framed sender and log
+    sender, the editor creates its remote model through `nxt_socket`.
+
+    :param payload_size: Bytes of padding cached per node run
+    """
+    StandInClientModel.payload_size = payload_size
+    nxt_socket.SocketClientModel = StandInClientModel
+    nxt_socket.send_to_server = send_to_server
+    nxt_socket.send_log = send_log
+
+
+class StandInServer(object):
+    """Emulates a DCC command port, see the module docstring. Call
+    `install_remote_hooks` first if the editor will connect to it.
+
+    :param host: Host to listen on
+    :param port: Port to listen on
+    :param latency: Seconds to sleep before running each command
+    """
+    def __init__(self, host=nxt_socket.HOST, port=nxt_socket.CMD_PORT,
+                 latency=0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.namespace = {'__name__': '__standin__', 'cmds': StandInCmds}
+        self.commands_run = 0
+        self.socket = None
+        self.ready = threading.Event()
+        self._stopped = False
+
+    def listen(self):
+        """Bind and listen, a port of 0 binds any free port and updates
+        `port` to match.
+        """
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.socket.bind((self.host, self.port))
+        self.port = self.socket.getsockname()[1]
+        self.socket.listen(1)
+        self.ready.set()
+
+    def serve_forever(self):
+        """Accept editor connections one at a time until `stop` is called."""
+        if self.socket is None:
+            self.listen()
+        while not self._stopped:
+            try:
+                client, addr = self.socket.accept()
+            except OSError:
+                break
+            try:
+                self.handle_client(client)
+            finally:
+                client.close()
+
+    def handle_client(self, client):
+        """Run each line sent by `client` until it disconnects.
+
+        :param client: Connected socket
+        """
+        lines = client.makefile('rb')
+        for line in lines:
+            cmd = line.decode('utf-8').strip()
+            if not cmd:
+                continue
+            self.run_command(cmd)
+
+    def run_command(self, cmd):
+        if self.latency:
+            time.sleep(self.latency)
+        try:
+            exec(compile(cmd, '<nxt stand-in>', 'exec'), self.namespace)
+        except Exception:
+            traceback.print_exc()
+        self.commands_run += 1
+
+    def stop(self):
+        self._stopped = True
+        if self.socket:
+            try:
+                self.socket.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.socket.close()
+            self.socket = None
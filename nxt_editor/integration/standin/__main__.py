@@ -0,0 +1,38 @@
+# Builtin
+import argparse
+import logging
+import sys
+
+# Internal
+from nxt.remote import nxt_socket
+from nxt_editor.integration.standin import (StandInServer, READY_MSG,
+                                            install_remote_hooks)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='nxt_editor.integration.standin',
+                                     description='Emulate a DCC command port '
+                                                 'for the nxt editor.')
+    parser.add_argument('--host', default=nxt_socket.HOST)
+    parser.add_argument('--port', type=int, default=nxt_socket.CMD_PORT)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Seconds to sleep before running each command.')
+    parser.add_argument('--payload-size', type=int, default=0,
+                        help='Bytes of padding cached per node run.')
+    args = parser.parse_args(argv)
+    logging.basicConfig()
+    install_remote_hooks(args.payload_size)
+    server = StandInServer(args.host, args.port, latency=args.latency)
+    server.listen()
+    print('{} {}:{}'.format(READY_MSG, args.host, args.port), flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""
+Times remote execution against a stand-in command port, see
+`nxt_editor.integration.standin`.
+
+The stand-in is started in a subprocess and an offscreen StageModel connects
+to it over the command port. Three things are measured:
+
+    round trip  Requests the editor waits on (`StageModel._send_cmd` with
+                wait), the floor of every remote step.
+    step        Stepping a build one node at a time, each step runs the node
+                and syncs the new cache back.
+    resume      Running a whole build, reported as nodes per second and
+                cache bytes per second.
+
+The stand-in replaces `nxt_socket.send_to_server` and `nxt_socket.send_log`
+with framed senders, see `install_remote_hooks`. The legacy pickle sender a
+DCC uses is not exercised, so the numbers only cover the framed path.
+
+Usage:
+
+    python -m nxt_editor.integration.standin.benchmark --nodes 100 \\
+        --latency 0.001 --payload-size 65536 --json results.json
+"""
+# Builtin
+import argparse
+import json
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# External
+from Qt import QtWidgets
+
+# Internal
+from nxt import nxt_io
+from nxt.session import Session
+from nxt.stage import INTERNAL_ATTRS
+import nxt_editor
+from nxt_editor import stage_model
+from nxt_editor.integration.standin import READY_MSG
+
+logger = logging.getLogger(nxt_editor.LOGGER_NAME)
+
+STANDIN_MODULE = 'nxt_editor.integration.standin'
+STARTUP_TIMEOUT = 30
+
+
+class RESULT_KEYS(object):
+    ROUND_TRIP = 'round_trip'
+    STEP = 'step'
+    RESUME = 'resume'
+    MEAN = 'mean'
+    MEDIAN = 'median'
+    P95 = 'p95'
+    COUNT = 'count'
+    SECONDS = 'seconds'
+    NODES_PER_SEC = 'nodes_per_sec'
+    BYTES_PER_SEC = 'bytes_per_sec'
+
+
+def summarize(samples):
+    """Get the mean, median and 95th percentile of a list of durations.
+
+    :param samples: list of seconds
+    :rtype: dict
+    """
+    ordered = sorted(samples)
+    count = len(ordered)
+    if not count:
+        return {RESULT_KEYS.COUNT: 0}
+    p95_idx = min(count - 1, int(round(count * .95)) - 1)
+    return {RESULT_KEYS.COUNT: count,
+            RESULT_KEYS.MEAN: sum(ordered) / count,
+            RESULT_KEYS.MEDIAN: ordered[count // 2],
+            RESULT_KEYS.P95: ordered[max(0, p95_idx)]}
+
+
+def start_standin(latency=0.0, payload_size=0):
+    """Start a stand-in command port in a subprocess and wait until it is
+    listening.
+
+    :param latency: Seconds the stand-in sleeps before each command
+    :param payload_size: Bytes of padding cached per node run
+    :rtype: subprocess.Popen
+    """
+    cmd = [sys.executable, '-m', STANDIN_MODULE,
+           '--latency', str(latency), '--payload-size', str(payload_size)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                            universal_newlines=True)
+    start = time.time()
+    while time.time() - start < STARTUP_TIMEOUT:
+        line = proc.stdout.readline()
+        if not line:
+            break
+        if line.startswith(READY_MSG):
+            return proc
+    proc.kill()
+    raise RuntimeError('Stand-in command port failed to start.')
+
+
+def make_graph(filepath, node_count):
+    """Save a graph of `node_count` independent nodes to `filepath`.
+
+    :return: list of the node paths
+    :rtype: list
+    """
+    compute_key = INTERNAL_ATTRS.as_save_key(INTERNAL_ATTRS.COMPUTE)
+    nodes = {}
+    node_paths = []
+    for i in range(node_count):
+        path = '/node{}'.format(i)
+        nodes[path] = {compute_key: ['self.out = {}'.format(i)]}
+        node_paths += [path]
+    nxt_io.save_file_data({'version': '1.17', 'nodes': nodes}, filepath)
+    return node_paths
+
+
+def time_round_trips(model, count):
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        model._send_cmd('None', wait=True, timeout=STARTUP_TIMEOUT)
+        samples += [time.perf_counter() - start]
+    return summarize(samples)
+
+
+def time_steps(model, node_paths):
+    model.setup_build(node_paths)
+    samples = []
+    while model.executing:
+        start = time.perf_counter()
+        model.step_build()
+        samples += [time.perf_counter() - start]
+    return summarize(samples)
+
+
+def time_resume(model, node_paths, payload_size):
+    start = time.perf_counter()
+    model.execute_nodes(node_paths)
+    seconds = time.perf_counter() - start
+    return {RESULT_KEYS.COUNT: len(node_paths),
+            RESULT_KEYS.SECONDS: seconds,
+            RESULT_KEYS.NODES_PER_SEC: len(node_paths) / seconds,
+            RESULT_KEYS.BYTES_PER_SEC: (len(node_paths) * payload_size /
+                                        seconds)}
+
+
+def run_benchmark(node_count=50, latency=0.0, payload_size=0,
+                  round_trips=100):
+    """Run every benchmark against a new stand-in. A QApplication must
+    exist.
+
+    :return: Results dict, see RESULT_KEYS
+    :rtype: dict
+    """
+    temp_dir = tempfile.mkdtemp()
+    proc = start_standin(latency, payload_size)
+    model = None
+    try:
+        filepath = os.path.join(temp_dir, 'benchmark.nxt')
+        node_paths = make_graph(filepath, node_count)
+        model = stage_model.StageModel(Session().load_file(filepath))
+        model.use_cmd_port = True
+        if not model.use_cmd_port:
+            raise RuntimeError('Failed to connect to the stand-in.')
+        results = {
+            RESULT_KEYS.ROUND_TRIP: time_round_trips(model, round_trips),
+            RESULT_KEYS.STEP: time_steps(model, node_paths),
+            RESULT_KEYS.RESUME: time_resume(model, node_paths, payload_size)
+        }
+    finally:
+        if model is not None:
+            if model.use_cmd_port:
+                model.use_cmd_port = False
+            # No event loop ran so aboutToQuit won't stop the worker.
+            model._stop_exec_worker()
+        proc.terminate()
+        proc.wait()
+        shutil.rmtree(temp_dir)
+    return results
+
+
+def format_results(results):
+    lines = []
+    ms = '{:>10.3f} ms'
+    for key in (RESULT_KEYS.ROUND_TRIP, RESULT_KEYS.STEP):
+        summary = results[key]
+        lines += ['{} ({} samples)'.format(key, summary[RESULT_KEYS.COUNT])]
+        for stat in (RESULT_KEYS.MEAN, RESULT_KEYS.MEDIAN, RESULT_KEYS.P95):
+            lines += ['    {:<8}'.format(stat) +
+                      ms.format(summary[stat] * 1000)]
+    resume = results[RESULT_KEYS.RESUME]
+    lines += ['{} ({} nodes)'.format(RESULT_KEYS.RESUME,
+                                     resume[RESULT_KEYS.COUNT]),
+              '    {:<8}{:>10.3f} s'.format('total',
+                                            resume[RESULT_KEYS.SECONDS]),
+              '    {:<8}{:>10.1f} nodes/s'.format(
+                  'rate', resume[RESULT_KEYS.NODES_PER_SEC]),
+              '    {:<8}{:>10.1f} KiB/s'.format(
+                  'payload', resume[RESULT_KEYS.BYTES_PER_SEC] / 1024)]
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog=__name__,
+                                     description='Benchmark remote execution '
+                                                 'against a stand-in command '
+                                                 'port.')
+    parser.add_argument('--nodes', type=int, default=50)
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Seconds the stand-in sleeps before each '
+                             'command.')
+    parser.add_argument('--payload-size', type=int, default=0,
+                        help='Bytes of padding cached per node run.')
+    parser.add_argument('--round-trips', type=int, default=100)
+    parser.add_argument('--json', help='Also write the results to this file.')
+    args = parser.parse_args(argv)
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    if not QtWidgets.QApplication.instance():
+        QtWidgets.QApplication([])
+    results = run_benchmark(args.nodes, args.latency, args.payload_size,
+                            args.round_trips)
+    print(format_results(results))
+    if args.json:
+        with open(args.json, 'w') as fp:
+            json.dump(results, fp, indent=4)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
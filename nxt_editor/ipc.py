@@ -0,0 +1,244 @@
+"""
+Framed transport for the command port.
+
+Every message is a fixed size binary header followed by the payload:
+
+    magic (2s) | version (B) | encoding (B) | payload length (Q)
+
+The header is network byte order. Frames are read with a `FrameReader` which
+receives into a preallocated buffer, payloads larger than the buffer are
+received straight into a single allocation of their exact size. Reading a
+message is linear in its size no matter how the bytes are chunked.
+
+Messages from remotes still sending the legacy ascii length header (see
+`nxt.remote.nxt_socket.send_to_server`) are read as well.
+
+Commands the editor waits on are wrapped in `run_request` on the remote,
+which answers with a `REPLY` message carrying the request's id. See
+`StageModel.remote_requests`.
+"""
+# Built-in
+import logging
+import pickle
+import socket
+import struct
+import traceback
+
+# Internal
+import nxt_editor
+from nxt.remote import nxt_socket
+
+logger = logging.getLogger(nxt_editor.LOGGER_NAME)
+
+MAGIC = b'NX'
+PROTOCOL_VERSION = 1
+HEADER = struct.Struct('!2sBBQ')
+LEGACY_HEADER_SIZE = nxt_socket.HEADER_SIZE
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+REPLY = 'reply'  # Com message key, see nxt_socket.COM_TYPE
+
+
+class ENCODING(object):
+    PICKLE = 0
+
+
+class REPLY_KEYS(object):
+    ID = 'id'
+    RESULT = 'result'
+    ERROR = 'error'
+
+
+class FrameError(Exception):
+    """Raised when the incoming bytes aren't a frame we can read."""
+    pass
+
+
+class ConnectionClosed(EOFError):
+    """Raised when the peer closes the socket, cleanly or mid frame."""
+    pass
+
+
+def encode_frame(obj, encoding=ENCODING.PICKLE):
+    """Encode `obj` as a frame.
+
+    :param obj: Object to send, must be picklable
+    :param encoding: ENCODING constant
+    :return: tuple of header bytes and payload bytes
+    :rtype: tuple
+    """
+    if encoding != ENCODING.PICKLE:
+        raise FrameError('Unknown frame encoding: {}'.format(encoding))
+    payload = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+    header = HEADER.pack(MAGIC, PROTOCOL_VERSION, encoding, len(payload))
+    return header, payload
+
+
+def decode_payload(payload, encoding=ENCODING.PICKLE):
+    if encoding != ENCODING.PICKLE:
+        raise FrameError('Unknown frame encoding: {}'.format(encoding))
+    return pickle.loads(payload)
+
+
+def send_frame(sock, obj, encoding=ENCODING.PICKLE):
+    """Send `obj` as a single frame. The header and payload are sent
+    separately so the payload is never copied to prepend the header.
+
+    :param sock: Connected socket
+    :param obj: Object to send, must be picklable
+    :param encoding: ENCODING constant
+    """
+    header, payload = encode_frame(obj, encoding)
+    send_parts(sock, header, payload)
+
+
+def send_parts(sock, header, payload):
+    """Send a frame's header and payload with a single gather write where the
+    platform supports it. Sent as two writes the payload can be held back by
+    Nagle's algorithm until the peer's delayed ack of the header.
+
+    :param sock: Connected socket
+    :param header: Header bytes
+    :param payload: Payload bytes
+    """
+    if not hasattr(sock, 'sendmsg'):
+        # Windows
+        sock.sendall(header)
+        sock.sendall(payload)
+        return
+    sent = sock.sendmsg([header, payload])
+    if sent < len(header):
+        sock.sendall(header[sent:])
+        sent = len(header)
+    if sent < len(header) + len(payload):
+        sock.sendall(memoryview(payload)[sent - len(header):])
+
+
+class FrameReader(object):
+    """Reads frames from a blocking socket, see the module docstring for the
+    layout.
+    """
+    def __init__(self, sock, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.sock = sock
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+
+    @property
+    def buffered(self):
+        """Number of received bytes not yet consumed."""
+        return self._end - self._start
+
+    def _recv_into(self, view):
+        received = self.sock.recv_into(view)
+        if not received:
+            raise ConnectionClosed('Connection closed by peer')
+        return received
+
+    def _read_exact(self, size):
+        """Get exactly `size` bytes. The result is only valid until the next
+        read if it fits in the buffer, callers must decode it before reading
+        again.
+
+        :param size: Number of bytes
+        :rtype: memoryview or bytearray
+        """
+        if size > len(self._buffer):
+            # Receive straight into the payload's own allocation, the
+            # buffered bytes are the only ones copied.
+            out = bytearray(size)
+            out_view = memoryview(out)
+            filled = self.buffered
+            out_view[:filled] = self._view[self._start:self._end]
+            self._start = self._end = 0
+            while filled < size:
+                filled += self._recv_into(out_view[filled:])
+            return out
+        if self._start + size > len(self._buffer):
+            # Slide the unconsumed bytes to the front to make room.
+            remaining = self.buffered
+            self._view[:remaining] = self._view[self._start:self._end]
+            self._start = 0
+            self._end = remaining
+        while self.buffered < size:
+            self._end += self._recv_into(self._view[self._end:])
+        start = self._start
+        self._start += size
+        if self._start == self._end:
+            self._start = self._end = 0
+        return self._view[start:start + size]
+
+    def read_header(self):
+        """Read the next frame header.
+
+        :raises FrameError: If the header is invalid or from a newer protocol
+        :return: tuple of encoding and payload length
+        :rtype: tuple
+        """
+        magic = bytes(self._read_exact(len(MAGIC)))
+        if magic != MAGIC:
+            rest = bytes(self._read_exact(LEGACY_HEADER_SIZE - len(MAGIC)))
+            try:
+                return ENCODING.PICKLE, int(magic + rest)
+            except ValueError:
+                raise FrameError('Invalid frame header: '
+                                 '{!r}'.format(magic + rest))
+        rest = bytes(self._read_exact(HEADER.size - len(MAGIC)))
+        _, version, encoding, size = HEADER.unpack(magic + rest)
+        if version > PROTOCOL_VERSION:
+            raise FrameError('Unsupported frame version {}, expected {} or '
+                             'lower.'.format(version, PROTOCOL_VERSION))
+        return encoding, size
+
+    def read_frame(self):
+        """Block until the next whole frame is received and decode it.
+
+        :raises ConnectionClosed: If the socket closes
+        :raises FrameError: If the frame is invalid
+        :return: Decoded message
+        """
+        encoding, size = self.read_header()
+        while not size:
+            # Empty frames carry nothing, legacy senders use them as no-ops.
+            encoding, size = self.read_header()
+        return decode_payload(self._read_exact(size), encoding)
+
+
+def set_no_delay(sock):
+    """Remote entry point, disables Nagle's algorithm on the remote's com
+    socket. The remote sends many small messages and then blocks on a wait
+    handshake, a delayed message stalls until the editor's delayed ack.
+
+    :param sock: The remote's connected socket, see
+    nxt_socket.SocketClientModel.server
+    """
+    if sock is None:
+        return
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+
+def run_request(model, request_id, func):
+    """Remote entry point, calls `func` and replies to the editor with its
+    result, or the traceback if it raised. A result that can't be pickled is
+    replied as None.
+
+    :param model: nxt_socket.SocketClientModel
+    :param request_id: Id of the editor's request
+    :param func: Callable to run
+    """
+    result = None
+    error = None
+    try:
+        result = func()
+    except Exception:
+        error = traceback.format_exc()
+    reply = {REPLY_KEYS.ID: request_id, REPLY_KEYS.RESULT: result,
+             REPLY_KEYS.ERROR: error}
+    try:
+        header, payload = encode_frame({REPLY: reply})
+    except (pickle.PicklingError, TypeError, AttributeError):
+        reply[REPLY_KEYS.RESULT] = None
+        header, payload = encode_frame({REPLY: reply})
+    send_parts(model.server, header, payload)
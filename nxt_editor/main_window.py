@@ -25,7 +25,7 @@ from nxt_editor.stage_model import StageModel
 from nxt_editor.dockwidgets import (DockWidgetBase, CodeEditor, PropertyEditor,
                                     HotkeyEditor, LayerManager, OutputLog,
                                     HistoryView, WidgetBuilder, BuildView,
-                                    FindRepDockWidget)
+                                    FindRepDockWidget, ProfilerView)
 from nxt_editor.dockwidgets.output_log import (FileTailingThread,
                                                QtLogStreamHandler)
 from nxt_editor.dockwidgets.code_editor import NxtCodeEditor
@@ -67,6 +67,7 @@ class MainWindow(QtWidgets.QMainWindow):
         QtWidgets.QApplication.processEvents()
         super(MainWindow, self).__init__(parent=parent)
         self.new_log_signal.connect(self.handle_remote_log)
+        user_dir.watch_pref_files()
         old_cwd = os.getcwd()
         ui_dir = os.path.dirname(__file__)
         os.chdir(ui_dir)
@@ -207,6 +208,11 @@ class MainWindow(QtWidgets.QMainWindow):
         self.build_view = BuildView(parent=self)
         self.addDockWidget(QtCore.Qt.LeftDockWidgetArea, self.build_view)
 
+        # build profiler
+        self.profiler_view = ProfilerView(parent=self)
+        self.profiler_view.hide()
+        self.addDockWidget(QtCore.Qt.BottomDockWidgetArea, self.profiler_view)
+
         # output log
         self.output_log = OutputLog(parent=self)
         self.output_log.hide()
@@ -766,6 +772,7 @@ QCheckBox::indicator {
             self.history_view.set_stage_model(model)
             self.workflow_tools.set_stage_model(model)
             self.build_view.set_stage_model(model)
+            self.profiler_view.set_stage_model(model)
             self.find_rep.set_stage_model(model)
             self.output_log.set_stage_model(model)
             self.update_target_color()
@@ -897,9 +904,9 @@ QCheckBox::indicator {
             return
         dirty_models = []
         for open_file_dict in self.open_files.values():
-            unsaved = open_file_dict['model'].get_unsaved_changes()
-            if unsaved:
-                dirty_models += [open_file_dict['model']]
+            model = open_file_dict['model']
+            if model.get_unsaved_changes(deep_check=True):
+                dirty_models += [model]
         if dirty_models:
             resp = UnsavedLayersDialogue.save_before_exit(dirty_models, self)
             if resp == QtWidgets.QDialog.Rejected:
@@ -945,7 +952,7 @@ QCheckBox::indicator {
             layers = [single_layer]
         else:
             layers = model.stage._sub_layers
-        unsaved = model.get_unsaved_changes(layers=layers)
+        unsaved = model.get_unsaved_changes(layers=layers, deep_check=True)
         if unsaved and not single_layer:
             resp = UnsavedLayersDialogue.save_before_exit([model], self)
             if resp == QtWidgets.QDialog.Rejected:
@@ -1213,6 +1220,7 @@ class MenuBar(QtWidgets.QMenuBar):
         self.app_actions.code_editor_action.setData(parent.code_editor)
         self.app_actions.history_view_action.setData(parent.history_view)
         self.app_actions.build_view_action.setData(parent.build_view)
+        self.app_actions.profiler_view_action.setData(parent.profiler_view)
         self.app_actions.output_log_action.setData(parent.output_log)
         self.app_actions.hotkey_editor_action.setData(parent.hotkey_editor)
         self.app_actions.workflow_tools_action.setData(parent.workflow_tools)
@@ -1227,6 +1235,7 @@ class MenuBar(QtWidgets.QMenuBar):
             self.app_actions.code_editor_action,
             self.app_actions.history_view_action,
             self.app_actions.build_view_action,
+            self.app_actions.profiler_view_action,
             self.app_actions.output_log_action,
             self.app_actions.hotkey_editor_action,
             self.app_actions.workflow_tools_action
@@ -1434,7 +1443,7 @@ class MenuBar(QtWidgets.QMenuBar):
 
     def __force_redraw(self):
         view = self.parent().view
-        view.update_view()
+        view.update_view(clear=True)
 
     def __force_uncaught_exception(self):
         print(foo)
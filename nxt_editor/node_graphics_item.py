@@ -69,6 +69,13 @@ class NodeGraphicsItem(graphic_type):
         # draw settings
         self.title_font = QtGui.QFont("Roboto Mono", 14)
         self.attr_font = QtGui.QFont("Roboto Mono", 9)
+        self.attr_font_metrics = QtGui.QFontMetrics(self.attr_font)
+        # {italic: font} shared by every attr
+        self.attr_fonts = {}
+        for italic in (False, True):
+            self.attr_fonts[italic] = QtGui.QFont(self.attr_font.family(),
+                                                  self.attr_font.pointSize(),
+                                                  italic=italic)
         self.title_rect_height = 39
         self.attr_rect_height = 26
         self.attr_rect_opacity = 0.9
@@ -86,6 +93,10 @@ class NodeGraphicsItem(graphic_type):
         self.error_list = []
         self.error_item = None
         self.is_build_focus = False
+        # Render state, see `update_title_render_state`
+        self._title_key = None
+        self.elided_title = ''
+        self.title_proxy_rect = QtCore.QRectF()
 
         # local attributes
         self.user_attr_names = []
@@ -99,8 +110,6 @@ class NodeGraphicsItem(graphic_type):
         self.node_enabled = None
         self.node_instance = None
 
-        self.model.build_idx_changed.connect(self.update_build_focus)
-        self.model.executing_changed.connect(self.update_build_focus)
         # draw node
         self.update_from_model()
 
@@ -215,6 +224,8 @@ class NodeGraphicsItem(graphic_type):
             self.color_alpha = 0.35
         else:
             self.color_alpha = 1.0
+        for color in self.colors:
+            color.setAlphaF(self.color_alpha)
         self.dim_factor = 100
         if self.model.node_is_instance_child(self.node_path,
                                              self.model.comp_layer):
@@ -225,6 +236,75 @@ class NodeGraphicsItem(graphic_type):
         self.node_instance = self.model.get_node_instance(self.node_path,
                                                           self.model.comp_layer)
         self.title_font.setItalic(bool(self.node_instance))
+        self.update_title_render_state()
+
+    def update_title_render_state(self):
+        """Caches the elided title text and the low level of detail title
+        rect. Only re-calculated when the title, width or font changed.
+        """
+        title_str = nxt_path.node_name_from_node_path(self.node_path)
+        width = self.max_width - 40
+        if self.error_list:
+            width -= 20
+        key = (title_str, width, self.title_font.key())
+        if key == self._title_key:
+            return
+        self._title_key = key
+        font_metrics = QtGui.QFontMetrics(self.title_font)
+        self.elided_title = font_metrics.elidedText(title_str,
+                                                    QtCore.Qt.ElideRight,
+                                                    width)
+        proxy_rect = font_metrics.boundingRect(title_str)
+        r_width = proxy_rect.width() * .8
+        height = proxy_rect.height()
+        self.title_proxy_rect = QtCore.QRectF(15, height * .8,
+                                              min(r_width, width),
+                                              height * .2)
+
+    def update_error_item(self):
+        """Adds or removes the error badge to match `self.error_list`."""
+        if self.error_list and not self.error_item:
+            pos = QtCore.QPointF(self.max_width-45, self.title_rect_height/4)
+            font_size = user_prefs.get(USER_PREF.FONT_SIZE, 16)
+            self.error_item = ErrorItem(font=QtGui.QFont('Roboto',
+                                                         font_size, 75),
+                                        pos=pos, text='!')
+            self.error_item.setParentItem(self)
+            self.error_item.setZValue(50)
+        elif not self.error_list and self.error_item:
+            self.error_item.setParentItem(None)
+            if self.error_item.scene():
+                self.error_item.scene().removeItem(self.error_item)
+            self.error_item = None
+
+    def update_collapse_arrows(self):
+        """Re-builds the collapse arrows below this node. Only collapsed
+        nodes have arrows, one per layer color of the hidden descendants.
+        """
+        for arrow in self.collapse_arrows:
+            arrow.setParentItem(None)
+            if arrow.scene():
+                arrow.scene().removeItem(arrow)
+        self.collapse_arrows = []
+        if not self.collapse_state:
+            return
+        des_colors = self.model.get_descendant_colors(self.node_path)
+        filled = self.model.has_children(self.node_path)
+        if not filled:
+            des_colors = [QtCore.Qt.white]
+        elif not des_colors:
+            disp = self.model.comp_layer
+            des_colors = [self.model.get_node_color(self.node_path, disp)]
+        num = len(des_colors)
+        height = self.boundingRect().height()
+        for i, c in enumerate(des_colors):
+            arrow = CollapseArrow(self, filled=filled, color=c)
+            arrow_width = arrow.width * 1.1
+            center_offset = (arrow_width * (num * .5) - arrow_width * .5)
+            cur_offset = (i * arrow_width)
+            pos = ((self.max_width * .5) + center_offset - cur_offset)
+            arrow.setPos(pos, height)
+            self.collapse_arrows += [arrow]
 
     @property
     def title_bounding_rect(self):
@@ -262,13 +342,14 @@ class NodeGraphicsItem(graphic_type):
     def itemChange(self, change, value):
         """Override of QtWidgets.QGraphicsItem itemChange."""
         # keep connections drawing to node as it moves
-        if change is self.ItemScenePositionHasChanged:
+        if change is QtWidgets.QGraphicsItem.ItemScenePositionHasChanged:
             graphics = self.view.get_node_connection_graphics(self.node_path)
             for connection in graphics:
                 connection.rebuild_line()
         # TODO: Take into account the positions of every selected node and snap them all to a grid as soon as
         #  the user preses shift. This will avoid the weird wavy snapping effect we have right now
-        if change == self.ItemPositionChange and self.scene():
+        pos_change = QtWidgets.QGraphicsItem.ItemPositionChange
+        if change == pos_change and self.scene():
             ml = QtWidgets.QApplication.mouseButtons() == QtCore.Qt.LeftButton
             shift = QtWidgets.QApplication.keyboardModifiers() == QtCore.Qt.ShiftModifier
             force_snap = self.view.alignment_actions.snap_action.isChecked()
@@ -288,7 +369,7 @@ class NodeGraphicsItem(graphic_type):
         """Override of QtWidgets.QGraphicsItem paint. Handles all visuals of the Node. Split up into 3
         functions for organization.
         """
-        lod = QtWidgets.QStyleOptionGraphicsItem.levelOfDetailFromTransform(painter.worldTransform())
+        lod = get_lod(painter)
         if lod > MIN_LOD:
             painter.setRenderHints(QtGui.QPainter.Antialiasing |
                                    QtGui.QPainter.TextAntialiasing |
@@ -312,7 +393,7 @@ class NodeGraphicsItem(graphic_type):
         :type painter: QtGui.QPainter
         """
 
-        if self.model.is_selected(self.node_path):
+        if self.isSelected():
             color = colors.SELECTED
         elif self.is_build_focus:
             color = QtCore.Qt.red
@@ -350,15 +431,10 @@ class NodeGraphicsItem(graphic_type):
         painter.setPen(QtCore.Qt.NoPen)
         bg = painter.background()
         bgm = painter.backgroundMode()
-        if self.error_item:
-            self.scene().removeItem(self.error_item)
-            self.error_item.deleteLater()
-        self.error_item = None
         if self.is_real and not self.locked:
             painter.setBackgroundMode(QtCore.Qt.OpaqueMode)
         else:
             painter.setBackgroundMode(QtCore.Qt.TransparentMode)
-            [c.setAlphaF(self.color_alpha) for c in self.colors]
         color_count = len(self.colors)
         color_band_width = 10
         for i in range(color_count):
@@ -389,17 +465,10 @@ class NodeGraphicsItem(graphic_type):
             painter.drawRoundedRect(rect, self.ROUND_X, self.ROUND_Y)
         painter.setBackground(bg)
         painter.setBackgroundMode(bgm)
-        # draw exec plugs
-        exec_attr = nxt_node.INTERNAL_ATTRS.EXECUTE_IN
-        exec_in_pos = self.get_attr_in_pos(exec_attr, scene=False)
-        out_pos = self.get_attr_out_pos(exec_attr, scene=False)
-        self.exec_out_plug.setPos(out_pos)
-        self.exec_in_plug.setPos(exec_in_pos)
         if lod > MIN_LOD:
             # draw attr dots
             offset = -6
             for fill in self.attr_dots:
-                painter.setBrush(QtCore.Qt.white)
                 if fill:
                     painter.setBrush(QtCore.Qt.white)
                 else:
@@ -412,71 +481,19 @@ class NodeGraphicsItem(graphic_type):
                 offset += 6
 
         # draw title
-
         painter.setFont(self.title_font)
-        title_str = nxt_path.node_name_from_node_path(self.node_path)
-        font_metrics = QtGui.QFontMetrics(self.title_font)
-        width = self.max_width - 40
-        if self.error_list:
-            width -= 20
         if lod > MIN_LOD:
             painter.setPen(
                 QtGui.QColor(QtCore.Qt.white).darker(self.dim_factor))
             if not self.node_enabled:
                 painter.setPen(QtGui.QColor(QtCore.Qt.white).darker(150))
-            title = font_metrics.elidedText(title_str,
-                                            QtCore.Qt.ElideRight, width)
             painter.drawText(15, 0, self.max_width - 15, self.title_rect_height,
-                             QtCore.Qt.AlignVCenter, title)
+                             QtCore.Qt.AlignVCenter, self.elided_title)
         else:
             painter.setBrush(QtGui.QColor(QtCore.Qt.white).darker(self.dim_factor))
             if not self.node_enabled:
                 painter.setBrush(QtGui.QColor(QtCore.Qt.white).darker(150))
-            proxy_rect = font_metrics.boundingRect(title_str)
-            r_width = proxy_rect.width() * .8
-            height = proxy_rect.height()
-            painter.drawRect(15, height * .8,
-                             min(r_width, width), height * .2)
-
-        if lod > MIN_LOD:
-            # draw error
-            if self.error_list:
-                pos = QtCore.QPointF(self.max_width-45, self.title_rect_height/4)
-                font_size = user_prefs.get(USER_PREF.FONT_SIZE, 16)
-                error_item = ErrorItem(font=QtGui.QFont('Roboto',
-                                                        font_size, 75),
-                                       pos=pos, text='!')
-                error_item.setParentItem(self)
-                error_item.setZValue(50)
-                self.error_item = error_item
-
-        # draw collapse state arrow
-        for arrow in self.collapse_arrows:
-            if arrow.scene():
-                self.scene().removeItem(arrow)
-        if lod > MIN_LOD:
-            self.collapse_arrows = []
-            # TODO calculation needed arrows should be done outside drawing
-
-            if self.collapse_state:
-                des_colors = self.model.get_descendant_colors(self.node_path)
-                filled = self.model.has_children(self.node_path)
-                if not filled:
-                    des_colors = [QtCore.Qt.white]
-                elif not des_colors:
-                    disp = self.model.comp_layer
-                    des_colors = [self.model.get_node_color(self.node_path, disp)]
-                i = 0
-                num = len(des_colors)
-                for c in des_colors:
-                    arrow = CollapseArrow(self, filled=filled, color=c)
-                    arrow_width = arrow.width * 1.1
-                    center_offset = (arrow_width * (num * .5) - arrow_width * .5)
-                    cur_offset = (i * arrow_width)
-                    pos = ((self.max_width * .5) + center_offset - cur_offset)
-                    arrow.setPos(pos, self.boundingRect().height())
-                    self.collapse_arrows += [arrow]
-                    i += 1
+            painter.drawRect(self.title_proxy_rect)
 
     def draw_attributes(self, painter, lod=1.):
         """Draw attributes for this node. Called exclusively by paint.
@@ -491,64 +508,17 @@ class NodeGraphicsItem(graphic_type):
             painter.setPen(QtCore.Qt.NoPen)
             painter.drawRect(attr_details['bg_rect'])
 
-            # draw connection points
-            target_color = attr_details['plug_color']
-
-            self._attr_plug_graphics.setdefault(attr_name, {})
-            attr_plug_graphics = self._attr_plug_graphics[attr_name]
-            current_in_plug = attr_plug_graphics.get('in_plug')
-            if lod > MIN_LOD:
-                in_pos = self.get_attr_in_pos(attr_name, scene=False)
-                if current_in_plug:
-                    current_in_plug.show()
-                    current_in_plug.color = target_color
-                    current_in_plug.update()
-                else:
-                    current_in_plug = NodeGraphicsPlug(radius=self.ATTR_PLUG_RADIUS,
-                                                       color=target_color,
-                                                       attr_name_represented=attr_name,
-                                                       is_input=True,
-                                                       parent=self)
-                    attr_plug_graphics['in_plug'] = current_in_plug
-                current_in_plug.setPos(in_pos)
-            elif current_in_plug:
-                current_in_plug.hide()
-
-            current_out_plug = attr_plug_graphics.get('out_plug')
-            if lod > MIN_LOD:
-                out_pos = self.get_attr_out_pos(attr_name, scene=False)
-                if current_out_plug:
-                    current_out_plug.show()
-                    current_out_plug.color = target_color
-                    current_out_plug.update()
-                else:
-                    current_out_plug = NodeGraphicsPlug(radius=self.ATTR_PLUG_RADIUS,
-                                                        color=target_color,
-                                                        attr_name_represented=attr_name,
-                                                        is_input=False,
-                                                        parent=self)
-                    attr_plug_graphics['out_plug'] = current_out_plug
-                current_out_plug.setPos(out_pos)
-            elif current_out_plug:
-                current_out_plug.hide()
-
             # draw attr_name
             rect = attr_details['bg_rect']
             painter.setFont(attr_details['title_font'])
-            font_metrics = QtGui.QFontMetrics(self.attr_font)
-            title = font_metrics.elidedText(attr_name, QtCore.Qt.ElideRight,
-                                            self.max_width - 20)
             if lod > MIN_LOD:
                 painter.setPen(attr_details['title_color'])
                 painter.drawText(rect.x() + 10, rect.y() - 1, rect.width(),
-                                 rect.height(), QtCore.Qt.AlignVCenter, title)
+                                 rect.height(), QtCore.Qt.AlignVCenter,
+                                 attr_details['title'])
             else:
-                proxy_rect = font_metrics.boundingRect(title)
-                height = proxy_rect.height()
-                width = proxy_rect.width()
                 painter.setBrush(attr_details['title_color'].darker(150))
-                painter.drawRect(rect.x() + 10, rect.y() + height*.8,
-                                 width, height*.2)
+                painter.drawRect(attr_details['title_proxy_rect'])
 
     def calculate_attribute_draw_details(self):
         """Calculate position of all known attr names. Details stored in
@@ -591,10 +561,16 @@ class NodeGraphicsItem(graphic_type):
             white = QtGui.QColor(QtCore.Qt.white)
             draw_details['title_color'] = white.darker(dim_title)
             # font
-            font = QtGui.QFont(self.attr_font.family(),
-                               self.attr_font.pointSize(),
-                               italic=attr_is_instance)
-            draw_details['title_font'] = font
+            draw_details['title_font'] = self.attr_fonts[attr_is_instance]
+            # title
+            font_metrics = self.attr_font_metrics
+            title = font_metrics.elidedText(attr_name, QtCore.Qt.ElideRight,
+                                            self.max_width - 20)
+            draw_details['title'] = title
+            proxy_rect = font_metrics.boundingRect(title)
+            height = proxy_rect.height()
+            draw_details['title_proxy_rect'] = QtCore.QRectF(
+                10, rect_y + height * .8, proxy_rect.width(), height * .2)
 
             self._attribute_draw_details[attr_name] = draw_details
         # Internal Attrs
@@ -618,6 +594,38 @@ class NodeGraphicsItem(graphic_type):
         draw_details['plug_color'] = QtGui.QColor(QtCore.Qt.gray)
         inst_attr = nxt_node.INTERNAL_ATTRS.INSTANCE_PATH
         self._attribute_draw_details[inst_attr] = draw_details
+        self.update_plug_graphics()
+
+    def update_plug_graphics(self):
+        """Positions the exec plugs and creates, positions and colors the
+        plugs of every user attr from the current draw details.
+        """
+        exec_attr = nxt_node.INTERNAL_ATTRS.EXECUTE_IN
+        self.exec_in_plug.setPos(self.get_attr_in_pos(exec_attr, scene=False))
+        self.exec_out_plug.setPos(self.get_attr_out_pos(exec_attr,
+                                                        scene=False))
+        for attr_name in self.user_attr_names:
+            attr_details = self._attribute_draw_details[attr_name]
+            target_color = attr_details['plug_color']
+            attr_plug_graphics = self._attr_plug_graphics.setdefault(attr_name,
+                                                                     {})
+            for key, is_input in (('in_plug', True), ('out_plug', False)):
+                plug = attr_plug_graphics.get(key)
+                if plug:
+                    plug.color = QtGui.QColor(target_color)
+                    plug.update()
+                else:
+                    plug = NodeGraphicsPlug(radius=self.ATTR_PLUG_RADIUS,
+                                            color=target_color,
+                                            attr_name_represented=attr_name,
+                                            is_input=is_input,
+                                            parent=self)
+                    attr_plug_graphics[key] = plug
+                if is_input:
+                    pos = attr_details['in_pos']
+                else:
+                    pos = attr_details['out_pos']
+                plug.setPos(pos)
 
     def get_selection_rect(self):
         """used by boundingRect and draw_border."""
@@ -654,6 +662,9 @@ class NodeGraphicsItem(graphic_type):
         super(NodeGraphicsItem, self).hoverLeaveEvent(event)
 
     def update_build_focus(self):
+        """Called by the view when this node may have gained or lost the
+        build focus, see `StageView.update_build_focus`.
+        """
         if not self.model.executing:
             self.is_build_focus = False
             self.update()
@@ -680,6 +691,7 @@ class NodeGraphicsItem(graphic_type):
         self.update_build_focus()
         self._update_collapse()
         self.error_list = self.model.get_node_error(node_path, comp)
+        self.update_error_item()
         self.update_fonts()
         # update exec plugs
         # update attributes
@@ -741,15 +753,41 @@ class NodeGraphicsItem(graphic_type):
             self.attr_dots = [True, True, True]
         else:
             self.attr_dots = [False, False, False]
-
+        self.update_collapse_arrows()
         self.update()
 
+    def set_node_path(self, node_path):
+        """Re-targets this item at a different node so a pooled item can be
+        reused rather than building a new one. The item must not be in a
+        scene.
+
+        :param node_path: Path of the node this item now represents.
+        :type node_path: str
+        """
+        self.node_path = node_path
+        for plug_graphics in self._attr_plug_graphics.values():
+            for plug in plug_graphics.values():
+                plug.setParentItem(None)
+        self._attr_plug_graphics = {}
+        self._attribute_draw_details = OrderedDict()
+        self.user_attr_names = []
+        self.error_list = []
+        self.is_hovered = False
+        self.setSelected(False)
+        self.setFlag(QtWidgets.QGraphicsItem.ItemIsMovable, True)
+        self.setPos(0, 0)
+        for plug in (self.exec_in_plug, self.exec_out_plug):
+            plug.node_path = node_path
+            plug._refresh_from_model()
+        self.update_from_model()
+
     def update_plugs(self):
         self.calculate_attribute_draw_details()
         self.update()
 
     def update_collapse(self):
         self._update_collapse()
+        self.update_collapse_arrows()
         self.update()
 
     def _update_collapse(self):
@@ -898,9 +936,17 @@ class NodeGraphicsItem(graphic_type):
         return self.mapToScene(pos)
 
 
+def get_lod(painter):
+    """Get the level of detail of the given painter's world transform."""
+    return QtWidgets.QStyleOptionGraphicsItem.levelOfDetailFromTransform(
+        painter.worldTransform())
+
+
 class NodeGraphicsPlug(QtWidgets.QGraphicsItem):
 
     """Graphics item for user attribute plugs on the NodeGraphicsItem."""
+    # Attr plugs are neither drawn nor clickable when zoomed out.
+    HIDE_BELOW_MIN_LOD = True
 
     def __init__(self, radius=3, hover_width=0.5, color=QtGui.QColor(255, 255, 255, 255),
                  attr_name_represented='', is_input=False, parent=None):
@@ -928,8 +974,7 @@ class NodeGraphicsPlug(QtWidgets.QGraphicsItem):
                             (self.radius + offset) * 2)
 
     def _apply_lod_to_painter(self, painter):
-        lod = QtWidgets.QStyleOptionGraphicsItem.levelOfDetailFromTransform(
-            painter.worldTransform())
+        lod = get_lod(painter)
         if lod > MIN_LOD:
             painter.setRenderHints(QtGui.QPainter.Antialiasing |
                                    QtGui.QPainter.TextAntialiasing |
@@ -938,10 +983,24 @@ class NodeGraphicsPlug(QtWidgets.QGraphicsItem):
             painter.setRenderHints(QtGui.QPainter.Antialiasing |
                                    QtGui.QPainter.TextAntialiasing |
                                    QtGui.QPainter.SmoothPixmapTransform, False)
+        return lod
+
+    def is_lod_hidden(self):
+        """Whether the plug is hidden at the view's current zoom."""
+        if not self.HIDE_BELOW_MIN_LOD or not self.scene():
+            return False
+        views = self.scene().views()
+        if not views:
+            return False
+        lod = QtWidgets.QStyleOptionGraphicsItem.levelOfDetailFromTransform(
+            views[0].transform())
+        return lod <= MIN_LOD
 
     def paint(self, painter, option, widget):
         """Override of QtWidgets.QGraphicsItem paint. Handles all visuals of the Plug."""
-        self._apply_lod_to_painter(painter)
+        lod = self._apply_lod_to_painter(painter)
+        if self.HIDE_BELOW_MIN_LOD and lod <= MIN_LOD:
+            return
         if self.is_hovered:
             painter.setPen(QtGui.QPen(QtCore.Qt.white, self.hover_width, QtCore.Qt.SolidLine, QtCore.Qt.RoundCap, QtCore.Qt.RoundJoin))
         else:
@@ -978,6 +1037,10 @@ class NodeGraphicsPlug(QtWidgets.QGraphicsItem):
 
     def mousePressEvent(self, event):
         """Override of QtWidgets.QGraphicsItem mousePressEvent."""
+        if self.is_lod_hidden():
+            # Let the node under the plug take the click.
+            event.ignore()
+            return
         # break attribute connections
         if event.modifiers() == QtCore.Qt.AltModifier:
             raise NotImplementedError("Alt to clear attribute is broken.")
@@ -1009,6 +1072,8 @@ class NodeExecutionPlug(NodeGraphicsPlug):
 
     Handles drawing of exec plugs, as well as start, break, and skip points.
     """
+    HIDE_BELOW_MIN_LOD = False
+
     def __init__(self, model, node_path, is_input, parent=None):
         super(NodeExecutionPlug, self).__init__(
             radius=NodeGraphicsItem.EXEC_PLUG_RADIUS,
@@ -1121,6 +1186,8 @@ class CollapseArrow(QtWidgets.QGraphicsItem):
 
     def paint(self, painter, option, widget):
         """Override of QtWidgets.QGraphicsItem paint."""
+        if get_lod(painter) <= MIN_LOD:
+            return
         painter.setRenderHints(QtGui.QPainter.Antialiasing |
                                QtGui.QPainter.TextAntialiasing |
                                QtGui.QPainter.SmoothPixmapTransform)
@@ -1185,6 +1252,8 @@ class ErrorItem(QtWidgets.QGraphicsTextItem):
         return QtCore.QRectF(-10, -10, 10, 10)
 
     def paint(self, painter, option, widget):
+        if get_lod(painter) <= MIN_LOD:
+            return
         painter.setRenderHints(QtGui.QPainter.Antialiasing |
                                QtGui.QPainter.TextAntialiasing)
         painter.setPen(QtCore.Qt.NoPen)
@@ -0,0 +1,108 @@
+"""
+Incremental cache sync between a remote (DCC) session and the editor.
+
+The remote keeps a `CacheSync` on its socket model that remembers which node
+caches the editor already has. Each sync sends only the node caches created
+since the last one, tagged with a sequence number. The editor passes back the
+sequence it last merged; if that doesn't match (the editor cleared its cache,
+the remote rebuilt its runtime layer, a message was lost) the remote sends
+every node again with `reset` set.
+
+The remote side is started from the editor over the command port, see
+`StageModel.get_remote_cache`.
+"""
+# Built-in
+import logging
+
+# Internal
+import nxt_editor
+from nxt import nxt_layer
+from nxt.nxt_node import get_node_as_dict
+from nxt.remote import nxt_socket
+from nxt_editor import ipc
+
+logger = logging.getLogger(nxt_editor.LOGGER_NAME)
+
+CACHE_DELTA = 'cache_delta'  # Com message key, see nxt_socket.COM_TYPE
+SYNC_ATTR = '_nxt_cache_sync'
+
+
+class DELTA_KEYS(object):
+    SEQ = 'seq'
+    BASE_SEQ = 'base_seq'
+    RESET = 'reset'
+    NODES = 'nodes'
+
+
+class CacheSync(object):
+    """Remote side record of the cache nodes sent to the editor. Every node
+    execution adds a new node object to the cache layer so comparing by
+    identity finds the nodes run since the last sync without serializing
+    anything else.
+    """
+    def __init__(self):
+        self.seq = 0
+        self.cache_layer = None
+        self.sent = {}
+
+    def get_delta(self, cache_layer, since=None):
+        """Get the cache nodes the editor is missing.
+
+        :param cache_layer: Remote CacheLayer
+        :param since: Sequence number the editor last merged, None if it has
+        no cache.
+        :return: Delta message dict, see DELTA_KEYS
+        :rtype: dict
+        """
+        reset = (since is None or since != self.seq or
+                 cache_layer is not self.cache_layer)
+        if reset:
+            self.sent = {}
+            self.cache_layer = cache_layer
+        nodes = {}
+        if cache_layer is not None:
+            for path, node in cache_layer.nodes.items():
+                if self.sent.get(path) is node:
+                    continue
+                nodes[path] = get_node_as_dict(node)
+                self.sent[path] = node
+        base_seq = None if reset else self.seq
+        self.seq += 1
+        return {DELTA_KEYS.SEQ: self.seq,
+                DELTA_KEYS.BASE_SEQ: base_seq,
+                DELTA_KEYS.RESET: reset,
+                DELTA_KEYS.NODES: nodes}
+
+
+def send_cache_delta(model, since=None):
+    """Remote entry point, sends the editor the cache nodes it is missing.
+
+    :param model: nxt_socket.SocketClientModel
+    :param since: Sequence number the editor last merged
+    """
+    with nxt_socket.IPCWait(model):
+        sync = getattr(model, SYNC_ATTR, None)
+        if sync is None:
+            sync = CacheSync()
+            setattr(model, SYNC_ATTR, sync)
+        rt_layer = model.runtime_layer
+        cache_layer = rt_layer.cache_layer if rt_layer else None
+        delta = sync.get_delta(cache_layer, since)
+        msg = nxt_socket.format_msg(delta, CACHE_DELTA)
+        ipc.send_frame(model.server, msg)
+
+
+def merge_cache_delta(cache_layer, delta):
+    """Editor side, merge a delta into the runtime cache layer.
+
+    :param cache_layer: The editor's CacheLayer, None if it has none
+    :param delta: Delta message dict from `CacheSync.get_delta`
+    :return: The merged CacheLayer, a new one if the delta was a reset
+    :rtype: nxt_layer.CacheLayer
+    """
+    layer_data = {'nodes': delta[DELTA_KEYS.NODES]}
+    new_cache = nxt_layer.CacheLayer.load_from_layer_data(layer_data)
+    if delta[DELTA_KEYS.RESET] or cache_layer is None:
+        return new_cache
+    cache_layer.nodes.update(new_cache.nodes)
+    return cache_layer
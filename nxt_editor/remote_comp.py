@@ -0,0 +1,259 @@
+"""
+Incremental comp updates from the editor to a remote (DCC) session.
+
+The editor's `CompSync` keeps a content hash of every node it last sent to
+the remote, per layer, and a hash chain that advances with every update.
+Only the nodes commands touched since the last update are hashed again, see
+`StageModel.comp_delta_recorded`, and only those whose hash changed are
+sent. The remote patches the affected layers in place and rebuilds its
+comp. If the remote's chain doesn't match
+the delta's base (it reloaded, restarted or missed an update) it replies
+with a `COMP_RESYNC` message and the editor falls back to saving the full
+comp to temp files for the remote to load, which also restarts the chain.
+
+Adding, removing or reordering layers, or changing a layer's references or
+overrides, always sends the full comp. Layer meta data (positions, collapse
+state) doesn't affect execution and isn't compared. Layers are matched by
+their index in the comp and their file name, the full comp is saved to the
+remote with each layer named after its source file.
+
+See `StageModel.update_remote_comp`.
+"""
+# Built-in
+import hashlib
+import json
+import logging
+import os
+
+# Internal
+import nxt_editor
+from nxt import nxt_path
+from nxt.nxt_layer import SAVE_KEY, LayerReturnTypes
+from nxt.nxt_node import get_node_as_dict
+from nxt.remote import nxt_socket
+from nxt_editor import ipc
+
+logger = logging.getLogger(nxt_editor.LOGGER_NAME)
+
+COMP_RESYNC = 'comp_resync'  # Com message key, see nxt_socket.COM_TYPE
+SYNC_ATTR = '_nxt_comp_sync'
+
+
+class DELTA_KEYS(object):
+    BASE = 'base'
+    CHAIN = 'chain'
+    LAYERS = 'layers'
+    NODES = 'nodes'
+    REMOVED = 'removed'
+
+
+def hash_data(data):
+    """Content hash of json serializable data.
+
+    :rtype: str
+    """
+    dump = json.dumps(data, sort_keys=True, default=str)
+    return hashlib.sha1(dump.encode('utf-8')).hexdigest()
+
+
+def get_layer_key(layer, index):
+    """Key a layer is matched by on both ends.
+
+    :param layer: SpecLayer
+    :param index: Index of the layer in the comp, strongest first
+    :rtype: str
+    """
+    return '{}:{}'.format(index, os.path.basename(layer.real_path or ''))
+
+
+def get_layer_header(layer):
+    """Get the save data of a layer that can't be sent as a node delta,
+    without getting the save data of its nodes.
+
+    :param layer: SpecLayer
+    :rtype: dict
+    """
+    return {SAVE_KEY.ALIAS: layer.get_alias(local=True),
+            SAVE_KEY.MUTE: layer.get_muted(local=True),
+            SAVE_KEY.SOLO: layer.get_soloed(local=True),
+            SAVE_KEY.REFERENCES: layer.get_references(),
+            SAVE_KEY.COMP_ORVERRIDES: layer.get_comp_overrides(),
+            SAVE_KEY.COLOR: layer.color}
+
+
+class CompSync(object):
+    """Editor side record of the comp the remote has."""
+    def __init__(self):
+        self.chain = None
+        self.order = []
+        self.headers = {}
+        self.node_hashes = {}
+        # {layer real path: set of node paths} touched since the last update
+        self.touched = {}
+
+    def reset(self):
+        self.chain = None
+        self.order = []
+        self.headers = {}
+        self.node_hashes = {}
+        self.touched = {}
+
+    def add_touched(self, layer_nodes):
+        """Record nodes that were changed, their hashes are compared on the
+        next update. Nothing is recorded until the remote has a comp.
+
+        :param layer_nodes: {layer real path: iterable of node paths}
+        :return: None
+        """
+        if self.chain is None:
+            return
+        for layer_path, node_paths in layer_nodes.items():
+            self.touched.setdefault(layer_path, set()).update(node_paths)
+
+    @staticmethod
+    def _hash_headers(layers):
+        """Get the key order and header hashes of the given layers.
+
+        :rtype: tuple
+        """
+        order = []
+        headers = {}
+        for index, layer in enumerate(layers):
+            key = get_layer_key(layer, index)
+            order += [key]
+            headers[key] = hash_data(get_layer_header(layer))
+        return order, headers
+
+    def record_full(self, layers):
+        """Record the given layers as sent in full and start a new chain.
+
+        :param layers: Spec layers of the comp, strongest first
+        :return: The new chain hash
+        :rtype: str
+        """
+        order, headers = self._hash_headers(layers)
+        node_hashes = {}
+        for key, layer in zip(order, layers):
+            layer_nodes = layer.get_nodes_save_data()
+            node_hashes[key] = dict((path, hash_data(data))
+                                    for path, data in layer_nodes.items())
+        chain = hash_data([order, headers, node_hashes])
+        self.order = order
+        self.headers = headers
+        self.node_hashes = node_hashes
+        self.touched = {}
+        self.chain = chain
+        return chain
+
+    def get_delta(self, layers):
+        """Get the touched nodes that changed since the last update and
+        advance the chain. None is returned if the full comp must be sent.
+
+        :param layers: Spec layers of the comp, strongest first
+        :return: Delta dict, see DELTA_KEYS, or None
+        :rtype: dict or None
+        """
+        if self.chain is None:
+            return None
+        order, headers = self._hash_headers(layers)
+        if order != self.order or headers != self.headers:
+            return None
+        layer_deltas = {}
+        for key, layer in zip(order, layers):
+            touched = self.touched.get(layer.real_path)
+            if not touched:
+                continue
+            changed, removed = self._get_node_changes(layer, key, touched)
+            if changed or removed:
+                layer_deltas[key] = {DELTA_KEYS.NODES: changed,
+                                     DELTA_KEYS.REMOVED: removed}
+        self.touched = {}
+        base = self.chain
+        self.chain = hash_data([base, layer_deltas])
+        return {DELTA_KEYS.BASE: base,
+                DELTA_KEYS.CHAIN: self.chain,
+                DELTA_KEYS.LAYERS: layer_deltas}
+
+    def _get_node_changes(self, layer, key, touched):
+        """Hash the touched nodes of a layer and update the recorded hashes.
+        Their descendants are hashed too as renaming or removing a node
+        moves its children, and their ancestors as adding, removing or
+        moving a node edits its parent's child order.
+
+        :return: tuple of ({node path: node data} that changed, [removed
+        node paths])
+        """
+        old_hashes = self.node_hashes[key]
+        paths = set(touched)
+        prefixes = tuple(p + '/' for p in touched)
+        paths.update(p for p in old_hashes if p.startswith(prefixes))
+        for node_path in touched:
+            paths.update(nxt_path.all_ancestor_paths(node_path))
+            if layer.lookup(node_path) is not None:
+                paths.update(layer.descendants(
+                    node_path, return_type=LayerReturnTypes.Path))
+        changed = {}
+        removed = []
+        for node_path in sorted(paths):
+            node = layer.lookup(node_path)
+            if node is None:
+                if old_hashes.pop(node_path, None) is not None:
+                    removed += [node_path]
+                continue
+            data = get_node_as_dict(node)
+            node_hash = hash_data(data)
+            if old_hashes.get(node_path) != node_hash:
+                old_hashes[node_path] = node_hash
+                changed[node_path] = data
+        return changed, removed
+
+
+def load_comp(model, filepath, chain):
+    """Remote entry point, loads a full comp saved by the editor and starts
+    the chain the following deltas build on.
+
+    :param model: nxt_socket.SocketClientModel
+    :param filepath: Top layer of the saved comp
+    :param chain: Chain hash from `CompSync.record_full`
+    """
+    model.load(filepath)
+    setattr(model, SYNC_ATTR, chain)
+
+
+def apply_comp_delta(model, delta_json):
+    """Remote entry point, patch the loaded comp with a delta from
+    `CompSync.get_delta`. Replies with COMP_RESYNC if the delta doesn't
+    follow the last update this remote got.
+
+    :param model: nxt_socket.SocketClientModel
+    :param delta_json: Json string of the delta
+    """
+    with nxt_socket.IPCWait(model):
+        delta = json.loads(delta_json)
+        layer_deltas = delta[DELTA_KEYS.LAYERS]
+        layers = {}
+        if model.stage:
+            for index, layer in enumerate(model.stage._sub_layers):
+                layers[get_layer_key(layer, index)] = layer
+        in_sync = (getattr(model, SYNC_ATTR, None) == delta[DELTA_KEYS.BASE]
+                   and all(key in layers for key in layer_deltas))
+        if not in_sync:
+            setattr(model, SYNC_ATTR, None)
+            msg = nxt_socket.format_msg(None, COMP_RESYNC)
+            ipc.send_frame(model.server, msg)
+            return
+        for key, layer_delta in layer_deltas.items():
+            layer = layers[key]
+            save_data = layer.get_save_data()
+            nodes = save_data.setdefault(SAVE_KEY.NODES, {})
+            for path in layer_delta[DELTA_KEYS.REMOVED]:
+                nodes.pop(path, None)
+            nodes.update(layer_delta[DELTA_KEYS.NODES])
+            layer.reload_from_data(save_data)
+        if layer_deltas:
+            model._rebuild_comp()
+        else:
+            # Nothing changed, a build still starts from a fresh runtime.
+            model.runtime_layer = model.stage.setup_runtime_layer(
+                model.comp_layer)
+        setattr(model, SYNC_ATTR, delta[DELTA_KEYS.CHAIN])
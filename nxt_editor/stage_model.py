@@ -4,8 +4,11 @@ import json
 import traceback
 import math
 import socket
-import pickle
 import sys
+import threading
+import queue
+import itertools
+import collections
 
 # External
 from Qt import QtWidgets
@@ -19,7 +22,10 @@ from nxt.constants import API_VERSION, is_standalone
 from nxt import (nxt_path, nxt_layer, tokens, DATA_STATE,
                  NODE_ERRORS, GRID_SIZE)
 import nxt_editor
-from nxt_editor import DIRECTIONS, StringSignaler, user_dir
+from nxt_editor import (DIRECTIONS, MODEL_SIGNALS, StringSignaler,
+                        user_dir, ipc)
+from nxt_editor import clipboard, remote_cache, remote_comp
+from nxt_editor.build_profiler import BuildProfile, NodeTimer
 from nxt.nxt_layer import LAYERS, CompLayer, SAVE_KEY
 from nxt.nxt_node import (get_node_attr, META_ATTRS, get_node_as_dict,
                           get_node_enabled)
@@ -31,6 +37,16 @@ from nxt.remote import nxt_socket
 
 logger = logging.getLogger(nxt_editor.LOGGER_NAME)
 LAYER_DATA_KEYS = ['position_data', 'enabled_data', 'execute_data' 'break_data']
+# If an incremental recomp would touch more than this fraction of the comp's
+# nodes a full build_stage is done instead, as it is cheaper at that point.
+RECOMP_FULL_RATIO = 0.5
+# Seconds to wait for the remote to connect back to the com port.
+CONNECT_TIMEOUT = 10
+# Seconds to wait for the remote to apply a comp delta or send a cache delta.
+# A remote that takes longer is busy running something else, not out of sync.
+DELTA_TIMEOUT = 5
+# Seconds to wait for the remote to run a node before the build is stopped.
+EXEC_TIMEOUT = 600
 
 
 class EXEC_FRAMING:
@@ -48,6 +64,8 @@ class StageModel(QtCore.QObject):
     build_changed = QtCore.Signal(tuple)  # new build list
     build_idx_changed = QtCore.Signal(int)
     build_paused_changed = QtCore.Signal(bool)
+    build_profile_changed = QtCore.Signal(object)  # BuildProfile
+    comp_delta_recorded = QtCore.Signal(object)  # CompLayerStash
     processing = QtCore.Signal(bool)
     data_state_changed = QtCore.Signal(bool)
     implicit_connections_changed = QtCore.Signal(bool)
@@ -83,8 +101,15 @@ class StageModel(QtCore.QObject):
         super(StageModel, self).__init__()
         self.stage = stage
         self.clipboard = QtWidgets.QApplication.clipboard()
+        self.dispatcher = SignalDispatcher(self)
         self.undo_stack = NxtUndoStack(self)
+        self.undo_stack.dispatcher = self.dispatcher
         self.effected_layers = UnsavedLayerSet()
+        # {layer real path: content hash when last loaded or saved}
+        self.saved_layer_hashes = {}
+        for layer in stage._sub_layers:
+            if os.path.isfile(str(layer.real_path)):
+                self.set_layer_clean(layer.real_path)
 
         # execution
         self.is_standalone = is_standalone()
@@ -98,8 +123,12 @@ class StageModel(QtCore.QObject):
         self._build_should_stop = False
         self._last_built_idx = None
         self.current_rt_layer = None
+        # Timings of the last build. Kept here rather than on the runtime
+        # layer, a remote build runs its nodes in another session.
+        self.build_profile = None
         self.framing_behavior = EXEC_FRAMING.STEPPING
         self.last_hit_break = None
+        self._exec_worker = None
         self.refresh_exec_framing_from_pref()
         # model states
         self._data_state = DATA_STATE.RESOLVED
@@ -112,6 +141,7 @@ class StageModel(QtCore.QObject):
         self._selection = []
         self._node_focus = None
         self.selection_changed.connect(self.update_node_focus)
+        self.layer_saved.connect(self.set_layer_clean)
         # attribute display state
         # {/node/path: STATE_INT}
         # 0 = no attributes
@@ -124,12 +154,19 @@ class StageModel(QtCore.QObject):
         self.com_port_server = CommandPortListener(self)
         self.cache_filepath = None
         self.com_port_server.update_cache_dict.connect(self.load_cache_dict)
+        self.com_port_server.update_cache_delta.connect(self.load_cache_delta)
+        # Sequence number of the last remote cache delta merged
+        self._remote_cache_seq = None
+        self.remote_comp_sync = remote_comp.CompSync()
+        self.comp_delta_recorded.connect(self._record_remote_comp_changes)
+        self._remote_comp_resync = False
         self._use_cmd_port = False
-        self._wait_for_remote = False
+        self.remote_requests = RemoteRequests(self._send_line)
         self.com_port_server.destroy_cmd_port.connect(self._destroy_cmd_port)
         app = QtWidgets.QApplication.instance()
         app.aboutToQuit.connect(self._destroy_cmd_port)
         app.aboutToQuit.connect(self.com_port_server.stop)
+        app.aboutToQuit.connect(self._stop_exec_worker)
 
     @property
     def use_cmd_port(self):
@@ -207,7 +244,7 @@ class StageModel(QtCore.QObject):
         if node_paths in (None, [], ()):
             node_paths = self.get_selected_nodes()
         self._set_attr_display_state(node_paths, state)
-        self.nodes_changed.emit(node_paths)
+        self.dispatcher.queue(MODEL_SIGNALS.NODES_CHANGED, node_paths)
 
     def get_attr_display_state(self, node_path):
         """Gets the attribute display state for a given node path if there is
@@ -339,7 +376,7 @@ class StageModel(QtCore.QObject):
         if self.selection == paths:
             return
         self._selection = paths
-        self.selection_changed.emit(tuple(paths))
+        self.dispatcher.queue(MODEL_SIGNALS.SELECTION_CHANGED, tuple(paths))
 
     def set_selection(self, paths):
         """Sets selection to given `paths`
@@ -483,16 +520,241 @@ class StageModel(QtCore.QObject):
             self._comp_layer = comp_layer
         else:
             self._comp_layer = layer
+        self._remove_invalid_selection()
+        self.dispatcher.queue(MODEL_SIGNALS.COMP_LAYER_CHANGED, dirty)
+        self.processing.emit(False)
+
+    def update_comp_layer(self, rebuild=False, dirty=()):
+        self.set_comp_layer(self.comp_layer, rebuild, dirty)
+
+    def _remove_invalid_selection(self):
         safe_selection = []
         for node_path in self.selection:
             if self.comp_layer.lookup(node_path):
                 safe_selection += [node_path]
         self.selection = safe_selection
-        self.comp_layer_changed.emit(dirty)
+
+    def recomp_paths(self, node_paths):
+        """Incrementally re-comps the given node paths into the existing comp
+        layer. Every root touched by `node_paths`, plus any root linked to
+        those by instancing, is composited on its own and spliced into the
+        current comp in place of its old nodes. `comp_layer_changed` is then
+        emitted with exactly the node paths that were added, removed or
+        rebuilt. If the world node is dirty, the layer stack no longer
+        matches the comp, or most of the graph is affected a full
+        `build_stage` is done instead.
+
+        :param node_paths: Node paths whose spec data was changed.
+        :type node_paths: iterable
+        :return: Tuple of changed node paths, empty if a full rebuild was
+        done instead.
+        :rtype: tuple
+        """
+        self.processing.emit(True)
+        start = time.time()
+        comp_layer = self.comp_layer
+        changed = None
+        roots = self._get_recomp_roots(node_paths, comp_layer)
+        if roots:
+            changed = self._recomp_roots(roots, comp_layer)
+        if changed is None:
+            logger.debug('Falling back to a full recomp.')
+            self.set_comp_layer(comp_layer, rebuild=True)
+            self.processing.emit(False)
+            return ()
+        update_time = str(int(round((time.time() - start) * 1000)))
+        logger.debug('Re-comped {} root(s) in: {}ms'.format(len(roots),
+                                                            update_time))
+        self._remove_invalid_selection()
+        self.dispatcher.queue(MODEL_SIGNALS.COMP_LAYER_CHANGED, changed)
         self.processing.emit(False)
+        return changed
 
-    def update_comp_layer(self, rebuild=False, dirty=()):
-        self.set_comp_layer(self.comp_layer, rebuild, dirty)
+    def rebuild_comp_layer(self, prev_layers):
+        """Rebuilds the comp after the active layers changed, i.e. a layer
+        was muted or soloed. Only the roots spec'd by layers that were turned
+        on or off, plus the roots linked to those by instancing, are dirty.
+        Everything is dirty if that can't be worked out.
+
+        :param prev_layers: `active_layers` from before the change.
+        :type prev_layers: list
+        :return: None
+        """
+        old_comp = self.comp_layer
+        layers = self._get_comp_sub_layers(old_comp)
+        flipped = [layer for layer in layers if layer not in prev_layers]
+        flipped += [layer for layer in prev_layers if layer not in layers]
+        node_paths = set()
+        for layer in flipped:
+            node_paths.update(layer._nodes_path_as_key.keys())
+        comp_layer = self.stage.build_stage(from_idx=old_comp.layer_idx())
+        dirty = ()
+        roots = None
+        if node_paths:
+            roots = self._get_recomp_roots(node_paths, old_comp)
+        if roots is not None:
+            new_roots = self._get_recomp_roots(node_paths, comp_layer)
+            roots = None if new_roots is None else roots.union(new_roots)
+        if roots is not None:
+            dirty = set()
+            for root in roots:
+                dirty.add(root)
+                for comp in (old_comp, comp_layer):
+                    dirty.update(comp.descendants(root, comp.RETURNS.Path,
+                                                  include_implied=True))
+            dirty = tuple(sorted(dirty))
+        self.set_comp_layer(comp_layer, rebuild=False, dirty=dirty)
+
+    def _get_comp_sub_layers(self, comp_layer):
+        """Returns the active sub layers that make up the given comp layer,
+        strongest first.
+        """
+        return nxt_layer.get_active_layers(
+            self.stage._sub_layers[comp_layer.layer_idx():])
+
+    def _get_recomp_roots(self, node_paths, comp_layer):
+        """Returns the set of root paths that must be re-comped together for
+        a change to `node_paths`. Roots are linked when a node under one
+        instances a node under another, in either the comp or any of its
+        sub layers. None is returned when only a full rebuild is safe.
+
+        :param node_paths: Node paths whose spec data was changed.
+        :param comp_layer: CompLayer that will be updated.
+        :return: set of root node paths or None
+        """
+        world = nxt_path.WORLD
+        pending = []
+        for node_path in node_paths:
+            if not node_path or node_path == world:
+                return None
+            node_path = nxt_path.node_path_from_attr_path(node_path)
+            pending += [nxt_path.get_root_path(node_path)]
+        if not pending:
+            return None
+        # Undirected {root: set(roots)} of instance links
+        links = {}
+        layers = [comp_layer] + self._get_comp_sub_layers(comp_layer)
+        for layer in layers:
+            for path, node in layer._nodes_path_as_key.items():
+                if path == world:
+                    continue
+                inst_path = getattr(node, INTERNAL_ATTRS.INSTANCE_PATH, None)
+                if not inst_path or inst_path == world:
+                    continue
+                inst_path = nxt_path.expand_relative_node_path(inst_path,
+                                                               path)
+                root = nxt_path.get_root_path(path)
+                src_root = nxt_path.get_root_path(inst_path)
+                if root != src_root:
+                    links.setdefault(root, set()).add(src_root)
+                    links.setdefault(src_root, set()).add(root)
+        for path, concerns in comp_layer._dirty_map.items():
+            root = nxt_path.get_root_path(path)
+            for concern in concerns:
+                other_root = nxt_path.get_root_path(concern)
+                if root != other_root:
+                    links.setdefault(root, set()).add(other_root)
+                    links.setdefault(other_root, set()).add(root)
+        roots = set()
+        while pending:
+            root = pending.pop()
+            if root in roots:
+                continue
+            roots.add(root)
+            pending += list(links.get(root, ()))
+        return roots
+
+    def _recomp_roots(self, roots, comp_layer):
+        """Composites the nodes under `roots` into a temporary comp layer and
+        splices the result into `comp_layer`, replacing the old nodes.
+
+        :param roots: set of root node paths, closed over instance links.
+        :param comp_layer: CompLayer to update in place.
+        :return: Tuple of changed node paths or None if a full rebuild is
+        needed.
+        """
+        world = nxt_path.WORLD
+        sep = nxt_path.NODE_SEP
+        total_count = len(comp_layer._nodes_path_as_key)
+        old_paths = [p for p in comp_layer._nodes_path_as_key
+                     if p != world and nxt_path.get_root_path(p) in roots]
+        if total_count and len(old_paths) > total_count * RECOMP_FULL_RATIO:
+            return None
+        active_layers = self._get_comp_sub_layers(comp_layer)
+        if not active_layers:
+            return None
+        # Same as stage.build_stage, limited to the node tables of our roots
+        partial = CompLayer()
+        partial._layer_range = comp_layer._layer_range
+        for sub_layer in active_layers:
+            sub_layer.sort_node_table()
+            node_table = []
+            for entry in sub_layer._node_table:
+                # A namespace's first name is its root's name
+                if sep + entry[0][0] in roots or entry[0] == ['']:
+                    node_table += [entry]
+            partial._sublayer_node_tables += [node_table]
+        self.stage._inferred_comp_cache = {}
+        try:
+            node_count = self.stage.comp_pre_proxies(comp_layer=partial)
+            self.stage.comp_proxies(comp_layer=partial, node_count=node_count)
+            self.stage.post_proxy_comp(partial)
+        except Exception:
+            logger.debug(traceback.format_exc())
+            return None
+        old_world = comp_layer.lookup(world)
+        new_world = partial.lookup(world)
+        if bool(old_world) != bool(new_world):
+            return None
+        # Remove the old nodes
+        for path in old_paths:
+            node = comp_layer._nodes_path_as_key.pop(path)
+            comp_layer._nodes_node_as_key.pop(node, None)
+            comp_layer.clear_node_child_cache(path)
+        kept_table = []
+        for entry in comp_layer._node_table:
+            if sep + entry[0][0] not in roots:
+                kept_table += [entry]
+        comp_layer._node_table = kept_table
+        dirty_map = comp_layer._dirty_map
+        for path in list(dirty_map.keys()):
+            if nxt_path.get_root_path(path) in roots:
+                dirty_map.pop(path)
+        dirty_map.update(partial._dirty_map)
+        # Splice in the new nodes
+        new_paths = []
+        for namespace, node in partial._node_table:
+            path = nxt_path.node_namespace_to_str_path(namespace)
+            if path == world:
+                continue
+            if new_world is not None and new_world in node.__bases__:
+                # Roots inherit from the world node, keep the existing one.
+                bases = tuple(old_world if b is new_world else b
+                              for b in node.__bases__)
+                self.stage._replace_base_classes(node, bases)
+            comp_layer._node_table += [[namespace, node]]
+            comp_layer._nodes_path_as_key[path] = node
+            comp_layer._nodes_node_as_key[node] = path
+            comp_layer.clear_node_child_cache(path)
+            new_paths += [path]
+        comp_layer.sort_node_table()
+        if new_world is not None:
+            child_order = getattr(new_world, INTERNAL_ATTRS.CHILD_ORDER, [])
+            setattr(old_world, INTERNAL_ATTRS.CHILD_ORDER, child_order)
+        # Layer meta data is cheap, match build_stage exactly
+        comp_layer.positions.clear()
+        comp_layer.collapse.clear()
+        comp_layer.collapse.update(self.stage.top_layer.collapse)
+        for layer in reversed(self.stage._sub_layers):
+            comp_layer.positions.update(layer.positions)
+            comp_layer.collapse.update(layer.collapse)
+        changed = set(roots)
+        for path in old_paths + new_paths:
+            changed.add(path)
+            # Implied ancestors may have appeared or vanished
+            changed.update(nxt_path.all_ancestor_paths(path))
+        changed.discard(world)
+        return tuple(changed)
 
     @property
     def target_layer(self):
@@ -629,6 +891,10 @@ class StageModel(QtCore.QObject):
     def muted_layers(self):
         return nxt_layer.get_muted_layers(self.stage._sub_layers)
 
+    @property
+    def active_layers(self):
+        return self._get_comp_sub_layers(self.comp_layer)
+
     def get_is_layer_active(self, layer):
         active_layers = nxt_layer.get_active_layers(self.stage._sub_layers)
         if layer in active_layers:
@@ -1100,12 +1366,14 @@ class StageModel(QtCore.QObject):
         if not node_paths:
             node_paths = self.selection
         node_copy_data = []
+        nodes_data = []
         for node_path in node_paths:
             _layer = layer or self.comp_layer
             node = _layer.lookup(node_path)
             if node:
                 data = get_node_as_dict(self.stage.get_node_spec(node))
                 data = {node_path: data}
+                nodes_data += [data]
                 node_copy_data.append(json.dumps(data, indent=4,
                                                  sort_keys=False))
 
@@ -1115,7 +1383,15 @@ class StageModel(QtCore.QObject):
         output = ',\n'.join(node_copy_data)
         output = '\t' + '\t'.join(output.splitlines(True))
         output = '[\n{}\n]'.format(output)
-        self.clipboard.setText(output)
+        mime_data = QtCore.QMimeData()
+        mime_data.setText(output)
+        try:
+            encoded = clipboard.encode_nodes(nodes_data)
+        except clipboard.ClipboardError as err:
+            logger.debug('Copied nodes as text only. {}'.format(err))
+        else:
+            mime_data.setData(clipboard.MIME_TYPE, QtCore.QByteArray(encoded))
+        self.clipboard.setMimeData(mime_data)
         return True
 
     def copy_attrs_val(self, node_path, attr_names, data_state):
@@ -1135,16 +1411,29 @@ class StageModel(QtCore.QObject):
         return self.copy_nodes(node_paths, cut=True, layer=layer)
 
     def paste_nodes(self, pos=None, parent_path=None, layer=None):
-        node_load_data = []
-        try:
-            node_load_data = clean_json.load(json.loads(self.clipboard.text(),
-                                                        object_hook=clean_json._byteify))
-        except ValueError:
-            pass
-
+        """Paste the nodes copied by `copy_nodes` as a single undoable
+        command, the comp is updated once for all of them.
+
+        :param pos: Position of the first pasted node, each following node
+        is offset from the last.
+        :param parent_path: Parent to paste under, by default the nodes keep
+        their copied hierarchy under a new `_pasted` root.
+        :param layer: Layer to paste to, defaults to the target layer.
+        :return: list of the pasted node paths
+        """
+        layer = layer or self.target_layer
+        if layer.get_muted():
+            logger.error("Cannot paste nodes to muted layer!")
+            return []
+        node_load_data = self.get_clipboard_nodes()
         pos = pos or [0.0, 0.0]
+        node_entries = []
         for node_data in node_load_data:
+            if not isinstance(node_data, dict) or len(node_data) != 1:
+                continue
             node_path, data = list(node_data.items())[0]
+            if not isinstance(data, dict):
+                continue
             name = nxt_path.node_name_from_node_path(node_path)
             if node_path and name:
                 implied_pp = nxt_path.get_parent_path(node_path)
@@ -1157,16 +1446,40 @@ class StageModel(QtCore.QObject):
                 pp = parent_path or implied_pp
                 if '_pasted' not in pp:
                     name += '_pasted'
-                new_node_path = self.add_node(name=name,
-                                              data=data,
-                                              parent_path=pp,
-                                              pos=pos, layer=layer)
-                if new_node_path:
-                    self._set_node_pos(new_node_path, pos, layer=layer)
-                    pos = [pos[0] + 20, pos[1] + 20]
+                node_entries += [(name, data, pp or nxt_path.WORLD, pos)]
+                pos = [pos[0] + 20, pos[1] + 20]
+        if not node_entries:
+            return []
+        cmd = PasteNodes(node_entries=node_entries, model=self,
+                         layer_path=layer.real_path)
+        self.undo_stack.push(cmd)
+        return cmd.new_node_paths
 
-                    self.update_comp_layer()
-                    self.node_added.emit(new_node_path)
+    def get_clipboard_nodes(self):
+        """Get the nodes on the clipboard, read from the compact format
+        copied by nxt if it's there, see `nxt_editor.clipboard`, otherwise
+        from the JSON text.
+
+        :return: list of {node_path: node_data} dicts
+        :rtype: list
+        """
+        mime_data = self.clipboard.mimeData()
+        if mime_data is not None and mime_data.hasFormat(clipboard.MIME_TYPE):
+            try:
+                return clipboard.decode_nodes(
+                    mime_data.data(clipboard.MIME_TYPE))
+            except clipboard.ClipboardError as err:
+                logger.debug('Reading pasted nodes from text. '
+                             '{}'.format(err))
+        node_load_data = []
+        try:
+            node_load_data = clean_json.load(json.loads(self.clipboard.text(),
+                                                        object_hook=clean_json._byteify))
+        except ValueError:
+            pass
+        if not isinstance(node_load_data, list):
+            return []
+        return node_load_data
 
     def get_node_attr_names(self, node_path, layer=None):
         layer = layer or self.target_layer
@@ -1766,7 +2079,8 @@ class StageModel(QtCore.QObject):
                                links=[path])
         node_count = len(node_paths)
         if not node_count:
-            self.nodes_changed.emit(require_checkbox_update)
+            self.dispatcher.queue(MODEL_SIGNALS.NODES_CHANGED,
+                                  require_checkbox_update)
             return
         if value is not None:
             mode = 'Set'
@@ -1881,7 +2195,8 @@ class StageModel(QtCore.QObject):
             parent = nxt_path.get_parent_path(node_path)
             self.set_node_collapse([parent], False, recursive_up=True)
         self.set_selection([node_path])
-        self.frame_items.emit((node_path,))
+        # Queued so the view has the graphics of expanded nodes first
+        self.dispatcher.queue(MODEL_SIGNALS.FRAME_ITEMS, (node_path,))
         self.undo_stack.endMacro()
 
     def set_nodes_pos(self, node_positions, layer=None):
@@ -1922,7 +2237,7 @@ class StageModel(QtCore.QObject):
             layer.positions[node_path] = pos
             self.comp_layer.positions[node_path] = pos
         self.stage._sub_layers[0].positions[node_path] = pos
-        self.node_moved.emit(node_path, pos)
+        self.dispatcher.queue(MODEL_SIGNALS.NODE_MOVED, node_path, pos)
 
     def offset_nodes_pos(self, node_paths, offset, layer=None):
         """Offset the list of node paths by the given offset value. Respects
@@ -1979,7 +2294,7 @@ class StageModel(QtCore.QObject):
         cur_pos = self.stage._sub_layers[0].positions.get(node_path, [0, 0])
         new_pos = [c1 + c2 for c1, c2 in zip(cur_pos, offset)]
         self.stage._sub_layers[0].positions[node_path] = new_pos
-        self.node_moved.emit(node_path, new_pos)
+        self.dispatcher.queue(MODEL_SIGNALS.NODE_MOVED, node_path, new_pos)
 
     def get_pos_offset(self, node_path, offset, layer):
         """Given a node path and an offset (x,y) return the new absolute
@@ -2076,8 +2391,7 @@ class StageModel(QtCore.QObject):
 
     def get_is_node_breakpoint(self, node_path, layer=None):
         layer = layer or self.top_layer
-        layer_breaks = user_dir.breakpoints.get(layer.real_path, [])
-        return node_path in layer_breaks
+        return user_dir.breakpoint_index.contains(layer.real_path, node_path)
 
     def get_node_is_proxy(self, node_path):
         node = self.comp_layer.lookup(node_path)
@@ -2143,12 +2457,10 @@ class StageModel(QtCore.QObject):
             return
         node_path = str(node_path)
         layer_path = str(layer.real_path)
-        layer_breaks = user_dir.breakpoints.get(layer_path, [])
-        if node_path in layer_breaks:
+        if not user_dir.breakpoint_index.add(layer_path, [node_path]):
             # no need to re-write existing data to pref
             return
-        layer_breaks.append(node_path)
-        user_dir.breakpoints[layer_path] = layer_breaks
+        layer_breaks = user_dir.breakpoint_index.get(layer_path)
         self.breaks_changed.emit(layer_breaks)
 
     def _remove_breakpoint(self, node_path, layer):
@@ -2159,19 +2471,13 @@ class StageModel(QtCore.QObject):
         :return: None
         """
         layer_path = layer.real_path
-        layer_breaks = user_dir.breakpoints.get(layer_path)
-        if not layer_breaks:
-            return
         if not node_path:
-            user_dir.breakpoints.pop(layer_path)
+            user_dir.breakpoint_index.clear(layer_path)
             return
-        try:
-            layer_breaks.remove(node_path)
-        except ValueError:
-            # Can return without the below save in this case. If the node
-            # path is not present, it's already "removed"
+        if not user_dir.breakpoint_index.remove(layer_path, [node_path]):
+            # If the node path is not present, it's already "removed"
             return
-        user_dir.breakpoints[layer_path] = layer_breaks
+        layer_breaks = user_dir.breakpoint_index.get(layer_path)
         self.breaks_changed.emit(layer_breaks)
 
     def toggle_skippoints(self, node_paths, layer_path=None):
@@ -2269,8 +2575,7 @@ class StageModel(QtCore.QObject):
         """
         if not layer_path:
             layer_path = self.top_layer.real_path
-        layer_skips = user_dir.skippoints.get(layer_path, [])
-        return node_path in layer_skips
+        return user_dir.skippoint_index.contains(layer_path, node_path)
 
     def _add_skippoint(self, node_path, layer_path):
         """Internal(not undo-able) method to make a node a skip point.
@@ -2285,12 +2590,9 @@ class StageModel(QtCore.QObject):
             raise ValueError("Must provide node and layer path.")
         node_path = str(node_path)
         layer_path = str(layer_path)
-        layer_skips = user_dir.skippoints.get(layer_path, [])
-        if node_path in layer_skips:
+        if not user_dir.skippoint_index.add(layer_path, [node_path]):
             # no need to re-write existing data to pref
             return
-        layer_skips.append(node_path)
-        user_dir.skippoints[layer_path] = layer_skips
         if layer_path == self.top_layer.real_path:
             self.skips_changed.emit([])
 
@@ -2307,18 +2609,11 @@ class StageModel(QtCore.QObject):
             raise ValueError("Must provide node and layer path.")
         node_path = str(node_path)
         layer_path = str(layer_path)
-        layer_skips = user_dir.skippoints.get(layer_path, [])
-        if not layer_skips:
-            return
-        try:
-            layer_skips.remove(node_path)
-        except ValueError:
-            # Can return without the below save in this case. If the node
-            # path is not present, it's already "removed"
+        if not user_dir.skippoint_index.remove(layer_path, [node_path]):
+            # If the node path is not present, it's already "removed"
             if layer_path == self.top_layer.real_path:
                 self.skips_changed.emit([])
             return
-        user_dir.skippoints[layer_path] = layer_skips
         if layer_path == self.top_layer.real_path:
             self.skips_changed.emit([])
 
@@ -2857,6 +3152,10 @@ class StageModel(QtCore.QObject):
                                                 socket.SO_REUSEADDR, 1)
                 cmd = 'import nxt.remote.nxt_socket'
                 self._send_cmd(cmd)
+                self._send_cmd('import nxt_editor.remote_cache')
+                self._send_cmd('import nxt_editor.remote_comp')
+                self._send_cmd('import nxt_editor.ipc')
+                self.remote_comp_sync.reset()
                 cmd = '{MODEL} = nxt.remote.nxt_socket.SocketClientModel(None)'
                 cmd = cmd.format(MODEL=nxt_socket.MODEL_VAR)
                 self._send_cmd(cmd)
@@ -2889,16 +3188,26 @@ class StageModel(QtCore.QObject):
         if not self.com_port_server.isRunning():
             listening = False
             logger.socket('Starting com sever...')
+            try:
+                self.com_port_server.listen()
+            except socket.error as e:
+                logger.error('Failed to bind com port: {}'.format(e))
+                self.processing.emit(False)
+                self.destroy_cmd_port.emit()
+                return False
             self.com_port_server.start()
             logger.socket('Telling remote to connect to com port...')
             self._send_cmd('{MODEL}.open()'.format(MODEL=nxt_socket.MODEL_VAR))
-            i = 0
-            while i < 20:
-                if self.com_port_server.listening:
-                    listening = True
-                    break
-                time.sleep(.5)
-                i += 1
+            cmd = 'nxt_editor.ipc.set_no_delay({MODEL}.server)'
+            self._send_cmd(cmd.format(MODEL=nxt_socket.MODEL_VAR))
+            # Sleep in an event loop until the remote connects, or we give up.
+            loop = QtCore.QEventLoop()
+            self.com_port_server.listening_changed.connect(loop.quit)
+            QtCore.QTimer.singleShot(CONNECT_TIMEOUT * 1000, loop.quit)
+            if not self.com_port_server.listening:
+                loop.exec_()
+            self.com_port_server.listening_changed.disconnect(loop.quit)
+            listening = self.com_port_server.listening
         if not listening:
             self.process_events()
             self.destroy_cmd_port.emit()
@@ -2912,49 +3221,98 @@ class StageModel(QtCore.QObject):
     def _disconnect_cmd_port(self):
         """Attempt to gracefully shutdown the command port and the com port
         listener."""
+        self.remote_requests.cancel_all('Command port disconnected')
         if self.cmd_port_client:
             self.cmd_port_client.shutdown(socket.SHUT_WR)
             self.cmd_port_client.close()
             self.cmd_port_client = None
-        if self.com_port_server.client:
-            self.com_port_server.client.shutdown(socket.SHUT_RDWR)
-            self.com_port_server.client.close()
+        # The listener thread drops its client when the connection closes,
+        # hold our own reference.
+        client = self.com_port_server.client
+        if client:
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass  # Already closed by the remote
+            client.close()
             self.com_port_server.client = None
         self.com_port_server.stop()
-        if self.com_port_server.isRunning():
+        # Closing the client ends the listener's loop, only terminate it if
+        # it doesn't exit on its own. Terminating a thread that is running
+        # Python can corrupt the interpreter.
+        if not self.com_port_server.wait(1000):
             self.com_port_server.terminate()
 
-    def _send_cmd(self, cmd, wait=False):
-        """Send command to the socket client. If wait is True we block the
-        main thread until the server has received the command and responded.
-        WARNING: Only set wait to True if the command you are sending is
-        handled by nxt_socket.IPCWait context manager. Otherwise the
-        application will be stuck in an infinite loop.
+    def _send_cmd(self, cmd, wait=False, timeout=None):
+        """Send command to the socket client. If wait is True the command must
+        be an expression, it is sent as a request and we wait until the
+        client replies, without blocking the main thread's event loop.
         :param cmd: string of command to be run by the client
         :param wait: bool
-        :return: None
+        :param timeout: Seconds to wait for a reply, None waits forever
+        :return: RemoteRequest if wait is True, else None
         """
-        print('sending {}'.format(cmd))
-        if not self.cmd_port_client:
-            logger.error('No socket server connected!')
-        byte_data = bytes(str(cmd) + '\n')
-        self._wait_for_remote = wait
+        logger.debug('sending {}'.format(cmd))
         if wait:
-            with IPCWait(self):
-                self.cmd_port_client.sendall(byte_data)
-        else:
-            self.cmd_port_client.sendall(byte_data)
+            request = self.remote_requests.send(cmd, timeout)
+            self.processing.emit(True)
+            self.remote_requests.wait(request)
+            self.processing.emit(False)
+            if request.error:
+                logger.error('Remote command failed: {}\n'
+                             '{}'.format(cmd, request.error))
+            return request
+        try:
+            self._send_line(cmd)
+        except ConnectionError as err:
+            logger.error(str(err))
+
+    def _send_line(self, line):
+        """Send a line of code to the socket client.
+        :param line: string of code to be run by the client
+        :raises ConnectionError: If no client is connected, so a request
+        sent through `remote_requests` fails rather than waiting forever.
+        """
+        if not self.cmd_port_client:
+            raise ConnectionError('No socket server connected!')
+        self.cmd_port_client.sendall((str(line) + '\n').encode('utf-8'))
+
+    @QtCore.Slot(object)
+    def _record_remote_comp_changes(self, stash):
+        layer_nodes = stash.command_delta.layers
+        self.remote_comp_sync.add_touched(layer_nodes)
 
     def update_remote_comp(self):
-        """Save editor state to a temp location and command the socket client
-        to load that data.
+        """Send the socket client the nodes changed since its last update.
+        If the client's comp can't be patched the editor state is saved to a
+        temp location and the client is commanded to load that data.
         :return: None
         """
+        s, e = self.comp_layer._layer_range
+        layers = self.stage._sub_layers[s:e]
+        delta = self.remote_comp_sync.get_delta(layers)
+        if delta is not None:
+            logger.debug('Sending comp delta to remote...')
+            self._remote_comp_resync = False
+            cmd = 'nxt_editor.remote_comp.apply_comp_delta({MODEL}, {DELTA!r})'
+            cmd = cmd.format(MODEL=nxt_socket.MODEL_VAR,
+                             DELTA=json.dumps(delta))
+            request = self._send_cmd(cmd, wait=True, timeout=DELTA_TIMEOUT)
+            if request.timed_out:
+                # The remote still applies the delta once it is free, or
+                # replies with a resync on the next update if it can't.
+                logger.warning('Remote is busy, comp update still pending.')
+                return
+            if request.succeeded and not self._remote_comp_resync:
+                return
+            logger.debug('Remote comp is out of sync.')
         logger.debug('Dumping editor to temp file...')
         graph_path = self.stage.save_to_temp(self.comp_layer)
+        chain = self.remote_comp_sync.record_full(layers)
         logger.debug('Updating remote...')
-        cmd = '{MODEL}.load("{GRAPH}")'.format(GRAPH=graph_path,
-                                               MODEL=nxt_socket.MODEL_VAR)
+        cmd = 'nxt_editor.remote_comp.load_comp({MODEL}, "{GRAPH}", "{CHAIN}")'
+        cmd = cmd.format(GRAPH=graph_path, MODEL=nxt_socket.MODEL_VAR,
+                         CHAIN=chain)
         self._send_cmd(cmd)
 
     def execute_nodes(self, node_paths, rt_layer=None, safe_exec=True):
@@ -2974,21 +3332,51 @@ class StageModel(QtCore.QObject):
         self.resume_build()
         return rt_layer
 
+    @property
+    def exec_worker(self):
+        """The long lived worker thread nodes are executed on in standalone.
+        Started the first time it is needed.
+        """
+        if self._exec_worker is None:
+            self._exec_worker = ExecuteNodeWorker()
+            self._exec_worker.start()
+        return self._exec_worker
+
+    def _stop_exec_worker(self):
+        if self._exec_worker is None:
+            return
+        self._exec_worker.stop()
+        self._exec_worker = None
+
     def _execute_node(self, node_path):
-        t = ExecuteNodeThread(self, node_path)
+        job = ExecuteNodeJob(self, node_path)
         if self.is_standalone:
             self.processing.emit(True)
-            t.start()
-            while not t.isFinished():
-                self.process_events()
+            # The local event loop keeps the UI responsive and sleeps until
+            # the worker's (queued) finished signal quits it.
+            loop = QtCore.QEventLoop()
+
+            def on_job_finished(finished_job):
+                # A nested build started while the loop spins finishes
+                # its own jobs, which must not end this wait.
+                if finished_job is job:
+                    loop.quit()
+            worker = self.exec_worker
+            worker.job_finished.connect(on_job_finished)
+            worker.submit(job)
+            while not job.done.is_set():
+                loop.exec_()
+            worker.job_finished.disconnect(on_job_finished)
             self.processing.emit(False)
         else:
             # DCCs aren't thread safe, we need to get attached working so we
             # can know we're in a thread safe environment.
-            t._run()
+            job.run()
             self.process_events()
-        if t.raised_exception:
-            if isinstance(t.raised_exception, InvalidNodeError):
+        if self.build_profile is not None:
+            self.build_profile.add(job.timer)
+        if job.raised_exception:
+            if isinstance(job.raised_exception, InvalidNodeError):
                 details = ("To resolve this try navigating to "
                            "'Execute > Clear cache'. \n\n"
                            "This error is raised when layers"
@@ -2996,10 +3384,10 @@ class StageModel(QtCore.QObject):
                            "is called without clearing the cache.")
                 NxtWarningDialog.show_message(text='NXT attempted to execute '
                                                    'an invalid node!',
-                                              info=str(t.raised_exception),
+                                              info=str(job.raised_exception),
                                               details=details)
                 raise BuildStop
-            raise t.raised_exception
+            raise job.raised_exception
 
     def execute_stage(self, start=None):
         self.about_to_execute.emit(True)
@@ -3018,6 +3406,34 @@ class StageModel(QtCore.QObject):
     def load_cache_dict(self, file_data):
         self._load_cache(file_data=file_data)
 
+    def load_cache_delta(self, delta):
+        """Merge a cache delta sent by the remote into the runtime cache
+        layer. See `remote_cache` for the protocol.
+
+        :param delta: Delta message dict
+        """
+        keys = remote_cache.DELTA_KEYS
+        try:
+            reset = delta[keys.RESET]
+            if not reset and delta[keys.BASE_SEQ] != self._remote_cache_seq:
+                logger.debug('Remote cache delta is out of order, the next '
+                             'sync will be a full one.')
+                self._remote_cache_seq = None
+                return
+            if not self.current_rt_layer:
+                self.current_rt_layer = nxt_layer.CompLayer()
+            cache = None if reset else self.current_rt_layer.cache_layer
+            merged = remote_cache.merge_cache_delta(cache, delta)
+            seq = delta[keys.SEQ]
+        except Exception:
+            logger.exception('Failed to load cache delta, the next sync will '
+                             'be a full one.')
+            self._remote_cache_seq = None
+            return
+        self.current_rt_layer.cache_layer = merged
+        self._remote_cache_seq = seq
+        self.data_state_changed.emit(True)
+
     def load_cache_file(self, filepath=None):
         if not filepath:
             filepath = self.cache_filepath
@@ -3079,6 +3495,8 @@ class StageModel(QtCore.QObject):
         self.build_start_time = time.time()
         self.build_paused_time = .0
         self.last_step_time = .0
+        self.build_profile = BuildProfile()
+        self.build_profile_changed.emit(self.build_profile)
 
         self.current_build_order = node_paths
         self.build_changed.emit(node_paths)
@@ -3087,6 +3505,7 @@ class StageModel(QtCore.QObject):
             # TODO: Only run this if we actually have to
             self.update_remote_comp()
             self.current_rt_layer = self.comp_layer
+            self._remote_cache_seq = None
         elif rt_layer:
             self.current_rt_layer = rt_layer
         else:
@@ -3153,7 +3572,7 @@ class StageModel(QtCore.QObject):
             return
         next_node = self.get_build_focus()
         if self.framing_behavior == EXEC_FRAMING.STEPPING:
-            self.frame_items.emit([next_node])
+            self.dispatcher.queue(MODEL_SIGNALS.FRAME_ITEMS, (next_node,))
         self.data_state_changed.emit(True)
         self.last_step_time = time.time()
         if self._use_cmd_port:
@@ -3176,8 +3595,8 @@ class StageModel(QtCore.QObject):
         start = self.last_built_idx+1
         stop = len(self.current_build_order)
 
-        breaks = user_dir.breakpoints.get(self.top_layer.real_path, [])[:]
-        skips = user_dir.skippoints.get(self.top_layer.real_path, [])[:]
+        breaks = user_dir.breakpoint_index.get_set(self.top_layer.real_path)
+        skips = user_dir.skippoint_index.get_set(self.top_layer.real_path)
         first_path = self.current_build_order[start]
         skip_pref_key = user_dir.USER_PREF.SKIP_INITIAL_BREAK
         skip_first_break = user_dir.user_prefs.get(skip_pref_key, True)
@@ -3203,7 +3622,8 @@ class StageModel(QtCore.QObject):
                 break_msg = " !! Breakpoint hit at: {}".format(node_path)
                 logger.execinfo(break_msg, links=[node_path])
                 self.last_hit_break = node_path
-                self.frame_items.emit([node_path])
+                self.dispatcher.queue(MODEL_SIGNALS.FRAME_ITEMS,
+                                      (node_path,))
                 self._set_build_paused(True)
                 return
             self.last_built_idx = i
@@ -3237,10 +3657,13 @@ class StageModel(QtCore.QObject):
             return
         self._build_paused = paused
         self.build_paused_changed.emit(paused)
+        if paused:
+            self.build_profile_changed.emit(self.build_profile)
         if paused and focus:
             curr_focus = self.get_build_focus()
             if curr_focus:
-                self.frame_items.emit([curr_focus])
+                self.dispatcher.queue(MODEL_SIGNALS.FRAME_ITEMS,
+                                      (curr_focus,))
         if self._use_cmd_port:
             if paused:
                 self.get_remote_cache()
@@ -3261,6 +3684,8 @@ class StageModel(QtCore.QObject):
             self.finish_build()
         else:
             self._build_should_stop = True
+            # Stop waiting on a remote node, it can't be interrupted.
+            self.remote_requests.cancel_all('Build stopped')
 
     def _set_executing(self, executing):
         if not executing:
@@ -3271,10 +3696,16 @@ class StageModel(QtCore.QObject):
         self.executing_changed.emit(self._executing)
 
     def finish_build(self, verbose=True):
-        build_seconds = round(time.time() - self.build_start_time)
+        build_seconds = round(time.time() - self.build_start_time, 2)
         if verbose:
             logger.execinfo("Build exec time: "
                             "{} second(s).".format(build_seconds))
+            if self.build_profile:
+                hot_path, hot_time = self.build_profile.get_hot_nodes()[0]
+                logger.execinfo("Slowest node: {} ({:.3f} second(s))."
+                                "".format(hot_path, hot_time),
+                                links=[hot_path])
+        self.build_profile_changed.emit(self.build_profile)
         self.last_built_idx = None
         self.last_hit_break = None
         self.current_build_order = None
@@ -3295,27 +3726,57 @@ class StageModel(QtCore.QObject):
             self._send_cmd('cmds.refresh()')
 
     def get_remote_cache(self):
-        """Tells the remote client to send its cache data over the socket.
-        If successful self.load_cache() will be called via the com port
-        listener thread.
+        """Tells the remote client to send the cache data created since the
+        last sync over the socket. If successful self.load_cache_delta() will
+        be called via the com port listener thread.
         :return: None
         """
-        cmd = '{MODEL}.get_cache()'.format(MODEL=nxt_socket.MODEL_VAR)
-        self._send_cmd(cmd, wait=True)
+        since = self._remote_cache_seq
+        if not self.current_rt_layer:
+            since = None
+        cmd = 'nxt_editor.remote_cache.send_cache_delta({MODEL}, {SINCE})'
+        cmd = cmd.format(MODEL=nxt_socket.MODEL_VAR, SINCE=since)
+        request = self._send_cmd(cmd, wait=True, timeout=DELTA_TIMEOUT)
+        if request.timed_out:
+            # The delta is still merged when the remote gets to it.
+            logger.warning('Remote is busy, cache update still pending.')
 
     def clear_cache(self):
         self.finish_build()
         self.current_rt_layer = None
+        self._remote_cache_seq = None
         self.data_state_changed.emit(True)
 
+    def set_layer_clean(self, layer_path):
+        """Record the given layer's content as matching its file. Called when
+        a layer is loaded or saved.
+
+        :param layer_path: Real path of the layer
+        """
+        layer = self.lookup_layer(layer_path)
+        if not layer:
+            return
+        self.saved_layer_hashes[layer_path] = get_layer_hash(layer)
+        self.undo_stack.set_layer_clean(layer_path)
+
     def get_unsaved_changes(self, layers=(), deep_check=False):
+        """Get the layers with unsaved changes.
+
+        :param layers: Layers to check, defaults to every layer of the stage
+        :param deep_check: If True the content of each layer that may have
+        changed is compared to its last saved content. Otherwise every layer
+        a command changed is considered unsaved, even if the changes were
+        reverted by hand.
+        :return: list of unsaved layers
+        :rtype: list
+        """
         self.processing.emit(True)
         layers = layers or self.stage._sub_layers
         unsaved_layers = []
         if deep_check:
+            touched = self.undo_stack.get_touched_layer_paths()
+            touched.update(self.effected_layers)
             for layer in layers:
-                logger.info("Checking for unsaved "
-                            "changes in: \"{}\"".format(layer.real_path))
                 if not os.path.isfile(str(layer.real_path)):
                     world_node = layer.lookup(nxt_path.WORLD)
                     other_nodes = layer.descendants()
@@ -3327,8 +3788,16 @@ class StageModel(QtCore.QObject):
                             and not refs):
                         # This is an empty untitled layer so don't worry about it
                         continue
-                    unsaved_layers.add(layer)
+                    unsaved_layers.append(layer)
+                    continue
+                saved_hash = self.saved_layer_hashes.get(layer.real_path)
+                if saved_hash is not None:
+                    if (layer.real_path in touched and
+                            get_layer_hash(layer) != saved_hash):
+                        unsaved_layers.append(layer)
                     continue
+                logger.info("Checking for unsaved "
+                            "changes in: \"{}\"".format(layer.real_path))
                 # If the minor version number on disc is the same as the current
                 # version we can disregard the bug fix number as it will not
                 # effect the save file.
@@ -3340,7 +3809,7 @@ class StageModel(QtCore.QObject):
                 live_data = json.dumps(live_data, indent=4, sort_keys=True)
                 disc_data = json.dumps(disc_data, indent=4, sort_keys=True)
                 if live_data != disc_data:
-                    unsaved_layers.add(layer)
+                    unsaved_layers.append(layer)
         elif self.undo_stack.count():
             for layer_path in self.effected_layers:
                 layer = self.lookup_layer(layer_path)
@@ -3354,7 +3823,255 @@ class StageModel(QtCore.QObject):
         QtCore.QCoreApplication.processEvents()
 
 
+class EMISSION_KEYS(object):
+    LABEL = 'label'
+    QUEUED = 'queued'
+    EMITTED = 'emitted'
+
+
+class SignalDispatcher(QtCore.QObject):
+    """Coalesces the model's change signals. Emissions queued while held,
+    which the undo stack does for each push, undo, redo and macro, are
+    merged and emitted once the outermost hold is released. Emissions queued
+    outside a hold are merged until the next event loop tick.
+
+    Path signals emit the ordered union of their queued paths, an empty
+    `comp_layer_changed` (everything is dirty) absorbs the rest. Moves emit
+    the last position per node, the selection and framing only their last
+    value.
+
+    How many emissions were queued and emitted for each flush is kept in
+    `emission_counts`, see EMISSION_KEYS.
+
+    `generation` is incremented as soon as a change to the comp is queued,
+    caches of comp data can store it and compare it to tell if they're
+    stale.
+    """
+    HISTORY_SIZE = 100
+    COMP_SIGNALS = (MODEL_SIGNALS.COMP_LAYER_CHANGED,
+                    MODEL_SIGNALS.NODES_CHANGED,
+                    MODEL_SIGNALS.ATTRS_CHANGED)
+
+    def __init__(self, model):
+        super(SignalDispatcher, self).__init__(model)
+        self.model = model
+        self.emission_counts = collections.deque(maxlen=self.HISTORY_SIZE)
+        self.generation = 0
+        self._holds = 0
+        self._pending = {}
+        self._queued_counts = {}
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self.flush)
+
+    @property
+    def held(self):
+        return self._holds > 0
+
+    def queue(self, signal_name, *args):
+        """Queue an emission of the model signal `signal_name`.
+
+        :param signal_name: MODEL_SIGNALS name
+        :param args: Signal arguments
+        :return: None
+        """
+        if signal_name not in MODEL_SIGNALS.ORDER:
+            raise ValueError('{} is not a coalesced model '
+                             'signal'.format(signal_name))
+        if signal_name in self.COMP_SIGNALS:
+            self.generation += 1
+        count = self._queued_counts.get(signal_name, 0)
+        self._queued_counts[signal_name] = count + 1
+        pending = self._pending.get(signal_name)
+        if signal_name in MODEL_SIGNALS.LAST_VALUE:
+            pending = args[0]
+        elif signal_name == MODEL_SIGNALS.NODE_MOVED:
+            node_path, pos = args
+            pending = pending or collections.OrderedDict()
+            pending.pop(node_path, None)
+            pending[node_path] = pos
+        else:
+            empty_is_all = signal_name == MODEL_SIGNALS.COMP_LAYER_CHANGED
+            pending = merge_paths(pending, args[0], empty_is_all)
+        self._pending[signal_name] = pending
+        if not self.held and not self._timer.isActive():
+            self._timer.start()
+
+    def hold(self):
+        self._holds += 1
+
+    def release(self, label=None):
+        """Release a hold, the outermost release flushes.
+
+        :param label: Description of what was held for, such as the text of
+        a command, used for the emission counts.
+        :return: None
+        """
+        self._holds = max(0, self._holds - 1)
+        if not self.held:
+            self.flush(label)
+
+    def flush(self, label=None):
+        """Emit everything queued.
+
+        :param label: Description of the emissions for the emission counts
+        :return: None
+        """
+        self._timer.stop()
+        if not self._queued_counts:
+            return
+        pending = self._pending
+        queued_counts = self._queued_counts
+        self._pending = {}
+        self._queued_counts = {}
+        emitted_counts = {}
+        for signal_name in MODEL_SIGNALS.ORDER:
+            if signal_name not in pending:
+                continue
+            value = pending[signal_name]
+            signal = getattr(self.model, signal_name)
+            if signal_name == MODEL_SIGNALS.NODE_MOVED:
+                for node_path, pos in value.items():
+                    signal.emit(node_path, pos)
+                emitted_counts[signal_name] = len(value)
+                continue
+            signal.emit(value)
+            emitted_counts[signal_name] = 1
+        queued = sum(queued_counts.values())
+        emitted = sum(emitted_counts.values())
+        self.emission_counts.append({EMISSION_KEYS.LABEL: label,
+                                     EMISSION_KEYS.QUEUED: queued_counts,
+                                     EMISSION_KEYS.EMITTED: emitted_counts})
+        logger.debug('Emitted {} of {} queued model signal(s) for '
+                     '{}'.format(emitted, queued, label or 'event loop tick'))
+
+
+def merge_paths(pending, paths, empty_is_all=False):
+    """Merge path signal arguments.
+
+    :param pending: Tuple of already queued paths, or None
+    :param paths: Iterable of paths
+    :param empty_is_all: If True empty paths mean every path, as for
+    `comp_layer_changed`
+    :return: tuple
+    """
+    if pending is None:
+        return tuple(paths)
+    if empty_is_all and (not pending or not paths):
+        return ()
+    seen = set(pending)
+    merged = list(pending)
+    for path in paths:
+        if path not in seen:
+            seen.add(path)
+            merged += [path]
+    return tuple(merged)
+
+
 class NxtUndoStack(QtWidgets.QUndoStack):
+    """Besides the stack's own clean index, a clean index is kept per layer
+    so unsaved layers can be found from the commands between each layer's
+    clean index and the current index.
+    The model's signals are held while a command runs, see SignalDispatcher,
+    and the changes of each outermost push, undo, redo or macro are collected
+    by a CompLayerStash.
+    """
+    def __init__(self, parent=None):
+        super(NxtUndoStack, self).__init__(parent)
+        # {layer real path: index, None if the clean state was truncated}
+        self.layer_clean_indexes = {}
+        self.dispatcher = None  # SignalDispatcher
+        self._depth = 0
+        self._stash = None
+
+    def set_layer_clean(self, layer_path):
+        self.layer_clean_indexes[layer_path] = self.index()
+
+    def _truncate_clean_indexes(self):
+        """Pushing drops the commands after the current index, layers whose
+        clean index was among them can't get back to their clean state.
+        """
+        index = self.index()
+        for layer_path, clean_idx in self.layer_clean_indexes.items():
+            if clean_idx is not None and clean_idx > index:
+                self.layer_clean_indexes[layer_path] = None
+
+    def get_touched_layer_paths(self):
+        """Get the real paths of the layers that may differ from their clean
+        state, the layers any command between their clean index and the
+        current index changed. Layers never marked clean aren't included.
+
+        :rtype: set
+        """
+        index = self.index()
+        touched = set()
+        paths_by_command = {}
+        for layer_path, clean_idx in self.layer_clean_indexes.items():
+            if clean_idx is None:
+                touched.add(layer_path)
+                continue
+            for i in range(min(clean_idx, index), max(clean_idx, index)):
+                layer_paths = paths_by_command.get(i)
+                if layer_paths is None:
+                    layer_paths = get_command_layer_paths(self.command(i))
+                    paths_by_command[i] = layer_paths
+                if layer_path in layer_paths:
+                    touched.add(layer_path)
+                    break
+        return touched
+
+    def _hold_signals(self):
+        if not self.dispatcher:
+            return
+        if not self._depth:
+            self._stash = CompLayerStash(self.dispatcher.model)
+            self._stash.__enter__()
+        self._depth += 1
+        self.dispatcher.hold()
+
+    def _release_signals(self, label):
+        if not self.dispatcher:
+            return
+        self._depth = max(0, self._depth - 1)
+        stash = self._stash
+        if not self._depth and stash:
+            self._stash = None
+            try:
+                stash.__exit__(None, None, None)
+            finally:
+                self.dispatcher.release(label)
+            return
+        self.dispatcher.release(label)
+
+    def beginMacro(self, text):
+        self._truncate_clean_indexes()
+        self._hold_signals()
+        try:
+            super(NxtUndoStack, self).beginMacro(text)
+        except Exception:
+            self._release_signals(text)
+            raise
+
+    def endMacro(self):
+        try:
+            super(NxtUndoStack, self).endMacro()
+        finally:
+            self._release_signals(self.text(self.index() - 1))
+
+    def undo(self):
+        self._hold_signals()
+        try:
+            super(NxtUndoStack, self).undo()
+        finally:
+            self._release_signals('Undo ' + self.text(self.index()))
+
+    def redo(self):
+        self._hold_signals()
+        try:
+            super(NxtUndoStack, self).redo()
+        finally:
+            self._release_signals('Redo ' + self.text(self.index() - 1))
 
     def push(self, command):
         """Simple overload of push method, checks that the target layer of the given command's model is *not* locked.
@@ -3369,7 +4086,48 @@ class NxtUndoStack(QtWidgets.QUndoStack):
             logger.warning('The target layer is locked!')
             model.request_ding.emit()
             return
-        super(NxtUndoStack, self).push(command)
+        self._truncate_clean_indexes()
+        self._hold_signals()
+        try:
+            super(NxtUndoStack, self).push(command)
+        finally:
+            self._release_signals(command.text())
+
+
+def get_command_layer_paths(command):
+    """Get the real paths of the layers a command, or any of its children if
+    it is a macro, changed.
+
+    :param command: QUndoCommand
+    :rtype: set
+    """
+    layer_paths = set(getattr(command, 'layer_paths', ()))
+    for i in range(command.childCount()):
+        layer_paths.update(get_command_layer_paths(command.child(i)))
+    return layer_paths
+
+
+def get_command_deltas(command):
+    """Get the deltas of a command, followed by those of its children in
+    order if it is a macro.
+
+    :param command: QUndoCommand
+    :rtype: list
+    """
+    delta = getattr(command, 'delta', None)
+    deltas = [delta] if delta is not None else []
+    for i in range(command.childCount()):
+        deltas += get_command_deltas(command.child(i))
+    return deltas
+
+
+def get_layer_hash(layer):
+    """Content hash of a layer's save data.
+
+    :param layer: SpecLayer
+    :rtype: str
+    """
+    return remote_comp.hash_data(layer.get_save_data())
 
 
 class UnsavedLayerSet(set):
@@ -3448,38 +4206,148 @@ def compare_data(pre_data, post_data):
     return changes
 
 
-class IPCWait(object):
-    ANIMATION = ["\\", "--", "/", "|"]
+class RemoteRequest(object):
+    """A command sent over the cmd port whose reply is waited for. Created by
+    `RemoteRequests.send`.
+    """
+    def __init__(self, request_id, cmd, timeout=None):
+        self.id = request_id
+        self.cmd = cmd
+        self.timeout = timeout
+        self.result = None
+        self.error = None
+        self.cancelled = False
+        self.timed_out = False
+        self.done = threading.Event()
 
-    def __init__(self, model):
+    @property
+    def succeeded(self):
+        return self.done.is_set() and self.error is None
+
+
+class RemoteRequests(QtCore.QObject):
+    """Tracks the commands sent to the remote that expect a reply. Each gets
+    an id the remote echoes back in an ipc.REPLY message, which the com port
+    listener thread hands to `resolve`.
+    Waiting sleeps on the request rather than spinning, on the main thread a
+    local event loop keeps the UI responsive.
+    """
+    request_finished = QtCore.Signal(object)  # RemoteRequest
+
+    def __init__(self, send_line):
         """
-        :param model: StageModel object
+        :param send_line: Callable that sends a line of code to the remote
         """
-        self.model = model
+        super(RemoteRequests, self).__init__()
+        self.send_line = send_line
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
 
-    def __enter__(self):
-        self.model.processing.emit(True)
-        return self
+    @property
+    def pending(self):
+        with self._lock:
+            return list(self._pending.values())
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        logger.socket('Waiting on remote...')
-        c = 0
-        while self.model._wait_for_remote:
-            self.model.process_events()
-            sys.stdout.write('\rWaiting for remote  ' + self.ANIMATION[c % -4])
-            sys.stdout.flush()
-            c += 1
-        sys.stdout.write('\r ')
-        sys.stdout.flush()
-        self.model.processing.emit(False)
+    def send(self, cmd, timeout=None):
+        """Send an expression to be run by the remote without waiting for it.
+
+        :param cmd: Expression for the remote to evaluate
+        :param timeout: Seconds `wait` gives up after, None waits forever
+        :rtype: RemoteRequest
+        """
+        request = RemoteRequest(str(next(self._ids)), cmd, timeout)
+        with self._lock:
+            self._pending[request.id] = request
+        line = 'nxt_editor.ipc.run_request({MODEL}, "{ID}", lambda: {CMD})'
+        line = line.format(MODEL=nxt_socket.MODEL_VAR, ID=request.id, CMD=cmd)
+        try:
+            self.send_line(line)
+        except Exception as err:
+            self._finish(request.id, error=str(err))
+        return request
+
+    def _finish(self, request_id, result=None, error=None, cancelled=False):
+        with self._lock:
+            request = self._pending.pop(request_id, None)
+        if request is None:
+            # Late reply for a request that timed out or was cancelled
+            return
+        request.result = result
+        request.error = error
+        request.cancelled = cancelled
+        request.done.set()
+        self.request_finished.emit(request)
+
+    def resolve(self, reply):
+        """Finish the request a reply is for. Safe to call from any thread.
+
+        :param reply: ipc.REPLY message dict
+        """
+        self._finish(reply[ipc.REPLY_KEYS.ID],
+                     result=reply[ipc.REPLY_KEYS.RESULT],
+                     error=reply[ipc.REPLY_KEYS.ERROR])
+
+    def cancel(self, request, reason='Cancelled'):
+        """Stop waiting for a request, any reply that still comes is ignored.
+        The remote can't be interrupted, the command keeps running there.
+        """
+        self._finish(request.id, error=reason, cancelled=True)
+
+    def cancel_all(self, reason='Cancelled'):
+        for request in self.pending:
+            self.cancel(request, reason)
+
+    def wait(self, request, timeout=None):
+        """Block until the request is finished or times out. A request that
+        times out is cancelled.
+
+        :param request: RemoteRequest
+        :param timeout: Seconds, defaults to the request's timeout
+        :return: The request
+        :rtype: RemoteRequest
+        """
+        if timeout is None:
+            timeout = request.timeout
+        app = QtWidgets.QApplication.instance()
+        on_main_thread = (app is not None and
+                          QtCore.QThread.currentThread() is app.thread())
+        if not on_main_thread:
+            request.done.wait(timeout)
+        elif not request.done.is_set():
+            loop = QtCore.QEventLoop()
+            self.request_finished.connect(loop.quit)
+            timer = None
+            if timeout is not None:
+                timer = QtCore.QTimer()
+                timer.setSingleShot(True)
+                timer.timeout.connect(loop.quit)
+                timer.start(int(timeout * 1000))
+            while not request.done.is_set():
+                if timer and not timer.isActive():
+                    break
+                loop.exec_()
+            self.request_finished.disconnect(loop.quit)
+        if not request.done.is_set():
+            request.timed_out = True
+            msg = 'Timed out after {}s waiting for remote: {}'
+            self.cancel(request, msg.format(timeout, request.cmd))
+        return request
 
 
 class CompLayerStash:
-    """Context manager that stashes the comp and target layers on enter and
-    exit. On exit the four stashes (pre_comp, post_comp, pre_target,
-    post_target) are compared and if there is a change we do something.
+    """Context manager that collects the node changes made by every command
+    pushed, undone or redone on the model's undo stack while it is entered.
+    The changes are taken from each command's recorded delta, see
+    `commands.CommandDelta`, so the cost depends on the size of the commands
+    and not of the layers.
+    On exit `delta['target']` holds the target layer's changes and
+    `delta['comp']` the changes to other layers plus every comp node they
+    dirty, both in the format of `compare_data`. If anything changed the
+    model's `comp_delta_recorded` is emitted with the stash.
+    The undo stack enters a stash for every outermost command, see
+    NxtUndoStack.
     """
-    # This is taking approx 115ms x 2 (29-4-2020)
     def __init__(self, model, comp_layer=None, target_layer=None):
         """If not comp layer is provided the model's comp layer is used.
         If not target layer is provided the model's target layer is used.
@@ -3488,47 +4356,72 @@ class CompLayerStash:
         :param target_layer: SpecLayer object or None
         """
         self.model = model
-        self.stage = model.stage
-        self.pre_comp_data = {}
-        self.post_comp_data = {}
-        self.pre_target_data = {}
-        self.post_target_data = {}
+        self.undo_stack = model.undo_stack
         self.comp_layer = comp_layer or model.comp_layer
         self.target_layer = target_layer or model.target_layer
+        self.command_delta = CommandDelta()
         self.delta = {'comp': {}, 'target': {}}
+        self._index = 0
 
     def __enter__(self):
-        """Stash the comp and target layer before any code is run.
+        """Start collecting the deltas of the commands that run.
         :return: self
         """
-        self.pre_comp_data = self.stage.get_stash_data(self.comp_layer)
-        self.pre_target_data = self.stage.get_stash_data(self.target_layer)
+        self.command_delta = CommandDelta()
+        self._index = self.undo_stack.index()
+        self.undo_stack.indexChanged.connect(self.on_index_changed)
         return self
 
+    def on_index_changed(self, index):
+        """Collect the deltas of the commands between the last index and
+        `index`, inverted if they were undone.
+        :param index: New undo stack index
+        :return: None
+        """
+        if index > self._index:
+            for idx in range(self._index, index):
+                command = self.undo_stack.command(idx)
+                for delta in get_command_deltas(command):
+                    self.command_delta.update(delta)
+        else:
+            for idx in reversed(range(index, self._index)):
+                command = self.undo_stack.command(idx)
+                for delta in reversed(get_command_deltas(command)):
+                    self.command_delta.update(delta.inverted())
+        self._index = index
+
     def __exit__(self, exc_type, exc_val, exc_tb):
-        """Stash comp and target layer again and compare to the previous
-        stashes. If there is a delta in the data we do something.
+        """Stop collecting and sort the collected changes into the target
+        and comp deltas.
         :param exc_type: Uncaught exception type
         :param exc_val: Uncaught exception value
         :param exc_tb: Uncaught exception traceback
         :return: None
         """
-        self.post_comp_data = self.stage.get_stash_data(self.comp_layer)
-        self.post_target_data = self.stage.get_stash_data(self.target_layer)
-        self.delta['target'] = compare_data(self.pre_target_data,
-                                            self.post_target_data)
-        _comp_changes = compare_data(self.pre_comp_data, self.post_comp_data)
-        _keys = list(self.delta['target'].keys())
-        for k, v in _comp_changes.items():
-            if k not in _keys:
-                self.delta['comp'][k] = v
+        self.undo_stack.indexChanged.disconnect(self.on_index_changed)
+        layers = self.command_delta.layers
+        target_path = self.target_layer.real_path
+        self.delta['target'] = layers.get(target_path, {})
+        comp_delta = {}
+        for layer_path, nodes in layers.items():
+            for node_path, changes in nodes.items():
+                if layer_path != target_path:
+                    comp_delta[node_path] = changes
+                for dirty in self.comp_layer.get_node_dirties(node_path):
+                    if dirty not in comp_delta:
+                        comp_delta[dirty] = {DELTA_KEYS.NEW_ATTR: [],
+                                             DELTA_KEYS.CHANGED_ATTR: [],
+                                             DELTA_KEYS.NEW_NODE: False,
+                                             DELTA_KEYS.REMOVED_NODE: False}
+        for node_path, changes in comp_delta.items():
+            if node_path not in self.delta['target']:
+                self.delta['comp'][node_path] = changes
         comp_change_count = len(self.delta['comp'].keys())
         tgt_change_count = len(self.delta['target'].keys())
         change_count = comp_change_count + tgt_change_count
-        logger.info('Command changed {} node(s)'.format(change_count))
+        logger.debug('Command changed {} node(s)'.format(change_count))
         if change_count:
-            # Emit signal with delta data?
-            pass
+            self.model.comp_delta_recorded.emit(self)
 
 
 class BuildStop(Exception):
@@ -3537,13 +4430,15 @@ class BuildStop(Exception):
 
 class CommandPortListener(QtCore.QThread):
     update_cache_dict = QtCore.Signal(dict)
+    update_cache_delta = QtCore.Signal(dict)
     destroy_cmd_port = QtCore.Signal()
+    listening_changed = QtCore.Signal(bool)
 
     def __init__(self, stage_model):
         super(CommandPortListener, self).__init__()
         self.stage_model = stage_model
         self.kill = False
-        self.listening = False
+        self._listening = False
         self.socket = None
         self.client = None
         self.waiting = False
@@ -3554,6 +4449,17 @@ class CommandPortListener(QtCore.QThread):
         self.bound = False
         self.connected = False
 
+    @property
+    def listening(self):
+        return self._listening
+
+    @listening.setter
+    def listening(self, state):
+        if state == self._listening:
+            return
+        self._listening = state
+        self.listening_changed.emit(state)
+
     def setup(self):
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -3566,10 +4472,12 @@ class CommandPortListener(QtCore.QThread):
         self.socket.bind(('localhost', nxt_socket.COM_PORT))
         self.bound = True
 
-    def run(self):
+    def listen(self):
+        """Bind and start listening, connections made before the thread is
+        running wait in the backlog instead of being refused.
+        """
         if not self.bound:
             self.bind()
-        logger.socket('Starting COM thread...')
         try:
             self.socket.listen(1)
         except Exception as e:
@@ -3580,95 +4488,48 @@ class CommandPortListener(QtCore.QThread):
                 self.socket.listen(1)
             else:
                 raise e
+
+    def run(self):
+        logger.socket('Starting COM thread...')
+        if not self.bound:
+            self.listen()
         self.client, self.client_addr = self.socket.accept()
         logger.socket('Connected to by: {}'.format(self.client_addr))
         logger.socket('Remote messages will be prefixed with '
                       '{}'.format(self.remote_prefix))
         self.connected = True
         self.stage_model.validate_socket_connection()
-        new_msg = True
-        full_msg = b''
-        HEADER = nxt_socket.HEADER_SIZE
+        reader = ipc.FrameReader(self.client)
         while not self.kill:
             self.listening = True
             try:
-                msg = self.client.recv(1024)
-            except:
-                logger.socket('COM server lost connection!')
+                data_dict = reader.read_frame()
+            except ipc.FrameError:
+                logger.exception('COM server received an invalid message!')
                 self.client.close()
                 self.client = None
+                break
+            except Exception:
+                logger.socket('COM server lost connection!')
+                if self.client:
+                    self.client.close()
+                self.client = None
                 self.connected = False
                 logger.socket('Closed connection from: '
                               '{}'.format(self.client_addr))
                 break
-            if new_msg:
-                _msg_header = msg[:nxt_socket.HEADER_SIZE]
-                if not _msg_header:
-                    full_msg = b''
-                    continue
-                msg_len = int(_msg_header)
-                new_msg = False
-            full_msg += msg.decode('utf-8')
-            recv_len = len(full_msg) - HEADER
-            if recv_len < msg_len:
-                continue
-            elif recv_len > msg_len:
-                # Sender was too fast so we split out the next message
-                base_chunk = full_msg
-                _base_chunk_header = base_chunk[:HEADER]
-                if not base_chunk:
-                    full_msg = b''
-                    continue
-                next_expected = int(_base_chunk_header)
-                chunk = base_chunk
-                chunk_len = len(chunk)
-                while chunk_len > next_expected:
-                    message_bytes = chunk[HEADER:next_expected + HEADER]
-                    actual_chunk_len = len(message_bytes)
-                    if actual_chunk_len < next_expected:
-                        chunk_len = actual_chunk_len
-                        break
-                    if actual_chunk_len != next_expected:
-                        raise Exception('Failed to parse incoming bytes!')
-                    self.handle_message(message_bytes)
-                    c = chunk[next_expected + HEADER:]
-                    chunk_len = len(c)
-                    _chunk_header = c[:HEADER]
-                    if not _chunk_header or not c:
-                        full_msg = b''
-                        next_expected = 0
-                        chunk = c
-                        break
-                    next_expected = int(_chunk_header)
-                    chunk = c
-                if chunk_len == next_expected:
-                    new_msg = True
-                    data_bytes = chunk[HEADER:]
-                    full_msg = b''
-                    if not data_bytes:
-                        continue
-                    if not self.handle_message(data_bytes):
-                        break
-                elif chunk_len < next_expected:
-                    msg_len = next_expected
-                    continue
-            elif recv_len == msg_len:
-                new_msg = True
-                data_bytes = full_msg[HEADER:]
-                full_msg = b''
-                if not data_bytes:
-                    continue
-                if not self.handle_message(data_bytes):
-                    break
+            if not self.handle_message(data_dict):
+                break
         self.listening = False
         self.connected = False
         self.bound = False
         if self.client:
             self.client.close()
+        self.stage_model.remote_requests.cancel_all('Lost connection to '
+                                                    'remote')
         logger.info('Shutdown com port listener!')
 
-    def handle_message(self, message_bytes):
-        data_dict = pickle.loads(message_bytes)
+    def handle_message(self, data_dict):
         for k, v in data_dict.items():
             if k == nxt_socket.COM_TYPE.SHUTDOWN:
                 logger.socket('Shutting down com port listener...')
@@ -3688,11 +4549,17 @@ class CommandPortListener(QtCore.QThread):
                            extra={'links': links})
             elif k == nxt_socket.COM_TYPE.CACHE:
                 self.update_cache_dict.emit(v)
+            elif k == remote_cache.CACHE_DELTA:
+                self.update_cache_delta.emit(v)
+            elif k == remote_comp.COMP_RESYNC:
+                self.stage_model._remote_comp_resync = True
+            elif k == ipc.REPLY:
+                self.stage_model.remote_requests.resolve(v)
             elif k == nxt_socket.COM_TYPE.ERR:
-                self.stage_model._wait_for_remote = False
                 self.stage_model.stop_build()
             elif k == nxt_socket.COM_TYPE.WAIT:
-                self.stage_model._wait_for_remote = v
+                # The remote blocks until we acknowledge its wait messages,
+                # replies to our requests are what we wait on.
                 self.client.send(b'1')
         return True
 
@@ -3703,25 +4570,66 @@ class CommandPortListener(QtCore.QThread):
             self.client.close()
 
 
-class ExecuteNodeThread(QtCore.QThread):
+class ExecuteNodeWorker(QtCore.QThread):
+    """Long lived thread that runs the ExecuteNodeJobs put in its queue, one
+    at a time. `job_finished` is emitted after each job.
+    """
+    job_finished = QtCore.Signal(object)
+
+    def __init__(self):
+        super(ExecuteNodeWorker, self).__init__()
+        self._queue = queue.Queue()
+
+    def submit(self, job):
+        self._queue.put(job)
+
+    def stop(self):
+        """Finishes any queued jobs and then waits for the thread to exit."""
+        self._queue.put(None)
+        self.wait()
+
+    def run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                job.run()
+            except Exception as err:
+                # Raised on the main thread by the model, the worker lives
+                # on for the next job.
+                job.raised_exception = err
+            finally:
+                job.done.set()
+                self.job_finished.emit(job)
+
+
+class ExecuteNodeJob(object):
     def __init__(self, stage_mode, node_path):
-        super(ExecuteNodeThread, self).__init__()
         self.stage_model = stage_mode
         self.node_path = node_path
         # Linux won't raise exceptions in threads so this is how we catch it
         # and let the model raise it in the main thread.
         self.raised_exception = None
+        self.done = threading.Event()
+        self.timer = NodeTimer(node_path)
 
     def run(self):
-        self._run()
+        with self.timer:
+            self._run()
 
     def _run(self):
         if self.stage_model.framing_behavior == EXEC_FRAMING.ALWAYS:
+            # Emitted directly, the dispatcher isn't thread safe
             self.stage_model.frame_items.emit([self.node_path])
         if self.stage_model.use_cmd_port:  # Send run command over cmd port
             cmd = '{MODEL}.run(exec_order=["{NODE}"])'
             cmd = cmd.format(NODE=self.node_path, MODEL=nxt_socket.MODEL_VAR)
-            self.stage_model._send_cmd(cmd, wait=True)
+            request = self.stage_model._send_cmd(cmd, wait=True,
+                                                 timeout=EXEC_TIMEOUT)
+            if not request.succeeded:
+                self.raised_exception = BuildStop
+                return
         else:
             try:
                 layer = self.stage_model.current_rt_layer
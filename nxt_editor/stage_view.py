@@ -29,6 +29,222 @@ class CONNECTION_SIDES:
     BOTH = (IN, OUT)
 
 
+class ConnectionRegistry(object):
+    """Tracks connection graphics keyed by their source and target node and
+    by their source and target (node path, attr name). Every lookup and
+    removal only touches the graphics of the given node or attr, rather
+    than every connection in the view.
+    Insertion order is kept by using dicts as ordered sets.
+    """
+    def __init__(self):
+        self._graphics = {}
+        self._by_src_node = {}
+        self._by_tgt_node = {}
+        self._by_src_attr = {}
+        self._by_tgt_attr = {}
+
+    def __len__(self):
+        return len(self._graphics)
+
+    def __iter__(self):
+        return iter(list(self._graphics))
+
+    def __contains__(self, graphic):
+        return graphic in self._graphics
+
+    def _get_keys(self, graphic):
+        src_attr = (graphic.src_node_path, graphic.src_attr_name)
+        tgt_attr = (graphic.tgt_node_path, graphic.tgt_attr_name)
+        return ((self._by_src_node, graphic.src_node_path),
+                (self._by_tgt_node, graphic.tgt_node_path),
+                (self._by_src_attr, src_attr),
+                (self._by_tgt_attr, tgt_attr))
+
+    def add(self, graphic):
+        """Add the given connection graphic to the registry.
+
+        :param graphic: Connection graphic to track
+        :type graphic: AttrConnectionGraphic
+        """
+        if graphic in self._graphics:
+            return
+        # Node/attr paths of a graphic never change, store the keys so a
+        # removal can't miss an entry.
+        keys = self._get_keys(graphic)
+        self._graphics[graphic] = keys
+        for index, key in keys:
+            index.setdefault(key, {})[graphic] = None
+
+    def remove(self, graphic):
+        """Stop tracking the given connection graphic.
+
+        :param graphic: Connection graphic to remove
+        :type graphic: AttrConnectionGraphic
+        :return: True if the graphic was tracked
+        :rtype: bool
+        """
+        keys = self._graphics.pop(graphic, None)
+        if keys is None:
+            return False
+        for index, key in keys:
+            graphics = index.get(key)
+            if graphics is None:
+                continue
+            graphics.pop(graphic, None)
+            if not graphics:
+                index.pop(key)
+        return True
+
+    def clear(self):
+        self.__init__()
+
+    @staticmethod
+    def _get_sides(side):
+        if side == CONNECTION_SIDES.BOTH:
+            return side
+        return [side]
+
+    def _get_graphics(self, tgt_index, src_index, key, side):
+        """Get the graphics of the given key from the target and/or source
+        index, in order. A graphic that connects a node or attr to itself
+        is in both indexes but only listed once.
+        """
+        sides = self._get_sides(side)
+        connections = {}
+        if CONNECTION_SIDES.IN in sides:
+            connections.update(tgt_index.get(key, {}))
+        if CONNECTION_SIDES.OUT in sides:
+            connections.update(src_index.get(key, {}))
+        return list(connections)
+
+    def get_node_graphics(self, node_path, side=CONNECTION_SIDES.BOTH):
+        """Get connection graphics connected to given node path, optionally
+        on either or both sides.
+
+        :param node_path: node path to get connection graphics for.
+        :type node_path: str
+        :param side: side of the node to get connections for,
+        defaults to CONNECTION_SIDES.BOTH
+        :type side: CONNECTION_SIDES, optional
+        :return: list of connection graphics.
+        :rtype: list
+        """
+        return self._get_graphics(self._by_tgt_node, self._by_src_node,
+                                  node_path, side)
+
+    def get_attr_graphics(self, node_path, attr_name,
+                          side=CONNECTION_SIDES.BOTH):
+        """Get connection graphics connected to given node attribute,
+        optionally on either or both sides.
+
+        :param node_path: node path of the attribute
+        :type node_path: str
+        :param attr_name: name of the attribute
+        :type attr_name: str
+        :param side: side of the attr to get connections for,
+        defaults to CONNECTION_SIDES.BOTH
+        :type side: CONNECTION_SIDES, optional
+        :return: list of connection graphics.
+        :rtype: list
+        """
+        return self._get_graphics(self._by_tgt_attr, self._by_src_attr,
+                                  (node_path, attr_name), side)
+
+
+class RootSpatialIndex(object):
+    """Grid bucketed index of the scene rect covered by each root node and
+    its stacked descendants. Rects are (x, y, width, height) tuples so the
+    index can be kept for nodes that have no graphics item.
+    """
+    CELL_SIZE = 1000.0
+
+    def __init__(self, cell_size=CELL_SIZE):
+        self.cell_size = float(cell_size)
+        self._rects = {}
+        self._cells = {}
+
+    def __len__(self):
+        return len(self._rects)
+
+    def __contains__(self, root_path):
+        return root_path in self._rects
+
+    def _get_cells(self, rect):
+        x, y, width, height = rect
+        size = self.cell_size
+        x_range = range(int(math.floor(x / size)),
+                        int(math.floor((x + width) / size)) + 1)
+        y_range = range(int(math.floor(y / size)),
+                        int(math.floor((y + height) / size)) + 1)
+        return [(cx, cy) for cx in x_range for cy in y_range]
+
+    def get_rect(self, root_path):
+        return self._rects.get(root_path)
+
+    def set(self, root_path, rect):
+        """Set the scene rect covered by the given root.
+
+        :param root_path: Root node path
+        :type root_path: str
+        :param rect: (x, y, width, height)
+        :type rect: tuple
+        """
+        rect = tuple(rect)
+        if self._rects.get(root_path) == rect:
+            return
+        self.remove(root_path)
+        self._rects[root_path] = rect
+        for cell in self._get_cells(rect):
+            self._cells.setdefault(cell, set()).add(root_path)
+
+    def remove(self, root_path):
+        rect = self._rects.pop(root_path, None)
+        if rect is None:
+            return
+        for cell in self._get_cells(rect):
+            roots = self._cells.get(cell)
+            if roots is None:
+                continue
+            roots.discard(root_path)
+            if not roots:
+                self._cells.pop(cell)
+
+    def clear(self):
+        self._rects = {}
+        self._cells = {}
+
+    def query(self, rect):
+        """Get the roots whose rects intersect the given rect.
+
+        :param rect: (x, y, width, height)
+        :type rect: tuple
+        :return: set of root paths
+        :rtype: set
+        """
+        x, y, width, height = rect
+        found = set()
+        for cell in self._get_cells(rect):
+            for root_path in self._cells.get(cell, ()):
+                if root_path in found:
+                    continue
+                rx, ry, r_width, r_height = self._rects[root_path]
+                if (rx <= x + width and x <= rx + r_width and
+                        ry <= y + height and y <= ry + r_height):
+                    found.add(root_path)
+        return found
+
+    def bounding_rect(self):
+        """Get the rect containing every indexed root, None if empty."""
+        if not self._rects:
+            return None
+        rects = self._rects.values()
+        left = min(r[0] for r in rects)
+        top = min(r[1] for r in rects)
+        right = max(r[0] + r[2] for r in rects)
+        bottom = max(r[1] + r[3] for r in rects)
+        return left, top, right - left, bottom - top
+
+
 class StageView(QtWidgets.QGraphicsView):
     """Primary display/edit widget for node hierarchies of an nxt graph.
     Displays nodes in visual hierarchies and allows selection, parenting, and
@@ -37,6 +253,15 @@ class StageView(QtWidgets.QGraphicsView):
     POTENTIAL_CONNECTION_DEPTH = 30
     CONNECTION_DEPTH = -10
     NODE_DEPTH = 0
+    # Graphs with at least this many nodes only get graphics items for the
+    # roots near the visible rect.
+    VIRTUALIZE_THRESHOLD = 1000
+    # Margin, in view pixels, around the viewport that is kept realized.
+    VIRTUAL_MARGIN = 400
+    # Max number of released node graphics kept for reuse.
+    GRAPHICS_POOL_SIZE = 256
+    # Estimated scene size of a node that has never been drawn.
+    VIRTUAL_NODE_SIZE = (260, 65)
 
     def __init__(self, model, parent=None):
         super(StageView, self).__init__(parent=parent)
@@ -71,6 +296,17 @@ class StageView(QtWidgets.QGraphicsView):
         self.nxt = parent.nxt
         self.addAction(self._parent.app_actions.undo_action)
         self.addAction(self._parent.app_actions.redo_action)
+        # virtualization, see `draw_graph`. Set before
+        # the scroll bars are touched, they call `scrollContentsBy`.
+        self.virtualized = False
+        self._root_index = RootSpatialIndex()
+        self._realized_roots = set()
+        self._graphics_pool = []
+        self._virtual_rect = None
+        self._virtual_timer = QtCore.QTimer(self)
+        self._virtual_timer.setSingleShot(True)
+        self._virtual_timer.setInterval(0)
+        self._virtual_timer.timeout.connect(self.update_virtual_roots)
         # graph view settings
         self.setFocusPolicy(QtCore.Qt.FocusPolicy.StrongFocus)
         self.setDragMode(QtWidgets.QGraphicsView.NoDrag)
@@ -79,8 +315,10 @@ class StageView(QtWidgets.QGraphicsView):
         self.setVerticalScrollBarPolicy(QtCore.Qt.ScrollBarAlwaysOff)
         self.horizontalScrollBar().setValue(0)
         self.verticalScrollBar().setValue(0)
-        self.setOptimizationFlag(self.DontSavePainterState, enabled=True)
-        self.setOptimizationFlag(self.DontAdjustForAntialiasing, enabled=True)
+        view_cls = QtWidgets.QGraphicsView
+        self.setOptimizationFlag(view_cls.DontSavePainterState, enabled=True)
+        self.setOptimizationFlag(view_cls.DontAdjustForAntialiasing,
+                                 enabled=True)
         # scene
         self._scene = QtWidgets.QGraphicsScene()
         self.setScene(self._scene)
@@ -117,7 +355,7 @@ class StageView(QtWidgets.QGraphicsView):
 
         # graphics items collections
         self._node_graphics = {}
-        self._connection_graphics = []
+        self._connection_graphics = ConnectionRegistry()
         self._attr_concerns = {}
         self.prev_build_focus_path = None
 
@@ -133,6 +371,8 @@ class StageView(QtWidgets.QGraphicsView):
         self.model.layer_lock_changed.connect(self.update_view)
         self.model.comp_layer_changed.connect(self.update_view)
         self.model.comp_layer_changed.connect(self.failure_check)
+        self.model.build_idx_changed.connect(self.update_build_focus)
+        self.model.executing_changed.connect(self.update_build_focus)
         self.model.nodes_changed.connect(self.handle_nodes_changed)
         self.model.attrs_changed.connect(self.handle_attrs_changed)
         self.model.node_moved.connect(self.handle_node_move)
@@ -141,7 +381,7 @@ class StageView(QtWidgets.QGraphicsView):
         self.model.collapse_changed.connect(self.handle_collapse_changed)
 
         # initialize the view
-        self.update_view()
+        self.update_view(clear=True)
 
         # HUD
         self.hud_layout = QtWidgets.QGridLayout(self)
@@ -180,6 +420,14 @@ class StageView(QtWidgets.QGraphicsView):
         super(StageView, self).drawForeground(painter, rect)
         self.frames += 1
 
+    def scrollContentsBy(self, dx, dy):
+        super(StageView, self).scrollContentsBy(dx, dy)
+        self.schedule_virtual_update()
+
+    def resizeEvent(self, event):
+        super(StageView, self).resizeEvent(event)
+        self.schedule_virtual_update()
+
     def focusInEvent(self, event):
         super(StageView, self).focusInEvent(event)
 
@@ -223,6 +471,23 @@ class StageView(QtWidgets.QGraphicsView):
         if self.model:
             return self.model.implicit_connections
 
+    def update_build_focus(self, *args):
+        """Updates the node graphics that gained or lost the build focus.
+        Only the previous and current focus nodes are touched, rather than
+        every node in the scene.
+        """
+        if self.model.executing:
+            focus_path = self.model.get_build_focus() or None
+        else:
+            focus_path = None
+        if focus_path == self.prev_build_focus_path:
+            return
+        for path in (self.prev_build_focus_path, focus_path):
+            graphic = self.get_node_graphic(path)
+            if graphic:
+                graphic.update_build_focus()
+        self.prev_build_focus_path = focus_path
+
     def failure_check(self, *args):
         if self.model.comp_layer.failure and not self.main_window.in_startup:
             info = ('There was a critical error when building the comp.\n'
@@ -231,10 +496,14 @@ class StageView(QtWidgets.QGraphicsView):
             NxtWarningDialog.show_message('Bad Comp!', info,
                                           details=self.model.comp_layer.failure)
 
-    def update_view(self, dirty=()):
-        """Clears and re-draws graphics items. If the dirty list is empty all
-        nodes are condisered dirty and re-drawn.
+    def update_view(self, dirty=(), clear=False):
+        """Reconciles graphics items with the comp layer. If the dirty list is
+        empty every node in the comp is considered dirty, existing graphics
+        are updated in place and only graphics for nodes that no longer
+        exist are removed. The scene is only cleared and re-drawn from
+        scratch when `clear` is True.
         :param dirty: List or Tuple of dirty node paths
+        :param clear: If True the scene is cleared before drawing.
         :return: None
         """
         start = time.time()
@@ -243,9 +512,11 @@ class StageView(QtWidgets.QGraphicsView):
         # type coming through the dirty arg
         if not isinstance(dirty, (tuple, list)):
             dirty = ()
-        if not dirty:
+        if clear:
             self.clear()
             self.potential_connection = None
+        if not dirty:
+            self.remove_stale_graphics()
         else:
             # TODO: Remove this when update_hierarchy is fixed
             extra_roots = []
@@ -253,13 +524,42 @@ class StageView(QtWidgets.QGraphicsView):
                 root = nxt_path.get_root_path(path)
                 if root not in dirty:
                     extra_roots += [root]
-            dirty += extra_roots
+            dirty = list(dirty) + extra_roots
         self.draw_graph(dirty)
         self.update_style_sheet()
         self.on_model_selection_changed(self.model.selection)
         update_time = str(int(round((time.time() - start) * 1000)))
         logger.debug("Time to update view: " + update_time + "ms")
 
+    def remove_stale_graphics(self):
+        """Removes node graphics, and their connections, for nodes that are
+        no longer in the comp or are hidden by a collapsed ancestor. Attr
+        concerns held by nodes that no longer exist are dropped.
+        :return: None
+        """
+        og_do_anims = self.do_animations
+        self.do_animations = False
+        for node_path in list(self._node_graphics.keys()):
+            if node_path == nxt_path.WORLD:
+                continue
+            exists = (self.model.node_exists(node_path) or
+                      self.model.node_is_implied(node_path))
+            if exists and not self.model.get_collapsed_ancestor(node_path):
+                continue
+            self.remove_node_graphic(node_path)
+        self.do_animations = og_do_anims
+        for src_path in list(self._attr_concerns.keys()):
+            src_concerns = self._attr_concerns[src_path]
+            for src_attr_name in list(src_concerns.keys()):
+                concerns = [c for c in src_concerns[src_attr_name]
+                            if self.model.node_exists(c[0])]
+                if concerns:
+                    src_concerns[src_attr_name] = concerns
+                else:
+                    src_concerns.pop(src_attr_name)
+            if not src_concerns:
+                self._attr_concerns.pop(src_path)
+
     def update_style_sheet(self):
         layer_color = self.model.get_layer_color(self.model.target_layer)
         color_obj = QtGui.QColor(layer_color)
@@ -280,8 +580,10 @@ class StageView(QtWidgets.QGraphicsView):
     def clear(self):
         """Remove all graphics items and clear all object dictionaries."""
         self._node_graphics = {}
-        self._connection_graphics = []
+        self._connection_graphics.clear()
         self._attr_concerns = {}
+        self._root_index.clear()
+        self._realized_roots = set()
         self.scene().clear()
 
     def toggle_implicit_connections(self, state=None):
@@ -298,6 +600,11 @@ class StageView(QtWidgets.QGraphicsView):
         self.update()
 
     def frame_all(self):
+        if self.virtualized:
+            rect = self._root_index.bounding_rect()
+            if rect:
+                self.frame_rect(QtCore.QRectF(*rect))
+            return
         self.frame_rect(self.scene().itemsBoundingRect())
 
     def frame_selection(self):
@@ -308,6 +615,12 @@ class StageView(QtWidgets.QGraphicsView):
         for path in node_paths:
             graphic = self.get_node_graphic(path)
             if not graphic:
+                rect = None
+                if self.virtualized:
+                    root_path = nxt_path.get_root_path(path)
+                    rect = self._root_index.get_rect(root_path)
+                if rect:
+                    bounding_rect = bounding_rect.united(QtCore.QRectF(*rect))
                 continue
             bounding_rect = bounding_rect.united(graphic.sceneBoundingRect())
         if bounding_rect != QtCore.QRectF():
@@ -320,9 +633,13 @@ class StageView(QtWidgets.QGraphicsView):
         rect_bottom = self.view_padding_factor
         padded_rect = rect.adjusted(rect_left, rect_top, rect_right, rect_bottom)
         self.fitInView(padded_rect, QtCore.Qt.KeepAspectRatio)
+        self.schedule_virtual_update()
 
     def draw_graph(self, dirty):
-        """Draws all nodes and connections.
+        """Draws all nodes and connections. If the dirty list is empty and the
+        comp has at least `VIRTUALIZE_THRESHOLD` nodes the view is
+        virtualized: every root is kept in a spatial index and graphics
+        items are only built for the roots near the visible rect.
         :param dirty: List of dirty node paths
         :return: None
         """
@@ -332,14 +649,146 @@ class StageView(QtWidgets.QGraphicsView):
         else:
             node_paths = self.model.get_descendants(nxt_path.WORLD,
                                                     include_implied=True)
+            self.index_roots(node_paths)
         og_do_anims = self.do_animations
         self.do_animations = False
         self.handle_nodes_changed(node_paths)
         self.do_animations = og_do_anims
 
+    def index_roots(self, node_paths):
+        """Decides if the view is virtualized and, if so, rebuilds the root
+        index from the given paths and realizes the visible roots.
+        :param node_paths: Every node path in the comp
+        :return: None
+        """
+        self._root_index.clear()
+        was_virtualized = self.virtualized
+        self.virtualized = len(node_paths) >= self.VIRTUALIZE_THRESHOLD
+        if not self.virtualized:
+            self._realized_roots = set()
+            return
+        counts = {}
+        for path in node_paths:
+            root_path = nxt_path.get_root_path(path)
+            counts[root_path] = counts.get(root_path, 0) + 1
+        for root_path, count in counts.items():
+            self.update_root_index(root_path, count - 1)
+        visible = self._root_index.query(self.get_virtual_rect())
+        if was_virtualized:
+            stale = self._realized_roots.difference(visible)
+        else:
+            # Every node was drawn before.
+            stale = set(counts.keys()).difference(visible)
+        self.release_roots(stale)
+        self._realized_roots = visible
+
+    def get_virtual_rect(self):
+        """Get the scene rect, as an (x, y, width, height) tuple, of the
+        viewport plus `VIRTUAL_MARGIN`.
+        """
+        margin = self.VIRTUAL_MARGIN
+        view_rect = self.viewport().rect().adjusted(-margin, -margin,
+                                                    margin, margin)
+        rect = self.mapToScene(view_rect).boundingRect()
+        return rect.x(), rect.y(), rect.width(), rect.height()
+
+    def update_root_index(self, root_path, descendant_count=None):
+        """Updates the index rect of the given root. Realized roots use the
+        rect of their graphics, others are estimated from their position and
+        number of descendants. Roots that no longer exist are removed.
+        :param root_path: Root node path
+        :param descendant_count: Number of descendants, looked up if None
+        :return: None
+        """
+        if not (self.model.node_exists(root_path) or
+                self.model.node_is_implied(root_path)):
+            self._root_index.remove(root_path)
+            return
+        graphic = self.get_node_graphic(root_path)
+        if graphic and graphic.scene():
+            rect = graphic.sceneBoundingRect()
+            children_rect = graphic.childrenBoundingRect()
+            rect = rect.united(graphic.mapRectToScene(children_rect))
+            self._root_index.set(root_path, (rect.x(), rect.y(),
+                                             rect.width(), rect.height()))
+            return
+        if self.model.get_node_collapse(root_path):
+            descendant_count = 0
+        elif descendant_count is None:
+            descendant_count = len(self.model.get_descendants(
+                root_path, include_implied=True))
+        width, height = self.VIRTUAL_NODE_SIZE
+        x, y = self.model.get_node_pos(root_path)
+        self._root_index.set(root_path,
+                             (x, y, width, height * (descendant_count + 1)))
+
+    def schedule_virtual_update(self):
+        """Queues `update_virtual_roots` if the visible rect has changed."""
+        if self.virtualized and self.get_virtual_rect() != self._virtual_rect:
+            self._virtual_timer.start()
+
+    def update_virtual_roots(self):
+        """Realizes roots that came into the visible rect and releases the
+        graphics of roots that left it.
+        :return: None
+        """
+        if not self.virtualized:
+            return
+        self._virtual_rect = self.get_virtual_rect()
+        visible = self._root_index.query(self._virtual_rect)
+        stale = set()
+        for root_path in self._realized_roots.difference(visible):
+            graphic = self.get_node_graphic(root_path)
+            if graphic and graphic.get_is_animating():
+                visible.add(root_path)
+                continue
+            stale.add(root_path)
+        self.release_roots(stale)
+        new_roots = visible.difference(self._realized_roots)
+        self._realized_roots = visible
+        if not new_roots:
+            return
+        node_paths = []
+        for root_path in new_roots:
+            node_paths += [root_path]
+            node_paths += self.model.get_descendants(root_path,
+                                                     include_implied=True)
+        og_do_anims = self.do_animations
+        self.do_animations = False
+        self.update_node_graphics(node_paths)
+        self.do_animations = og_do_anims
+        self.on_model_selection_changed(self.model.selection)
+
+    def release_roots(self, root_paths):
+        """Removes the graphics of the given roots and their descendants,
+        keeping them in the pool for reuse. The roots stay in the index.
+        :param root_paths: Set of root node paths
+        :return: None
+        """
+        if not root_paths:
+            return
+        for root_path in root_paths:
+            self._realized_roots.discard(root_path)
+            if root_path in self._node_graphics:
+                self.update_root_index(root_path)
+        for path in list(self._node_graphics.keys()):
+            if nxt_path.get_root_path(path) not in root_paths:
+                continue
+            graphic = self._node_graphics.pop(path)
+            self.remove_node_connection_graphics(path)
+            graphic.setParentItem(None)
+            if graphic.scene():
+                self.scene().removeItem(graphic)
+            if len(self._graphics_pool) < self.GRAPHICS_POOL_SIZE:
+                self._graphics_pool += [graphic]
+
     def draw_node(self, node_path):
         graphic = self.get_node_graphic(node_path)
-        if not graphic:
+        if not graphic and self._graphics_pool:
+            graphic = self._graphics_pool.pop()
+            graphic.set_node_path(node_path)
+            self._node_graphics[node_path] = graphic
+        elif not graphic:
             graphic = NodeGraphicsItem(node_path=node_path,
                                        model=self.model,
                                        view=self)
@@ -350,6 +799,9 @@ class StageView(QtWidgets.QGraphicsView):
         for attr_concerns in self._attr_concerns.get(node_path, {}).values():
             for desire in attr_concerns:
                 des_node, des_attr = desire
+                if not self.get_node_graphic(des_node):
+                    # Drawn by `draw_connections` once the target is drawn.
+                    continue
                 if des_attr == nxt_node.INTERNAL_ATTRS.INSTANCE_PATH:
                     self._draw_inst_connections(des_node)
                 elif des_attr == nxt_node.INTERNAL_ATTRS.EXECUTE_IN:
@@ -489,19 +941,9 @@ class StageView(QtWidgets.QGraphicsView):
         :param attr_name: name of attribute to remove connectons for.
         :type attr_name: str
         """
-        if side == CONNECTION_SIDES.BOTH:
-            sides = side
-        else:
-            sides = [side]
-        path = (node_path, attr_name)
-        to_remove = []
-        for graphic in self._connection_graphics:
-            if (CONNECTION_SIDES.IN in sides and
-                path == (graphic.tgt_node_path, graphic.tgt_attr_name)):
-                to_remove += [graphic]
-            elif (CONNECTION_SIDES.OUT in sides and
-                  path == (graphic.src_node_path, graphic.src_attr_name)):
-                to_remove += [graphic]
+        to_remove = self._connection_graphics.get_attr_graphics(node_path,
+                                                               attr_name,
+                                                               side)
         for graphic in to_remove:
             self.scene().removeItem(graphic)
             self._connection_graphics.remove(graphic)
@@ -534,19 +976,7 @@ class StageView(QtWidgets.QGraphicsView):
         :return: list of connection graphics.
         :rtype: list
         """
-        if side == CONNECTION_SIDES.BOTH:
-            sides = side
-        else:
-            sides = [side]
-        connections = []
-        for graphic in self._connection_graphics:
-            if (CONNECTION_SIDES.IN in sides and
-                node_path == graphic.tgt_node_path):
-                connections += [graphic]
-            if (CONNECTION_SIDES.OUT in sides and
-                node_path == graphic.src_node_path):
-                connections += [graphic]
-        return connections
+        return self._connection_graphics.get_node_graphics(node_path, side)
 
     def register_attr_concern(self, src_node_path, src_attr_name,
                               tgt_node_path, tgt_attr_name):
@@ -586,7 +1016,7 @@ class StageView(QtWidgets.QGraphicsView):
         """
         self.scene().addItem(graphic)
         graphic.setZValue(self.CONNECTION_DEPTH)
-        self._connection_graphics += [graphic]
+        self._connection_graphics.add(graphic)
 
     def drawBackground(self, painter, rect):
         super(StageView, self).drawBackground(painter, rect)
@@ -1020,6 +1450,7 @@ class StageView(QtWidgets.QGraphicsView):
         view_center = self.mapToScene(self.viewport().rect().center())
         delta = self.mapToScene(self._view_pos) - view_center
         self.centerOn(self._scene_pos - delta)
+        self.schedule_virtual_update()
 
     def anim_finished(self):
         if self._num_scheduled_scalings > 0:
@@ -1151,10 +1582,44 @@ class StageView(QtWidgets.QGraphicsView):
                 continue
             # TODO Track connections by target path to allow attr connections
             #  to be added here.
+            if (self.virtualized and nxt_path.get_root_path(path) not in
+                    self._realized_roots):
+                continue
             if path != nxt_path.WORLD:
                 logger.error("Cannot find item to select: " + str(path))
 
     def handle_nodes_changed(self, node_paths):
+        """Handler for the model signal 'nodes_changed'. When virtualized
+        only the paths under realized roots are drawn, other roots just have
+        their index rect updated.
+        :param node_paths: List of node paths
+        :return: None
+        """
+        if not self.virtualized:
+            self.update_node_graphics(node_paths)
+            return
+        realized_paths = []
+        roots_hit = set()
+        for path in node_paths:
+            root_path = nxt_path.get_root_path(path)
+            if root_path == nxt_path.WORLD:
+                continue
+            roots_hit.add(root_path)
+            if root_path in self._realized_roots:
+                realized_paths += [path]
+        self.update_node_graphics(realized_paths)
+        for root_path in roots_hit:
+            self.update_root_index(root_path)
+            if root_path not in self._root_index:
+                self._realized_roots.discard(root_path)
+        if roots_hit.difference(self._realized_roots):
+            self._virtual_timer.start()
+
+    def update_node_graphics(self, node_paths):
+        """Adds, updates or removes the graphics of the given node paths.
+        :param node_paths: List of node paths
+        :return: None
+        """
         updated_paths = []
         roots_hit = set()
         new_nodes = []
@@ -1238,6 +1703,9 @@ class StageView(QtWidgets.QGraphicsView):
         node_item = self.get_node_graphic(node_path)
         if node_item:
             node_item.setPos(pos[0], pos[1])
+        if self.virtualized:
+            self.update_root_index(nxt_path.get_root_path(node_path))
+            self._virtual_timer.start()
 
     def handle_collapse_changed(self, node_paths):
         while self._animating:
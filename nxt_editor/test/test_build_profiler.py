@@ -0,0 +1,90 @@
+# Builtin
+import unittest
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+# External
+from Qt import QtWidgets
+
+# Internal
+from nxt_editor.build_profiler import BuildProfile, NodeTimer, PROFILE_KEYS
+from nxt_editor.dockwidgets.profiler_view import ProfileTimeline
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+
+class BuildProfileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.profile = BuildProfile()
+        for path, wall in (('/a', .1), ('/b', .3), ('/a', .3)):
+            timer = NodeTimer(path)
+            with timer:
+                pass
+            timer.wall_time = wall
+            self.profile.add(timer)
+
+    def test_timer_measures(self):
+        timer = NodeTimer('/a')
+        with timer:
+            sum(range(1000))
+        self.assertGreaterEqual(timer.wall_time, 0)
+        self.assertGreaterEqual(timer.cpu_time, 0)
+        self.assertGreaterEqual(timer.start, self.profile.start)
+
+    def test_hot_nodes_totals_reruns(self):
+        hot = self.profile.get_hot_nodes()
+        self.assertEqual(['/a', '/b'], [path for path, _ in hot])
+        self.assertAlmostEqual(.4, hot[0][1])
+
+    def test_chrome_trace(self):
+        trace = json.loads(self.profile.to_chrome_trace())
+        events = trace['traceEvents']
+        self.assertEqual(3, len(events))
+        self.assertEqual('/b', events[1]['name'])
+        self.assertEqual('X', events[1]['ph'])
+        self.assertAlmostEqual(.3 * 1e6, events[1]['dur'])
+
+    def test_save_json(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, 'profile.json')
+            self.profile.save(path)
+            with open(path) as fp:
+                records = json.load(fp)['records']
+        finally:
+            shutil.rmtree(temp_dir)
+        self.assertEqual(['/a', '/b', '/a'],
+                         [r[PROFILE_KEYS.NODE_PATH] for r in records])
+
+
+class ProfileTimelineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.profile = BuildProfile()
+        for i in range(1000):
+            timer = NodeTimer('/node{}'.format(i))
+            with timer:
+                pass
+            self.profile.add(timer)
+        self.timeline = ProfileTimeline()
+        self.timeline.set_profile(self.profile)
+
+    def test_rows_in_range(self):
+        row_height = ProfileTimeline.ROW_HEIGHT
+        top = ProfileTimeline.MARGIN + 10 * row_height
+        rows = self.timeline.get_rows(top, top + row_height * 2)
+        self.assertEqual(range(10, 13), rows)
+        self.assertEqual(range(990, 1000),
+                         self.timeline.get_rows(top + 980 * row_height,
+                                                top + 2000 * row_height))
+        self.assertEqual(range(0), self.timeline.get_rows(-100, -50))
+
+    def test_rects_of_rows(self):
+        rects = self.timeline.get_bar_rects(range(10, 12))
+        self.assertEqual(['/node10', '/node11'],
+                         [r[PROFILE_KEYS.NODE_PATH] for _, r in rects])
+        self.assertEqual(1000, len(self.timeline.get_bar_rects()))
@@ -0,0 +1,78 @@
+# Builtin
+import collections
+import json
+import time
+import unittest
+
+# Internal
+from nxt import clean_json
+from nxt.stage import INTERNAL_ATTRS
+from nxt.nxt_layer import SAVE_KEY
+from nxt_editor import clipboard
+
+
+def make_nodes(count):
+    compute_key = INTERNAL_ATTRS.as_save_key(INTERNAL_ATTRS.COMPUTE)
+    nodes = []
+    for i in range(count):
+        # Copied nodes are OrderedDicts, see nxt_node.get_node_as_dict
+        attrs = collections.OrderedDict()
+        attrs['attr'] = collections.OrderedDict(value=str(i), type='raw')
+        attrs['other'] = collections.OrderedDict(value=i * .5)
+        data = collections.OrderedDict()
+        data[compute_key] = ['self.out = {}'.format(i), 'print(self.out)']
+        data[SAVE_KEY.ATTRS] = attrs
+        data['child_order'] = []
+        nodes += [{'/node{}'.format(i): data}]
+    return nodes
+
+
+class ClipboardFormatTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        nodes = make_nodes(10)
+        self.assertEqual(nodes,
+                         clipboard.decode_nodes(clipboard.encode_nodes(nodes)))
+
+    def test_invalid_header(self):
+        with self.assertRaises(clipboard.ClipboardError):
+            clipboard.decode_nodes(b'[{"/node": {}}]')
+        with self.assertRaises(clipboard.ClipboardError):
+            clipboard.decode_nodes(b'NX')
+
+    def test_newer_version(self):
+        data = bytearray(clipboard.encode_nodes(make_nodes(1)))
+        data[len(clipboard.MAGIC)] = clipboard.FORMAT_VERSION + 1
+        with self.assertRaises(clipboard.ClipboardError):
+            clipboard.decode_nodes(bytes(data))
+
+    def test_corrupt_payload(self):
+        data = clipboard.encode_nodes(make_nodes(10))
+        with self.assertRaises(clipboard.ClipboardError):
+            clipboard.decode_nodes(data[:-10])
+
+    def test_unencodable(self):
+        with self.assertRaises(clipboard.ClipboardError):
+            clipboard.encode_nodes([{'/node': {'attr': object()}}])
+
+    def test_large_clipboard(self):
+        nodes = make_nodes(10000)
+        start = time.perf_counter()
+        text = json.dumps(nodes, indent=4)
+        json_copy = time.perf_counter() - start
+        start = time.perf_counter()
+        clean_json.load(json.loads(text, object_hook=clean_json._byteify))
+        json_paste = time.perf_counter() - start
+        start = time.perf_counter()
+        encoded = clipboard.encode_nodes(nodes)
+        binary_copy = time.perf_counter() - start
+        start = time.perf_counter()
+        decoded = clipboard.decode_nodes(encoded)
+        binary_paste = time.perf_counter() - start
+        self.assertEqual(nodes, decoded)
+        print('10k nodes  json: {} bytes, copy {:.1f}ms, paste {:.1f}ms  '
+              'binary: {} bytes, copy {:.1f}ms, paste {:.1f}ms'
+              ''.format(len(text), json_copy * 1000, json_paste * 1000,
+                        len(encoded), binary_copy * 1000,
+                        binary_paste * 1000))
+        self.assertLess(len(encoded), len(text) / 4)
@@ -0,0 +1,83 @@
+# Builtin
+import unittest
+import pickle
+import socket
+import threading
+
+# Internal
+from nxt_editor import ipc
+
+
+class FrameReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.sender, self.receiver = socket.socketpair()
+        self.reader = ipc.FrameReader(self.receiver, buffer_size=64)
+
+    def tearDown(self):
+        self.sender.close()
+        self.receiver.close()
+
+    def send_async(self, data, chunk_size=None):
+        """Send raw bytes from a thread so large payloads can't fill the
+        socket buffer and block the test.
+        """
+        def send():
+            if not chunk_size:
+                self.sender.sendall(data)
+                return
+            for i in range(0, len(data), chunk_size):
+                self.sender.sendall(data[i:i + chunk_size])
+        thread = threading.Thread(target=send)
+        thread.start()
+        self.addCleanup(thread.join)
+
+    def test_frames_sent_together(self):
+        data = b''
+        for i in range(10):
+            data += b''.join(ipc.encode_frame({'msg': i}))
+        self.send_async(data)
+        for i in range(10):
+            self.assertEqual({'msg': i}, self.reader.read_frame())
+
+    def test_split_frames(self):
+        messages = [{'log': 'a' * 100}, {'cache': list(range(50))}, {}]
+        data = b''.join(b''.join(ipc.encode_frame(m)) for m in messages)
+        self.send_async(data, chunk_size=7)
+        for message in messages:
+            self.assertEqual(message, self.reader.read_frame())
+
+    def test_large_frame(self):
+        message = {'cache': b'x' * (4 * 1024 * 1024)}
+        small = {'ping': ''}
+        data = (b''.join(ipc.encode_frame(small)) +
+                b''.join(ipc.encode_frame(message)) +
+                b''.join(ipc.encode_frame(small)))
+        self.send_async(data)
+        self.assertEqual(small, self.reader.read_frame())
+        self.assertEqual(message, self.reader.read_frame())
+        self.assertEqual(small, self.reader.read_frame())
+
+    def test_send_frame(self):
+        ipc.send_frame(self.sender, {'wait': True})
+        self.assertEqual({'wait': True}, self.reader.read_frame())
+
+    def test_legacy_header(self):
+        payload = pickle.dumps({'log': 'old'})
+        header = '{:<{}}'.format(len(payload), ipc.LEGACY_HEADER_SIZE)
+        self.send_async(header.encode('utf-8') + payload)
+        self.assertEqual({'log': 'old'}, self.reader.read_frame())
+
+    def test_newer_version_is_rejected(self):
+        header = ipc.HEADER.pack(ipc.MAGIC, ipc.PROTOCOL_VERSION + 1,
+                                 ipc.ENCODING.PICKLE, 0)
+        self.sender.sendall(header)
+        with self.assertRaises(ipc.FrameError):
+            self.reader.read_frame()
+
+    def test_closed_mid_frame(self):
+        header, payload = ipc.encode_frame({'cache': 'x' * 1000})
+        self.sender.sendall(header + payload[:10])
+        self.sender.close()
+        with self.assertRaises(ipc.ConnectionClosed):
+            self.reader.read_frame()
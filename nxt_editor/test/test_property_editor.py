@@ -0,0 +1,172 @@
+# Builtin
+import sys
+import unittest
+
+# External
+from Qt import QtWidgets, QtCore, QtGui
+
+# Internal
+from nxt import nxt_path
+from nxt.stage import Stage
+from nxt.nxt_layer import SAVE_KEY
+from nxt_editor import stage_model
+from nxt_editor.dockwidgets.property_editor import (PropertyModel, COLUMNS,
+                                                    get_attr_type_icon)
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+ATTR_COUNT = 300
+
+
+class FakePropertyEditor(object):
+    PREF_KEY = 'test_property_editor'
+
+    def __init__(self, header):
+        # Matches the header so save_state never writes the user prefs
+        order = header.sortIndicatorOrder().name
+        self.user_sort_pref = {'column': int(header.sortIndicatorSection()),
+                               'order': str(order)}
+
+
+class IncrementalRows(unittest.TestCase):
+
+    def setUp(self):
+        self.stage = Stage()
+        self.layer = self.stage.top_layer
+        attrs = {}
+        for i in range(ATTR_COUNT):
+            attrs['attr{:03}'.format(i)] = {'value': str(i)}
+        attrs['token'] = {'value': '${attr000}'}
+        self.stage.add_node(name='node', data={SAVE_KEY.ATTRS: attrs},
+                            layer=self.layer, fix_names=False)
+        self.model = stage_model.StageModel(self.stage)
+        self.view = QtWidgets.QTableView()
+        editor = FakePropertyEditor(self.view.horizontalHeader())
+        self.property_model = PropertyModel(parent=editor,
+                                            graph_model=self.model,
+                                            view=self.view,
+                                            headers=[''] * 6)
+        self.view.setModel(self.property_model)
+        self.property_model.set_represented_node('/node')
+        self.model.attrs_changed.connect(self.on_attrs_changed)
+        self.model.nodes_changed.connect(self.on_nodes_changed)
+        self.events = []
+        self.property_model.modelReset.connect(self.on_reset)
+        self.property_model.dataChanged.connect(self.on_data_changed)
+        self.property_model.rowsInserted.connect(self.on_rows_inserted)
+        self.property_model.rowsRemoved.connect(self.on_rows_removed)
+
+    def on_attrs_changed(self, attr_paths):
+        names = [nxt_path.attr_name_from_attr_path(p) for p in attr_paths]
+        self.property_model.set_represented_node('/node', attr_names=names)
+
+    def on_nodes_changed(self, node_paths):
+        self.property_model.set_represented_node('/node')
+
+    def on_reset(self):
+        self.events += [('reset',)]
+
+    def on_data_changed(self, top_left, bottom_right):
+        self.events += [('changed', top_left.row(), bottom_right.row())]
+
+    def on_rows_inserted(self, parent, first, last):
+        self.events += [('inserted', first, last)]
+
+    def on_rows_removed(self, parent, first, last):
+        self.events += [('removed', first, last)]
+
+    def get_row(self, attr_name):
+        return self.property_model.node_attr_names.index(attr_name)
+
+    def get_value(self, attr_name):
+        """Asks for the value the way the view does when the row is shown."""
+        index = self.property_model.index(self.get_row(attr_name),
+                                          COLUMNS.value)
+        return self.property_model.data(index, QtCore.Qt.DisplayRole)
+
+    def test_set_value_touches_one_row(self):
+        row = self.get_row('attr005')
+        self.assertEqual('5', self.get_value('attr005'))
+        self.model.set_node_attr_value('/node', 'attr005', 'new',
+                                       self.layer)
+        app.processEvents()
+        self.assertEqual([('changed', row, row)], self.events)
+        self.assertEqual('new', self.get_value('attr005'))
+
+    def test_token_rows_update(self):
+        token_row = self.get_row('token')
+        for attr_name in ('attr000', 'attr100', 'token'):
+            self.get_value(attr_name)
+        self.model.set_node_attr_value('/node', 'attr000', 'new',
+                                       self.layer)
+        app.processEvents()
+        self.assertEqual([('changed', 0, 0),
+                          ('changed', token_row, token_row)], self.events)
+        self.assertEqual('new', self.get_value('token'))
+
+    def test_rows_resolve_lazily(self):
+        memo = self.property_model.attr_memo
+        # Sizing the type column resolves a limited number of rows
+        self.assertEqual(PropertyModel.RESIZE_PRECISION, len(memo))
+        self.assertNotIn('attr200', memo)
+        # Sorting by name doesn't resolve the row
+        index = self.property_model.index(self.get_row('attr200'),
+                                          COLUMNS.name)
+        self.property_model.data(index, QtCore.Qt.DisplayRole)
+        self.assertNotIn('attr200', memo)
+        self.assertEqual('200', self.get_value('attr200'))
+        self.assertIn('attr200', memo)
+        self.assertEqual(PropertyModel.RESIZE_PRECISION + 1, len(memo))
+
+    def test_add_and_remove_attr(self):
+        self.model.delete_node_attr('/node', 'attr010')
+        app.processEvents()
+        self.assertEqual([('removed', 10, 10)], self.events)
+        self.assertNotIn('attr010', self.property_model.node_attr_names)
+        self.events = []
+        self.model.undo_stack.undo()
+        app.processEvents()
+        self.assertEqual([('inserted', 10, 10)], self.events)
+        self.assertEqual(ATTR_COUNT + 1,
+                         self.property_model.rowCount(None))
+
+    def test_new_node_resets(self):
+        self.stage.add_node(name='other', layer=self.layer, fix_names=False)
+        self.property_model.set_represented_node('/other')
+        self.assertEqual([('reset',)], self.events)
+
+    def test_tooltips_cached(self):
+        calls = []
+        get_historicals = self.model.get_historical_opinions
+
+        def get_historical_opinions(*args):
+            calls.append(args)
+            return get_historicals(*args)
+        self.model.get_historical_opinions = get_historical_opinions
+        index = self.property_model.index(self.get_row('attr005'),
+                                          COLUMNS.source)
+        tooltip = self.property_model.data(index, QtCore.Qt.ToolTipRole)
+        self.assertEqual(tooltip, self.property_model.data(
+            index, QtCore.Qt.ToolTipRole))
+        self.assertEqual(1, len(calls))
+        # Any change to the comp invalidates the tooltips
+        self.model.set_node_attr_value('/node', 'attr006', 'new',
+                                       self.layer)
+        self.property_model.data(index, QtCore.Qt.ToolTipRole)
+        self.assertEqual(2, len(calls))
+        value_index = index.sibling(index.row(), COLUMNS.value)
+        self.model.set_node_attr_value('/node', 'attr005', 'new',
+                                       self.layer)
+        app.processEvents()
+        self.assertIn('value : new', self.property_model.data(
+            value_index, QtCore.Qt.ToolTipRole))
+
+    def test_type_icons_cached(self):
+        index = self.property_model.index(0, COLUMNS.nxt_type)
+        icon = self.property_model.data(index, QtCore.Qt.DecorationRole)
+        other = self.property_model.data(index.sibling(1, COLUMNS.nxt_type),
+                                         QtCore.Qt.DecorationRole)
+        self.assertIs(icon, other)
+        self.assertIsNot(icon, get_attr_type_icon(QtGui.QColor('red')))
+        self.assertEqual(20, get_attr_type_icon(QtGui.QColor('red'),
+                                                20).width())
@@ -0,0 +1,76 @@
+# Builtin
+import unittest
+
+# Internal
+from nxt.stage import Stage, INTERNAL_ATTRS
+from nxt_editor import remote_cache
+from nxt_editor.remote_cache import DELTA_KEYS
+
+
+class CacheSyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.stage = Stage()
+        layer = self.stage.top_layer
+        compute_key = INTERNAL_ATTRS.as_save_key(INTERNAL_ATTRS.COMPUTE)
+        for name in ('a', 'b', 'c'):
+            code = ['self.out = "{}"'.format(name)]
+            self.stage.add_node(name=name, data={compute_key: code},
+                                layer=layer, fix_names=False)
+        comp = self.stage.build_stage()
+        self.rt_layer = self.stage.setup_runtime_layer(comp)
+        self.sync = remote_cache.CacheSync()
+        self.editor_cache = None
+        self.editor_seq = None
+
+    def run_node(self, path):
+        self.rt_layer = self.stage.execute_nodes([path], self.rt_layer)
+
+    def sync_editor(self):
+        delta = self.sync.get_delta(self.rt_layer.cache_layer,
+                                    self.editor_seq)
+        self.editor_cache = remote_cache.merge_cache_delta(self.editor_cache,
+                                                           delta)
+        self.editor_seq = delta[DELTA_KEYS.SEQ]
+        return delta
+
+    def test_only_new_nodes_are_sent(self):
+        self.run_node('/a')
+        first = self.sync_editor()
+        self.assertTrue(first[DELTA_KEYS.RESET])
+        self.run_node('/b')
+        delta = self.sync_editor()
+        self.assertFalse(delta[DELTA_KEYS.RESET])
+        self.assertEqual(first[DELTA_KEYS.SEQ], delta[DELTA_KEYS.BASE_SEQ])
+        self.assertEqual(['/b'], list(delta[DELTA_KEYS.NODES]))
+        self.assertEqual(set(self.rt_layer.cache_layer.nodes),
+                         set(self.editor_cache.nodes))
+        self.assertEqual('b', getattr(self.editor_cache.lookup('/b'), 'out'))
+
+    def test_rerun_node_is_resent(self):
+        self.run_node('/a')
+        self.sync_editor()
+        self.sync_editor()
+        self.run_node('/a')
+        delta = self.sync_editor()
+        self.assertEqual(['/a'], list(delta[DELTA_KEYS.NODES]))
+
+    def test_unknown_seq_resets(self):
+        self.run_node('/a')
+        self.run_node('/b')
+        self.sync_editor()
+        self.editor_seq = None
+        delta = self.sync_editor()
+        self.assertTrue(delta[DELTA_KEYS.RESET])
+        self.assertEqual(set(self.rt_layer.cache_layer.nodes),
+                         set(delta[DELTA_KEYS.NODES]))
+
+    def test_new_runtime_layer_resets(self):
+        self.run_node('/a')
+        self.sync_editor()
+        comp = self.stage.build_stage()
+        self.rt_layer = self.stage.setup_runtime_layer(comp)
+        self.run_node('/c')
+        delta = self.sync_editor()
+        self.assertTrue(delta[DELTA_KEYS.RESET])
+        self.assertNotIn('/a', self.editor_cache.nodes)
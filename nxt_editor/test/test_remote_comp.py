@@ -0,0 +1,200 @@
+# Builtin
+import unittest
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+
+# External
+from Qt import QtWidgets
+
+# Internal
+from nxt import nxt_io, nxt_path
+from nxt.session import Session
+from nxt.stage import INTERNAL_ATTRS
+from nxt.remote import nxt_socket
+from nxt_editor import ipc, remote_comp, stage_model
+from nxt_editor.remote_comp import DELTA_KEYS
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+
+class CompSyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        compute_key = INTERNAL_ATTRS.as_save_key(INTERNAL_ATTRS.COMPUTE)
+        nodes = {}
+        for name in ('a', 'b'):
+            nodes['/' + name] = {compute_key: ['self.out = "{}"'.format(name)]}
+        path = os.path.join(self.temp_dir, 'graph.nxt')
+        nxt_io.save_file_data({'version': '1.17', 'nodes': nodes}, path)
+        self.stage = Session().load_file(path)
+        self.layer = self.stage.top_layer
+        self.comp_key = compute_key
+        # Remote
+        self.sync = remote_comp.CompSync()
+        self.model = nxt_socket.SocketClientModel(None)
+        graph_path = self.stage.save_to_temp(self.stage.build_stage())
+        chain = self.sync.record_full(self.layers)
+        remote_comp.load_comp(self.model, graph_path, chain)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    @property
+    def layers(self):
+        return self.stage._sub_layers
+
+    def touch(self, *node_paths):
+        self.sync.add_touched({self.layer.real_path: node_paths})
+
+    def send_delta(self):
+        delta = self.sync.get_delta(self.layers)
+        remote_comp.apply_comp_delta(self.model, json.dumps(delta))
+        return delta
+
+    def test_only_changed_nodes_are_sent(self):
+        data = {self.comp_key: ['self.out = "c"']}
+        self.stage.add_node(name='c', data=data, layer=self.layer,
+                            fix_names=False)
+        self.touch('/c', '/a')
+        delta = self.send_delta()
+        layer_delta = delta[DELTA_KEYS.LAYERS]['0:graph.nxt']
+        self.assertEqual(['/c'], list(layer_delta[DELTA_KEYS.NODES]))
+        self.assertIsNotNone(self.model.comp_layer.lookup('/c'))
+        self.model.run(['/c'])
+        cached = self.model.runtime_layer.cache_layer.lookup('/c')
+        self.assertEqual('c', getattr(cached, 'out'))
+
+    def test_removed_node(self):
+        self.stage.delete_node(self.layer.lookup('/b'), self.layer)
+        self.touch('/b')
+        delta = self.send_delta()
+        layer_delta = delta[DELTA_KEYS.LAYERS]['0:graph.nxt']
+        self.assertEqual(['/b'], layer_delta[DELTA_KEYS.REMOVED])
+        self.assertIsNone(self.model.comp_layer.lookup('/b'))
+
+    def test_children_of_touched_nodes(self):
+        self.stage.add_node(name='child', parent=self.layer.lookup('/a'),
+                            layer=self.layer, fix_names=False)
+        self.touch('/a')
+        delta = self.send_delta()
+        layer_delta = delta[DELTA_KEYS.LAYERS]['0:graph.nxt']
+        # The parent's child order changed too
+        self.assertEqual(['/a', '/a/child'],
+                         list(layer_delta[DELTA_KEYS.NODES]))
+        self.stage.delete_node(self.layer.lookup('/a'), self.layer,
+                               delete_descendants=True)
+        self.touch('/a')
+        delta = self.send_delta()
+        layer_delta = delta[DELTA_KEYS.LAYERS]['0:graph.nxt']
+        self.assertEqual(['/a', '/a/child'], layer_delta[DELTA_KEYS.REMOVED])
+        self.assertIsNone(self.model.comp_layer.lookup('/a/child'))
+
+    def test_parents_of_touched_nodes(self):
+        self.stage.add_node(name='child', parent=self.layer.lookup('/a'),
+                            layer=self.layer, fix_names=False)
+        self.touch('/a/child')
+        delta = self.send_delta()
+        layer_delta = delta[DELTA_KEYS.LAYERS]['0:graph.nxt']
+        # The parent's child order changed too
+        self.assertEqual(['/a', '/a/child'],
+                         list(layer_delta[DELTA_KEYS.NODES]))
+        child_order = getattr(self.model.comp_layer.lookup('/a'),
+                              INTERNAL_ATTRS.CHILD_ORDER)
+        self.assertEqual(['child'], child_order)
+
+    def test_layers_keyed_by_index(self):
+        other = os.path.join(self.temp_dir, 'other', 'graph.nxt')
+        keys = [remote_comp.get_layer_key(self.layer, i) for i in (0, 1)]
+        self.assertNotEqual(keys[0], keys[1])
+        self.layer.real_path = other
+        self.assertEqual(keys[0], remote_comp.get_layer_key(self.layer, 0))
+
+    def test_unchanged_sends_nothing(self):
+        delta = self.send_delta()
+        self.assertEqual({}, delta[DELTA_KEYS.LAYERS])
+
+    def test_broken_chain_asks_for_resync(self):
+        editor_end, self.model.server = socket.socketpair()
+        self.addCleanup(editor_end.close)
+        self.addCleanup(self.model.server.close)
+        self.sync.get_delta(self.layers)  # Never reaches the remote
+        self.send_delta()
+        msg = ipc.FrameReader(editor_end).read_frame()
+        self.assertIn(remote_comp.COMP_RESYNC, msg)
+
+
+class CommandsTouchNodes(unittest.TestCase):
+
+    def test_commands_touch_nodes(self):
+        stage = Session().new_file()
+        layer = stage.top_layer
+        stage.add_node(name='a', layer=layer, fix_names=False)
+        model = stage_model.StageModel(stage)
+        sync = model.remote_comp_sync
+        model.set_node_attr_value('/a', 'attr', 'value', layer)
+        # Nothing is recorded until the remote has a comp
+        self.assertEqual({}, sync.touched)
+        sync.record_full(stage._sub_layers)
+        model.set_node_attr_value('/a', 'attr', 'new', layer)
+        self.assertEqual({layer.real_path: {'/a'}}, sync.touched)
+        delta = sync.get_delta(stage._sub_layers)
+        key = remote_comp.get_layer_key(layer, 0)
+        self.assertEqual(['/a'], list(delta[DELTA_KEYS.LAYERS][key][
+                                          DELTA_KEYS.NODES]))
+        self.assertEqual({}, sync.touched)
+
+
+class CommandsSyncRemote(unittest.TestCase):
+    """Deltas sent after each command must leave the remote with the
+    editor's comp.
+    """
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        co_key = INTERNAL_ATTRS.as_save_key(INTERNAL_ATTRS.CHILD_ORDER)
+        nodes = {'/p': {co_key: ['a', 'b', 'c']}, '/q': {}}
+        for name in ('a', 'b', 'c'):
+            nodes['/p/' + name] = {}
+        path = os.path.join(self.temp_dir, 'graph.nxt')
+        nxt_io.save_file_data({'version': '1.17', 'nodes': nodes}, path)
+        self.stage = Session().load_file(path)
+        self.layer = self.stage.top_layer
+        self.model = stage_model.StageModel(self.stage)
+        self.remote = nxt_socket.SocketClientModel(None)
+        graph_path = self.stage.save_to_temp(self.stage.build_stage())
+        sync = self.model.remote_comp_sync
+        chain = sync.record_full(self.stage._sub_layers)
+        remote_comp.load_comp(self.remote, graph_path, chain)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def assert_in_sync(self):
+        sync = self.model.remote_comp_sync
+        delta = sync.get_delta(self.stage._sub_layers)
+        remote_comp.apply_comp_delta(self.remote, json.dumps(delta))
+        remote_comp_layer = self.remote.comp_layer
+        comp_layer = self.model.comp_layer
+        remote_paths = set(remote_comp_layer._nodes_path_as_key)
+        remote_paths.discard(nxt_path.WORLD)
+        self.assertEqual(set(comp_layer._nodes_path_as_key), remote_paths)
+        for path in ('/p', '/q'):
+            node = remote_comp_layer.lookup(path)
+            self.assertEqual(self.model.get_node_child_order(path),
+                             getattr(node, INTERNAL_ATTRS.CHILD_ORDER), path)
+
+    def test_commands_and_undo(self):
+        self.model.delete_nodes(['/p/a'], layer=self.layer)
+        self.assert_in_sync()
+        self.model.set_node_name('/p/b', 'bb', layer=self.layer)
+        self.assert_in_sync()
+        self.model.parent_nodes(['/p/c'], '/q')
+        self.assert_in_sync()
+        for _ in range(3):
+            self.model.undo_stack.undo()
+            self.assert_in_sync()
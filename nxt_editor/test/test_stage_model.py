@@ -1,21 +1,32 @@
 # Builtin
+import functools
 import unittest
 import logging
 import os
+import random
+import shutil
+import socket
 import sys
+import tempfile
+import threading
+import time
 
 # External
-from Qt import QtWidgets
+from Qt import QtWidgets, QtCore
 
 # Internal
-from nxt import nxt_path
-from nxt_editor import stage_model
+from nxt import nxt_io, nxt_path
+import nxt_editor.ipc
+from nxt_editor import clipboard, stage_model
+from nxt.remote import nxt_socket
 from nxt.session import Session
+from nxt.stage import Stage, INTERNAL_ATTRS
+from nxt.nxt_layer import SAVE_KEY
 
 path_logger = logging.getLogger(nxt_path.__name__)
 path_logger.propagate = False
 
-app = QtWidgets.QApplication(sys.argv)
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
 
 
 class NodeLocalAndInheritAttributes(unittest.TestCase):
@@ -96,3 +107,665 @@ class ExecOrderCycle(unittest.TestCase):
         self.model.set_node_exec_in(node_path1, node_path2)
         node1_exec_in = self.model.get_node_exec_in(node_path1)
         self.assertIsNone(node1_exec_in)
+
+
+class IncrementalRecomp(unittest.TestCase):
+    """Re-comping only the edited roots must produce the same comp as a full
+    `build_stage`.
+    """
+
+    def setUp(self):
+        self.stage = Stage()
+        self.layer = self.stage.top_layer
+        for root in ('a', 'b', 'c', 'd', 'e', 'f', 'g'):
+            attrs = {SAVE_KEY.ATTRS: {'attr_' + root: {'value': root}}}
+            nodes, _ = self.stage.add_node(name=root, data=attrs,
+                                           layer=self.layer, fix_names=False)
+            for child in ('x', 'y'):
+                self.stage.add_node(name=child, parent=nodes[0],
+                                    layer=self.layer, fix_names=False)
+        inst_key = INTERNAL_ATTRS.as_save_key(INTERNAL_ATTRS.INSTANCE_PATH)
+        self.stage.add_node(name='inst', data={inst_key: '/a'},
+                            layer=self.layer, fix_names=False)
+        self.model = stage_model.StageModel(self.stage)
+
+    def assert_matches_full_comp(self, children=True):
+        comp = self.model.comp_layer
+        full = self.stage.build_stage()
+        self.assertEqual(set(full._nodes_path_as_key),
+                         set(comp._nodes_path_as_key))
+        for path, full_node in full._nodes_path_as_key.items():
+            node = comp.lookup(path)
+            full_attrs = set(self.stage.get_node_attr_names(full_node))
+            self.assertEqual(full_attrs,
+                             set(self.stage.get_node_attr_names(node)))
+            for attr in full_attrs:
+                expected = self.stage.get_node_attr_value(full_node, attr,
+                                                          full, resolved=False)
+                value = self.stage.get_node_attr_value(node, attr, comp,
+                                                       resolved=False)
+                self.assertEqual(expected, value, path + '.' + attr)
+            for attr in (INTERNAL_ATTRS.PARENT_PATH,
+                         INTERNAL_ATTRS.CHILD_ORDER):
+                self.assertEqual(getattr(full_node, attr, None),
+                                 getattr(node, attr, None),
+                                 path + '.' + attr)
+            if not children:
+                # A full build caches the children of implied paths
+                # differently, compared by parent path above instead.
+                continue
+            rt = full.RETURNS.Path
+            self.assertEqual(sorted(full.children(path, return_type=rt)),
+                             sorted(comp.children(path, return_type=rt)))
+
+    def test_add_child(self):
+        self.stage.add_node(name='z', parent='/b', layer=self.layer,
+                            fix_names=False)
+        changed = self.model.recomp_paths(['/b/z'])
+        self.assertIn('/b/z', changed)
+        self.assertNotIn('/c', changed)
+        self.assert_matches_full_comp()
+
+    def test_reparent(self):
+        node = self.layer.lookup('/c/x')
+        path_map = self.stage.parent_nodes([node], '/b', self.layer)
+        changed = self.model.recomp_paths(['/c/x'] + list(path_map.values()))
+        self.assertIn('/c/x', changed)
+        self.assert_matches_full_comp()
+
+    def test_instance_source_edit(self):
+        self.stage.add_node(name='z', parent='/a', layer=self.layer,
+                            fix_names=False)
+        changed = self.model.recomp_paths(['/a/z'])
+        # The instance of /a must pick up its new child's proxy
+        self.assertIn('/inst/z', changed)
+        self.assertIsNotNone(self.model.comp_layer.lookup('/inst/z'))
+        self.assert_matches_full_comp()
+
+    def test_delete_parent(self):
+        self.model.add_node_attr('/b', 'inherited', value='b',
+                                 layer=self.layer)
+        self.model.delete_nodes(['/b'], layer=self.layer)
+        self.assert_matches_full_comp()
+        # A later edit of another root must not leave the children stale
+        self.model.set_node_name('/c', 'cc', layer=self.layer)
+        self.assert_matches_full_comp()
+        self.model.undo_stack.undo()
+        self.model.undo_stack.undo()
+        self.assert_matches_full_comp()
+
+    def test_command_sequences(self):
+        """Random command sequences, each step compared to a full build."""
+        for seed in range(2):
+            self.setUp()
+            rand = random.Random(seed)
+            for step in range(15):
+                paths = [p for p in self.layer._nodes_path_as_key
+                         if p != nxt_path.WORLD]
+                path = rand.choice(paths)
+                name = 'n{}'.format(step)
+                action = rand.choice(('add', 'attr', 'delete', 'rename',
+                                      'parent', 'undo'))
+                if action == 'add':
+                    self.model.add_node(name, parent_path=path,
+                                        layer=self.layer)
+                elif action == 'attr':
+                    self.model.add_node_attr(path, name, value=name,
+                                             layer=self.layer)
+                elif action == 'delete':
+                    self.model.delete_nodes([path], layer=self.layer)
+                elif action == 'rename':
+                    self.model.set_node_name(path, name, layer=self.layer)
+                elif action == 'parent':
+                    parents = [p for p in paths if not p.startswith(path)]
+                    parent = rand.choice(parents + [nxt_path.WORLD])
+                    self.model.parent_nodes([path], parent)
+                else:
+                    self.model.undo_stack.undo()
+                msg = 'seed {} step {} {} {}'.format(seed, step, action, path)
+                with self.subTest(msg):
+                    self.assert_matches_full_comp(children=False)
+
+
+class UnsavedChanges(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.paths = []
+        for name in ('top', 'ref'):
+            path = os.path.join(self.temp_dir, name + '.nxt')
+            data = {'version': '1.17', 'nodes': {'/' + name: {}}}
+            if name == 'top':
+                data['references'] = ['ref.nxt']
+            nxt_io.save_file_data(data, path)
+            self.paths += [path]
+        self.stage = Session().load_file(self.paths[0])
+        self.model = stage_model.StageModel(self.stage)
+        self.top = self.model.top_layer
+        self.ref = self.stage._sub_layers[1]
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def get_unsaved(self):
+        return self.model.get_unsaved_changes(deep_check=True)
+
+    def test_loaded_layers_are_clean(self):
+        self.assertEqual([], self.get_unsaved())
+
+    def test_undo_back_to_clean(self):
+        self.model.add_node(name='new', layer=self.top)
+        self.assertEqual([self.top], self.get_unsaved())
+        self.model.undo_stack.undo()
+        self.assertEqual([], self.get_unsaved())
+        self.model.undo_stack.redo()
+        self.assertEqual([self.top], self.get_unsaved())
+
+    def test_save_marks_clean(self):
+        self.model.add_node(name='new', layer=self.top)
+        self.top.save()
+        self.model.set_layer_clean(self.top.real_path)
+        self.assertEqual([], self.get_unsaved())
+        self.model.undo_stack.undo()
+        self.assertEqual([self.top], self.get_unsaved())
+
+    def test_truncated_clean_state(self):
+        self.model.add_node(name='new', layer=self.top)
+        self.top.save()
+        self.model.set_layer_clean(self.top.real_path)
+        self.model.undo_stack.undo()
+        # Pushing drops the command the layer was saved after
+        self.model.add_node(name='other', layer=self.top)
+        self.assertIsNone(
+            self.model.undo_stack.layer_clean_indexes[self.top.real_path])
+        self.assertEqual([self.top], self.get_unsaved())
+
+    def test_mute_toggle(self):
+        self.model.mute_toggle_layer(self.ref)
+        self.assertEqual([self.top], self.get_unsaved())
+        self.model.undo_stack.undo()
+        self.assertFalse(self.ref.get_muted())
+        self.assertEqual({self.top.real_path},
+                         self.model.undo_stack.command(0).layer_paths)
+
+    def test_only_touched_layers_are_hashed(self):
+        self.model.add_node(name='new', layer=self.ref)
+        hashed = []
+        get_layer_hash = stage_model.get_layer_hash
+
+        def counting_hash(layer):
+            hashed.append(layer)
+            return get_layer_hash(layer)
+        stage_model.get_layer_hash = counting_hash
+        try:
+            self.assertEqual([self.ref], self.get_unsaved())
+        finally:
+            stage_model.get_layer_hash = get_layer_hash
+        self.assertEqual([self.ref], hashed)
+
+
+class PasteNodes(unittest.TestCase):
+
+    def setUp(self):
+        self.stage = Stage()
+        self.layer = self.stage.top_layer
+        for name in ('a', 'b', 'c'):
+            attrs = {SAVE_KEY.ATTRS: {'attr': {'value': name}}}
+            nodes, _ = self.stage.add_node(name=name, data=attrs,
+                                           layer=self.layer, fix_names=False)
+            self.stage.add_node(name='x', parent=nodes[0], layer=self.layer,
+                                fix_names=False)
+        self.model = stage_model.StageModel(self.stage)
+        self.model.copy_nodes(['/a', '/a/x', '/b', '/c'])
+        self.recomps = []
+        recomp_paths = self.model.recomp_paths
+
+        def counting_recomp(node_paths):
+            self.recomps.append(list(node_paths))
+            return recomp_paths(node_paths)
+        self.model.recomp_paths = counting_recomp
+
+    def tearDown(self):
+        # PySide6 crashes on exit if the clipboard still owns mime data
+        # created from Python.
+        self.model.clipboard.clear()
+
+    def test_paste_is_one_command(self):
+        index = self.model.undo_stack.index()
+        pasted = self.model.paste_nodes()
+        self.assertEqual(['/a_pasted', '/a_pasted/x', '/b_pasted',
+                          '/c_pasted'], pasted)
+        self.assertEqual(index + 1, self.model.undo_stack.index())
+        self.assertEqual([pasted], self.recomps)
+        for path in pasted:
+            self.assertIsNotNone(self.model.comp_layer.lookup(path))
+        value = self.model.get_node_attr_value('/b_pasted', 'attr')
+        self.assertEqual('b', value)
+        self.model.undo_stack.undo()
+        for path in pasted:
+            self.assertIsNone(self.model.comp_layer.lookup(path))
+            self.assertIsNone(self.layer.lookup(path))
+        self.assertEqual(2, len(self.recomps))
+
+    def test_paste_from_text(self):
+        mime_data = self.model.clipboard.mimeData()
+        self.assertTrue(mime_data.hasFormat(clipboard.MIME_TYPE))
+        compact_nodes = self.model.get_clipboard_nodes()
+        # Other apps only put text on the clipboard
+        self.model.clipboard.setText(mime_data.text())
+        self.assertEqual(compact_nodes, self.model.get_clipboard_nodes())
+        pasted = self.model.paste_nodes()
+        self.assertEqual(4, len(pasted))
+
+    def test_invalid_clipboard(self):
+        index = self.model.undo_stack.index()
+        self.model.clipboard.setText('[{"/a": 1}, "not a node"]')
+        self.assertEqual([], self.model.paste_nodes())
+        self.assertEqual(index, self.model.undo_stack.index())
+
+
+class SignalCoalescing(unittest.TestCase):
+
+    def setUp(self):
+        self.stage = Stage()
+        self.layer = self.stage.top_layer
+        for name in ('a', 'b', 'c'):
+            nodes, _ = self.stage.add_node(name=name, layer=self.layer,
+                                           fix_names=False)
+            self.stage.add_node(name='x', parent=nodes[0], layer=self.layer,
+                                fix_names=False)
+        self.model = stage_model.StageModel(self.stage)
+        self.emitted = []
+        for signal_name in nxt_editor.MODEL_SIGNALS.ORDER:
+            signal = getattr(self.model, signal_name)
+            signal.connect(functools.partial(self.record, signal_name))
+
+    def record(self, signal_name, *args):
+        self.emitted.append((signal_name, args))
+
+    def get_emitted(self, signal_name):
+        return [args for name, args in self.emitted if name == signal_name]
+
+    def test_macro_emits_once(self):
+        self.model.delete_nodes(['/a', '/b', '/c'], recursive=True)
+        nodes_changed = self.get_emitted('nodes_changed')
+        self.assertEqual(1, len(nodes_changed))
+        for path in ('/a', '/a/x', '/b', '/c/x'):
+            self.assertIn(path, nodes_changed[0][0])
+        counts = self.model.dispatcher.emission_counts[-1]
+        queued = counts[stage_model.EMISSION_KEYS.QUEUED]
+        self.assertEqual(6, queued['nodes_changed'])
+        emitted = counts[stage_model.EMISSION_KEYS.EMITTED]
+        self.assertEqual(1, emitted['nodes_changed'])
+
+    def test_selection_emitted_last(self):
+        self.model.copy_nodes(['/a'])
+        # PySide6 crashes on exit if the clipboard still owns mime data
+        # created from Python.
+        self.addCleanup(self.model.clipboard.clear)
+        self.model.paste_nodes()
+        names = [name for name, args in self.emitted]
+        self.assertEqual(['comp_layer_changed', 'node_moved',
+                          'selection_changed'], names)
+
+    def test_tick(self):
+        self.model.selection = ['/a']
+        self.model.selection = ['/b']
+        self.assertEqual([], self.emitted)
+        app.processEvents()
+        self.assertEqual([(('/b',),)], self.get_emitted('selection_changed'))
+        self.assertIsNone(self.model.dispatcher.emission_counts[-1][
+                              stage_model.EMISSION_KEYS.LABEL])
+
+    def test_frame_after_expand(self):
+        self.model.set_node_collapse(['/a'], True)
+        app.processEvents()
+        self.emitted = []
+        self.model.select_and_frame('/a/x')
+        names = [name for name, args in self.emitted]
+        # The view creates the graphics of expanded children before it
+        # frames them.
+        self.assertEqual(['collapse_changed', 'selection_changed',
+                          'frame_items'], names)
+        self.assertEqual([(('/a/x',),)], self.get_emitted('frame_items'))
+
+    def test_failed_command_releases_signals(self):
+        class FailingCommand(QtWidgets.QUndoCommand):
+            def redo(self):
+                raise ValueError('Failed')
+        try:
+            self.model.undo_stack.push(FailingCommand())
+        except ValueError:
+            pass
+        self.assertFalse(self.model.dispatcher.held)
+        self.model.selection = ['/b']
+        app.processEvents()
+        self.assertEqual([(('/b',),)], self.get_emitted('selection_changed'))
+
+
+class CommandDeltas(unittest.TestCase):
+    """The comp layer stash must be built from the deltas commands record,
+    without stashing the layers.
+    """
+
+    def setUp(self):
+        self.stage = Stage()
+        self.layer = self.stage.top_layer
+        for name in ('a', 'b', 'c'):
+            attrs = {SAVE_KEY.ATTRS: {'attr': {'value': name}}}
+            self.stage.add_node(name=name, data=attrs, layer=self.layer,
+                                fix_names=False)
+        inst_key = INTERNAL_ATTRS.as_save_key(INTERNAL_ATTRS.INSTANCE_PATH)
+        self.stage.add_node(name='inst', data={inst_key: '/a'},
+                            layer=self.layer, fix_names=False)
+        self.model = stage_model.StageModel(self.stage)
+        self.path = self.layer.real_path
+
+        def fail_stash(layer):
+            self.fail('Layer was stashed')
+        self.stage.get_stash_data = fail_stash
+
+    def get_changes(self, stash, node_path):
+        return stash.delta['target'][node_path]
+
+    def test_delete_and_undo(self):
+        with stage_model.CompLayerStash(self.model) as stash:
+            self.model.delete_nodes(['/a', '/b'])
+        self.assertEqual({'/a', '/b'}, set(stash.delta['target']))
+        for path in ('/a', '/b'):
+            changes = self.get_changes(stash, path)
+            self.assertTrue(changes[stage_model.DELTA_KEYS.REMOVED_NODE])
+        # The instance of /a is dirtied in the comp
+        self.assertIn('/inst', stash.delta['comp'])
+        with stage_model.CompLayerStash(self.model) as stash:
+            self.model.undo_stack.undo()
+        self.assertEqual({'/a', '/b'}, set(stash.delta['target']))
+        for path in ('/a', '/b'):
+            changes = self.get_changes(stash, path)
+            self.assertTrue(changes[stage_model.DELTA_KEYS.NEW_NODE])
+
+    def test_attr_changes(self):
+        with stage_model.CompLayerStash(self.model) as stash:
+            self.model.set_node_attr_value('/c', 'attr', 'new', self.layer)
+            self.model.add_node_attr('/c', 'other', 1, self.layer)
+        changes = self.get_changes(stash, '/c')
+        changed = changes[stage_model.DELTA_KEYS.CHANGED_ATTR]
+        self.assertEqual(1, len(changed))
+        old, new = changed[0]['attr']
+        self.assertEqual('c', old['value'])
+        self.assertEqual('new', new['value'])
+        new_attr, value = changes[stage_model.DELTA_KEYS.NEW_ATTR][0]
+        self.assertEqual('other', new_attr)
+        self.assertEqual(1, value['value'])
+        with stage_model.CompLayerStash(self.model) as stash:
+            self.model.undo_stack.undo()
+            self.model.undo_stack.undo()
+        changes = self.get_changes(stash, '/c')
+        changed = changes[stage_model.DELTA_KEYS.CHANGED_ATTR]
+        self.assertEqual(['other', 'attr'], [list(c)[0] for c in changed])
+        self.assertIs(stage_model.MISSING, changed[0]['other'][1])
+        self.assertEqual('c', changed[1]['attr'][1]['value'])
+
+    def get_child_orders(self, stash, node_path):
+        changes = self.get_changes(stash, node_path)
+        child_orders = []
+        for change in changes[stage_model.DELTA_KEYS.CHANGED_ATTR]:
+            if INTERNAL_ATTRS.CHILD_ORDER in change:
+                child_orders += [change[INTERNAL_ATTRS.CHILD_ORDER]]
+        return child_orders
+
+    def test_child_order_changes(self):
+        for name in ('x', 'y', 'z'):
+            self.model.add_node(name, parent_path='/c', layer=self.layer)
+        with stage_model.CompLayerStash(self.model) as stash:
+            self.model.delete_nodes(['/c/x'])
+        self.assertEqual([(['x', 'y', 'z'], ['y', 'z'])],
+                         self.get_child_orders(stash, '/c'))
+        with stage_model.CompLayerStash(self.model) as stash:
+            self.model.undo_stack.undo()
+        self.assertEqual([(['y', 'z'], ['x', 'y', 'z'])],
+                         self.get_child_orders(stash, '/c'))
+        with stage_model.CompLayerStash(self.model) as stash:
+            self.model.set_node_name('/c/y', 'yy', self.layer)
+        self.assertEqual([(['x', 'y', 'z'], ['x', 'yy', 'z'])],
+                         self.get_child_orders(stash, '/c'))
+        with stage_model.CompLayerStash(self.model) as stash:
+            self.model.parent_nodes(['/c/z'], '/b')
+            self.model.undo_stack.undo()
+        self.assertEqual([(['x', 'yy', 'z'], ['x', 'yy']),
+                          (['x', 'yy'], ['x', 'yy', 'z'])],
+                         self.get_child_orders(stash, '/c'))
+        self.assertEqual([([], ['z']), (['z'], [])],
+                         self.get_child_orders(stash, '/b'))
+
+    def test_undo_stack_records_deltas(self):
+        stashes = []
+        self.model.comp_delta_recorded.connect(stashes.append)
+        self.model.delete_nodes(['/a', '/b'])
+        self.assertEqual(1, len(stashes))
+        self.assertEqual({'/a', '/b'}, set(stashes[0].delta['target']))
+        self.assertIn('/inst', stashes[0].delta['comp'])
+        self.model.undo_stack.undo()
+        self.assertEqual(2, len(stashes))
+        changes = self.get_changes(stashes[1], '/a')
+        self.assertTrue(changes[stage_model.DELTA_KEYS.NEW_NODE])
+        # Changes that aren't node data aren't recorded
+        self.model.set_nodes_pos({'/c': (10, 10)})
+        self.assertEqual(2, len(stashes))
+
+    def test_inverted(self):
+        delta = stage_model.CommandDelta()
+        delta.add_node(self.path, '/new')
+        delta.set_attr(self.path, '/a', 'attr', 'old', 'new')
+        delta.set_attr(self.path, '/a', 'attr', 'new', stage_model.MISSING)
+        inverse = delta.inverted()
+        new_changes = inverse.layers[self.path]['/new']
+        self.assertTrue(new_changes[stage_model.DELTA_KEYS.REMOVED_NODE])
+        a_changes = inverse.layers[self.path]['/a']
+        self.assertEqual([('attr', 'new')],
+                         a_changes[stage_model.DELTA_KEYS.NEW_ATTR])
+        self.assertEqual([{'attr': ('new', 'old')}],
+                         a_changes[stage_model.DELTA_KEYS.CHANGED_ATTR])
+
+
+EXECUTED = []
+
+
+class ExecutionWorker(unittest.TestCase):
+
+    def setUp(self):
+        del EXECUTED[:]
+        self.stage = Session().new_file()
+        self.model = stage_model.StageModel(self.stage)
+        self.model.is_standalone = True
+        layer = self.model.target_layer
+        compute_key = INTERNAL_ATTRS.as_save_key(INTERNAL_ATTRS.COMPUTE)
+        self.node_paths = []
+        for name in ('a', 'b', 'c'):
+            code = ['from nxt_editor.test import test_stage_model',
+                    'test_stage_model.EXECUTED.append("/{}")'.format(name)]
+            self.stage.add_node(name=name, data={compute_key: code},
+                                layer=layer, fix_names=False)
+            self.node_paths += ['/' + name]
+        self.model.update_comp_layer(rebuild=True)
+
+    def tearDown(self):
+        self.model._stop_exec_worker()
+
+    def test_nodes_run_in_order_on_one_worker(self):
+        self.model.execute_nodes(self.node_paths)
+        worker = self.model._exec_worker
+        self.assertIsNotNone(worker)
+        self.assertEqual(self.node_paths, EXECUTED)
+        self.model.execute_nodes(self.node_paths[:1])
+        self.assertIs(worker, self.model._exec_worker)
+        self.assertEqual(self.node_paths + self.node_paths[:1], EXECUTED)
+
+    def test_nested_execute_waits_for_its_own_job(self):
+        compute_key = INTERNAL_ATTRS.as_save_key(INTERNAL_ATTRS.COMPUTE)
+        code = ['import time', 'time.sleep(.2)']
+        self.stage.add_node(name='slow', data={compute_key: code},
+                            layer=self.model.target_layer, fix_names=False)
+        self.model.update_comp_layer(rebuild=True)
+        rt_build = self.stage.build_stage(self.model.comp_layer.layer_idx())
+        self.model.current_rt_layer = self.stage.setup_runtime_layer(rt_build)
+        nested = []
+
+        def execute_nested():
+            self.model._execute_node('/a')
+            nested.append(list(EXECUTED))
+        QtCore.QTimer.singleShot(0, execute_nested)
+        self.model._execute_node('/slow')
+        self.assertEqual([['/a']], nested)
+
+    def test_worker_outlives_job_errors(self):
+        with self.assertRaises(ValueError):
+            self.model._execute_node('/a')
+        self.model.execute_nodes(self.node_paths)
+        self.assertEqual(self.node_paths, EXECUTED)
+
+    def test_build_is_profiled(self):
+        profiles = []
+        self.model.build_profile_changed.connect(profiles.append)
+        self.model.execute_nodes(self.node_paths)
+        profile = self.model.build_profile
+        self.assertIs(profile, profiles[-1])
+        self.assertEqual(self.node_paths,
+                         [r['node_path'] for r in profile.records])
+
+
+class RemoteCompUpdate(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        path = os.path.join(self.temp_dir, 'graph.nxt')
+        nxt_io.save_file_data({'version': '1.17', 'nodes': {'/a': {}}}, path)
+        self.model = stage_model.StageModel(Session().load_file(path))
+        # A remote that never replies
+        self.sent = []
+        self.model._send_line = self.sent.append
+        self.model.remote_requests.send_line = self.sent.append
+        self.timeouts = (stage_model.DELTA_TIMEOUT, stage_model.EXEC_TIMEOUT)
+        stage_model.DELTA_TIMEOUT = .05
+        stage_model.EXEC_TIMEOUT = .05
+
+    def tearDown(self):
+        stage_model.DELTA_TIMEOUT, stage_model.EXEC_TIMEOUT = self.timeouts
+        shutil.rmtree(self.temp_dir)
+
+    def test_busy_remote_skips_resync(self):
+        sync = self.model.remote_comp_sync
+        sync.record_full(self.model.stage._sub_layers)
+        self.model.update_remote_comp()
+        self.assertEqual(1, len(self.sent))
+        self.assertIn('apply_comp_delta', self.sent[0])
+        self.assertEqual([], self.model.remote_requests.pending)
+
+    def test_failed_delta_resyncs(self):
+        self.model.remote_requests.send_line = None  # Sending raises
+        sync = self.model.remote_comp_sync
+        sync.record_full(self.model.stage._sub_layers)
+        self.model.update_remote_comp()
+        self.assertEqual(1, len(self.sent))
+        self.assertIn('load_comp', self.sent[0])
+
+    def test_no_client_fails_request(self):
+        model = stage_model.StageModel(self.model.stage)
+        request = model._send_cmd('1 + 1', wait=True)
+        self.assertFalse(request.succeeded)
+        self.assertFalse(request.timed_out)
+        self.assertIn('No socket server', request.error)
+        # Sending without waiting only logs
+        self.assertIsNone(model._send_cmd('1 + 1'))
+
+    def test_execute_times_out(self):
+        # Skips connecting, the remote never replies
+        self.model._use_cmd_port = True
+        job = stage_model.ExecuteNodeJob(self.model, '/a')
+        job.run()
+        self.assertIs(stage_model.BuildStop, job.raised_exception)
+        self.assertIn('/a', self.sent[0])
+        self.assertEqual([], self.model.remote_requests.pending)
+
+    def test_bad_cache_delta_resets_seq(self):
+        keys = stage_model.remote_cache.DELTA_KEYS
+        for delta in ({}, {keys.RESET: True, keys.NODES: None}):
+            self.model._remote_cache_seq = 'seq'
+            self.model.load_cache_delta(delta)
+            self.assertIsNone(self.model._remote_cache_seq)
+
+
+class FakeRemoteModel(object):
+    def __init__(self, server):
+        self.server = server
+
+
+class RemoteRequests(unittest.TestCase):
+    """Requests are answered by running each sent line on a thread, like a
+    remote interpreter would, with replies read back over a socket pair.
+    """
+
+    def setUp(self):
+        self.editor_end, self.remote_end = socket.socketpair()
+        self.remote_threads = []
+        model = FakeRemoteModel(self.remote_end)
+        self.namespace = {'nxt_editor': nxt_editor, 'time': time,
+                          nxt_socket.MODEL_VAR: model}
+        self.requests = stage_model.RemoteRequests(self.remote_exec)
+        self.reader = threading.Thread(target=self.read_replies)
+        self.reader.start()
+
+    def tearDown(self):
+        for thread in self.remote_threads:
+            thread.join()
+        self.remote_end.close()
+        self.reader.join()
+        self.editor_end.close()
+
+    def remote_exec(self, line):
+        thread = threading.Thread(target=exec, args=(line, self.namespace))
+        thread.start()
+        self.remote_threads += [thread]
+
+    def read_replies(self):
+        reader = nxt_editor.ipc.FrameReader(self.editor_end)
+        while True:
+            try:
+                msg = reader.read_frame()
+            except (EOFError, OSError):
+                return
+            self.requests.resolve(msg[nxt_editor.ipc.REPLY])
+
+    def test_reply(self):
+        request = self.requests.wait(self.requests.send('1 + 1'))
+        self.assertTrue(request.succeeded)
+        self.assertEqual(2, request.result)
+        self.assertEqual([], self.requests.pending)
+
+    def test_remote_error(self):
+        request = self.requests.wait(self.requests.send('1 / 0'))
+        self.assertFalse(request.succeeded)
+        self.assertIn('ZeroDivisionError', request.error)
+
+    def test_timeout(self):
+        request = self.requests.send('time.sleep(.5)', timeout=.05)
+        self.requests.wait(request)
+        self.assertTrue(request.cancelled)
+        self.assertTrue(request.timed_out)
+        self.assertIn('Timed out', request.error)
+        self.assertEqual([], self.requests.pending)
+
+    def test_cancel(self):
+        request = self.requests.send('time.sleep(.5)')
+        self.requests.cancel_all()
+        self.requests.wait(request)
+        self.assertTrue(request.cancelled)
+        self.assertFalse(request.timed_out)
+
+    def test_wait_off_main_thread(self):
+        requests = [self.requests.send('{} * 2'.format(i)) for i in range(5)]
+        waiter = threading.Thread(target=lambda: [self.requests.wait(r)
+                                                  for r in requests])
+        waiter.start()
+        waiter.join(5)
+        self.assertEqual([0, 2, 4, 6, 8], [r.result for r in requests])
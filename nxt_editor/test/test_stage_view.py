@@ -0,0 +1,314 @@
+# Builtin
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# External
+from Qt import QtWidgets, QtCore
+
+# Internal
+from nxt import nxt_io
+from nxt.session import Session
+from nxt.stage import Stage, INTERNAL_ATTRS
+from nxt.nxt_layer import SAVE_KEY
+from nxt_editor import stage_model
+from nxt_editor.stage_view import (ConnectionRegistry, CONNECTION_SIDES,
+                                   RootSpatialIndex, StageView)
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+
+class FakeConnection(object):
+    def __init__(self, src_node_path, src_attr_name, tgt_node_path,
+                 tgt_attr_name):
+        self.src_node_path = src_node_path
+        self.src_attr_name = src_attr_name
+        self.tgt_node_path = tgt_node_path
+        self.tgt_attr_name = tgt_attr_name
+
+
+class ConnectionRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = ConnectionRegistry()
+        self.a_to_b = FakeConnection('/a', 'out', '/b', 'in')
+        self.a_to_c = FakeConnection('/a', 'out', '/c', 'in')
+        self.b_to_c = FakeConnection('/b', None, '/c', '_exec_in')
+        for graphic in (self.a_to_b, self.a_to_c, self.b_to_c):
+            self.registry.add(graphic)
+
+    def test_node_lookup(self):
+        self.assertEqual([self.a_to_b, self.a_to_c],
+                         self.registry.get_node_graphics('/a'))
+        self.assertEqual([self.a_to_b],
+                         self.registry.get_node_graphics(
+                             '/b', CONNECTION_SIDES.IN))
+        self.assertEqual([self.a_to_b, self.b_to_c],
+                         self.registry.get_node_graphics('/b'))
+
+    def test_attr_lookup(self):
+        self.assertEqual([self.a_to_b, self.a_to_c],
+                         self.registry.get_attr_graphics('/a', 'out'))
+        self.assertEqual([self.b_to_c],
+                         self.registry.get_attr_graphics(
+                             '/c', '_exec_in', CONNECTION_SIDES.IN))
+        self.assertEqual([], self.registry.get_attr_graphics(
+            '/c', 'in', CONNECTION_SIDES.OUT))
+
+    def test_remove(self):
+        self.assertTrue(self.registry.remove(self.a_to_c))
+        self.assertFalse(self.registry.remove(self.a_to_c))
+        self.assertEqual(2, len(self.registry))
+        self.assertEqual([self.a_to_b],
+                         self.registry.get_node_graphics('/a'))
+        self.assertEqual([self.b_to_c],
+                         self.registry.get_node_graphics('/c'))
+        self.assertNotIn('/a', [g.src_node_path for g in
+                                self.registry.get_node_graphics('/c')])
+
+    def test_self_connection_listed_once(self):
+        loop = FakeConnection('/d', 'out', '/d', 'in')
+        self.registry.add(loop)
+        self.assertEqual([loop], self.registry.get_node_graphics('/d'))
+        self.registry.clear()
+        self.assertEqual(0, len(self.registry))
+        self.assertEqual([], self.registry.get_node_graphics('/d'))
+
+    def test_many_connections_keep_order(self):
+        graphics = []
+        for i in range(200):
+            graphics += [FakeConnection('/a', 'out', '/a', 'in{}'.format(i))]
+            graphics += [FakeConnection('/a', 'out', '/e', 'in')]
+        for graphic in graphics:
+            self.registry.add(graphic)
+        expected = [self.a_to_b, self.a_to_c] + graphics
+        # Inputs first, then the outputs that aren't also inputs
+        self.assertEqual(graphics[::2] + expected[:2] + graphics[1::2],
+                         self.registry.get_node_graphics('/a'))
+        self.assertEqual(expected,
+                         self.registry.get_attr_graphics('/a', 'out'))
+
+
+class RootSpatialIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = RootSpatialIndex(cell_size=100)
+        self.index.set('/a', (0, 0, 50, 50))
+        self.index.set('/b', (250, 0, 50, 400))
+        self.index.set('/c', (-1000, -1000, 10, 10))
+
+    def test_query(self):
+        self.assertEqual({'/a'}, self.index.query((0, 0, 100, 100)))
+        self.assertEqual({'/a', '/b'}, self.index.query((40, 0, 220, 10)))
+        self.assertEqual({'/b'}, self.index.query((260, 350, 10, 10)))
+        self.assertEqual(set(), self.index.query((500, 500, 10, 10)))
+
+    def test_move_and_remove(self):
+        self.index.set('/a', (900, 900, 50, 50))
+        self.assertEqual(set(), self.index.query((0, 0, 100, 100)))
+        self.assertEqual({'/a'}, self.index.query((920, 920, 1, 1)))
+        self.index.remove('/a')
+        self.assertNotIn('/a', self.index)
+        self.assertEqual(set(), self.index.query((920, 920, 1, 1)))
+
+    def test_bounding_rect(self):
+        self.assertEqual((-1000, -1000, 1300, 1400),
+                         self.index.bounding_rect())
+        self.index.clear()
+        self.assertIsNone(self.index.bounding_rect())
+
+
+class FakeActions(object):
+    def __init__(self):
+        self.snap_action = QtWidgets.QAction()
+        self.tooltip_action = QtWidgets.QAction()
+        self.undo_action = QtWidgets.QAction()
+        self.redo_action = QtWidgets.QAction()
+
+    def actions(self):
+        return []
+
+
+class FakeMainWindow(QtWidgets.QWidget):
+    """Holds the bits of the main window a StageView reaches for."""
+    def __init__(self):
+        super(FakeMainWindow, self).__init__()
+        self.execute_actions = FakeActions()
+        self.alignment_actions = FakeActions()
+        self.node_actions = FakeActions()
+        self.view_actions = FakeActions()
+        self.app_actions = FakeActions()
+        self.nxt = None
+        self.in_startup = True
+        self.zoom_keys_down = False
+
+
+class VirtualStageView(StageView):
+    VIRTUALIZE_THRESHOLD = 2
+    VIRTUAL_MARGIN = 0
+
+
+def make_stage_view(stage, view_cls=StageView):
+    model = stage_model.StageModel(stage)
+    main_window = FakeMainWindow()
+    view = view_cls(model, parent=main_window)
+    view.resize(800, 600)
+    # Keep the window alive as long as the view.
+    view.fake_main_window = main_window
+    return view
+
+
+class VirtualConnections(unittest.TestCase):
+
+    def setUp(self):
+        stage = Stage()
+        layer = stage.top_layer
+        exec_key = INTERNAL_ATTRS.as_save_key(INTERNAL_ATTRS.EXECUTE_IN)
+        stage.add_node(name='src', data={SAVE_KEY.ATTRS: {'out': {}}},
+                       layer=layer, fix_names=False)
+        stage.add_node(name='tgt', data={exec_key: '/src'}, layer=layer,
+                       fix_names=False)
+        layer.positions['/tgt'] = [3000, 0]
+        self.view = make_stage_view(stage, VirtualStageView)
+        self.view.update_view(clear=True)
+        self.assertTrue(self.view.virtualized)
+
+    def tearDown(self):
+        self.view.fake_main_window.deleteLater()
+        app.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+
+    def scroll_to(self, x, y, scale=1.0):
+        self.view.resetTransform()
+        self.view.scale(scale, scale)
+        self.view.centerOn(x, y)
+        self.view.update_virtual_roots()
+
+    def get_connections(self):
+        connections = []
+        for graphic in self.view._connection_graphics:
+            self.assertIsNotNone(
+                self.view.get_node_graphic(graphic.src_node_path))
+            self.assertIsNotNone(
+                self.view.get_node_graphic(graphic.tgt_node_path))
+            connections += [(graphic.src_path, graphic.tgt_path)]
+        return connections
+
+    def test_scroll_connected_pair(self):
+        expected = [('/src', '/tgt.' + INTERNAL_ATTRS.EXECUTE_IN)]
+        # Source realized first, then the target.
+        self.scroll_to(0, 0)
+        self.assertEqual({'/src'}, self.view._realized_roots)
+        self.assertEqual([], self.get_connections())
+        self.scroll_to(1500, 0, scale=.1)
+        self.assertEqual({'/src', '/tgt'}, self.view._realized_roots)
+        self.assertEqual(expected, self.get_connections())
+        # Target realized first, then the source.
+        self.scroll_to(3000, 0)
+        self.assertEqual({'/tgt'}, self.view._realized_roots)
+        self.assertEqual([], self.get_connections())
+        self.scroll_to(0, 0)
+        self.assertEqual({'/src'}, self.view._realized_roots)
+        self.assertEqual([], self.get_connections())
+        self.scroll_to(1500, 0, scale=.1)
+        self.assertEqual(expected, self.get_connections())
+
+
+class LayerToggleReconcile(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        paths = []
+        layer_nodes = {'top': {'/top': {}, '/top/kid': {}},
+                       'ref': {'/ref': {}, '/ref/kid': {}}}
+        for name, nodes in layer_nodes.items():
+            path = os.path.join(self.temp_dir, name + '.nxt')
+            data = {'version': '1.17', 'nodes': nodes}
+            if name == 'top':
+                data['references'] = ['ref.nxt']
+            nxt_io.save_file_data(data, path)
+            paths += [path]
+        self.view = make_stage_view(Session().load_file(paths[0]))
+        self.model = self.view.model
+        self.ref = self.model.stage._sub_layers[1]
+        self.updated = []
+        update_node_graphics = self.view.update_node_graphics
+
+        def recording_update(node_paths):
+            self.updated += list(node_paths)
+            update_node_graphics(node_paths)
+        self.view.update_node_graphics = recording_update
+
+    def tearDown(self):
+        self.view.fake_main_window.deleteLater()
+        app.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+        shutil.rmtree(self.temp_dir)
+
+    def assert_toggle(self, toggle):
+        top_graphic = self.view.get_node_graphic('/top/kid')
+        toggle(self.ref)
+        self.assertEqual(['/top', '/top/kid'],
+                         sorted(self.view._node_graphics))
+        self.assertEqual({'/ref', '/ref/kid'}, set(self.updated))
+        self.updated = []
+        self.model.undo_stack.undo()
+        self.assertEqual(['/ref', '/ref/kid', '/top', '/top/kid'],
+                         sorted(self.view._node_graphics))
+        self.assertEqual({'/ref', '/ref/kid'}, set(self.updated))
+        self.assertIs(top_graphic, self.view.get_node_graphic('/top/kid'))
+
+    def test_mute(self):
+        self.assert_toggle(self.model.mute_toggle_layer)
+
+    def test_solo(self):
+        top = self.model.top_layer
+        self.assert_toggle(lambda layer: self.model.solo_toggle_layer(top))
+
+
+class BuildFocus(unittest.TestCase):
+
+    def setUp(self):
+        stage = Stage()
+        self.paths = []
+        for i in range(5):
+            name = 'node{}'.format(i)
+            stage.add_node(name=name, layer=stage.top_layer, fix_names=False)
+            self.paths += ['/' + name]
+        self.view = make_stage_view(stage)
+        self.model = self.view.model
+        self.updated = []
+        for path in self.paths:
+            self.record_updates(self.view.get_node_graphic(path))
+
+    def tearDown(self):
+        self.view.fake_main_window.deleteLater()
+        app.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+
+    def record_updates(self, graphic):
+        update_build_focus = graphic.update_build_focus
+
+        def recording_update():
+            self.updated.append(graphic.node_path)
+            update_build_focus()
+        graphic.update_build_focus = recording_update
+
+    def get_focused(self):
+        return [p for p in self.paths
+                if self.view.get_node_graphic(p).is_build_focus]
+
+    def test_step(self):
+        self.model.setup_build(self.paths)
+        self.assertTrue(self.model.executing)
+        prev_focus = self.get_focused()
+        for idx in range(3):
+            self.updated = []
+            self.model.last_built_idx = idx
+            self.assertEqual([self.paths[idx]], self.get_focused())
+            # Only the graphics that lost and gained the focus update.
+            self.assertEqual(prev_focus + [self.paths[idx]], self.updated)
+            prev_focus = [self.paths[idx]]
+        self.updated = []
+        self.model.finish_build()
+        self.assertEqual([], self.get_focused())
+        self.assertEqual([self.paths[2]], self.updated)
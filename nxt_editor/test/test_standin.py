@@ -0,0 +1,63 @@
+# Builtin
+import unittest
+import socket
+import threading
+import time
+
+# Internal
+from nxt_editor.integration.standin import StandInServer
+from nxt_editor.integration.standin.benchmark import summarize, RESULT_KEYS
+
+
+class StandInServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StandInServer(port=0, latency=0.01)
+        self.server.listen()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.client = socket.create_connection((self.server.host,
+                                                self.server.port))
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+        self.thread.join(5)
+
+    def send_lines(self, *lines):
+        data = ''.join(line + '\n' for line in lines)
+        self.client.sendall(data.encode('utf-8'))
+
+    def wait_for_commands(self, count, timeout=5):
+        start = time.time()
+        while self.server.commands_run < count:
+            if time.time() - start > timeout:
+                self.fail('Stand-in ran {} of {} commands'
+                          ''.format(self.server.commands_run, count))
+            time.sleep(.01)
+
+    def test_lines_share_a_namespace(self):
+        self.send_lines('value = 1', 'value += 1')
+        self.wait_for_commands(2)
+        self.assertEqual(2, self.server.namespace['value'])
+
+    def test_error_does_not_stop_server(self):
+        self.send_lines('raise ValueError("expected")', 'after = True')
+        self.wait_for_commands(2)
+        self.assertTrue(self.server.namespace['after'])
+
+    def test_latency(self):
+        start = time.time()
+        self.send_lines('a = 1', 'b = 2', 'c = 3')
+        self.wait_for_commands(3)
+        self.assertGreaterEqual(time.time() - start, 0.03)
+
+
+class BenchmarkSummaryTest(unittest.TestCase):
+
+    def test_summarize(self):
+        summary = summarize([float(i) for i in range(1, 101)])
+        self.assertEqual(100, summary[RESULT_KEYS.COUNT])
+        self.assertEqual(50.5, summary[RESULT_KEYS.MEAN])
+        self.assertEqual(51.0, summary[RESULT_KEYS.MEDIAN])
+        self.assertEqual(95.0, summary[RESULT_KEYS.P95])
@@ -0,0 +1,225 @@
+# Builtin
+import sys
+import time
+import unittest
+
+# External
+from Qt import QtWidgets, QtCompat
+
+# Internal
+from nxt_editor.dockwidgets.syntax import (PythonHighlighter, BLOCK_STATE,
+                                           to_utf16_spans)
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+CODE = '''@decorator
+class Thing(object):
+    """Docstring with ${token} and 'quotes'
+    spanning lines"""
+    def method(self, value=10, other=0x1F):
+        # todo: fix this 42
+        result = STAGE.get('${path}/child') + value * 2.5e3
+        if result >= 3 and not other:
+            return [x for x in range(100) if x % 2]
+        print("string with \\"escapes\\" and ${nested${x}}")
+        return None
+'''
+
+
+def get_styles(text, state=BLOCK_STATE.NONE):
+    spans, _ = PythonHighlighter.tokenize(text, state)
+    return [(text[start:start + length], style)
+            for start, length, style in spans]
+
+
+class Tokenize(unittest.TestCase):
+
+    def test_rules(self):
+        self.assertEqual([('def', 'keyword'), ('run', 'defclass'),
+                          ('(', 'brace'), ('self', 'self'), (')', 'brace')],
+                         get_styles('def run(self):'))
+        self.assertEqual([('==', 'operator'), ('-1', 'numbers'),
+                          ('0x1F', 'numbers'), ('2.5e3', 'numbers')],
+                         get_styles('x == y-1 or_ 0x1F 2.5e3')[:4])
+        self.assertEqual([], get_styles('selfish classy'))
+
+    def test_strings_and_comments_consume(self):
+        self.assertEqual([("'if not'", 'string')], get_styles("'if not'"))
+        self.assertEqual([('# if 1', 'comment')], get_styles('# if 1'))
+        self.assertEqual([('# a todo', 'comment'), ('todo', 'todo')],
+                         get_styles('# a todo'))
+
+    def test_tokens(self):
+        styles = get_styles("'${path}/child'")
+        self.assertEqual([("'${path}/child'", 'string'),
+                          ('${path}', '${}')], styles)
+        # Nested tokens highlight the extra closing brace
+        self.assertEqual(('${a${b}}', '${}'), get_styles('${a${b}}')[-1])
+
+    def test_multiline_state(self):
+        spans, state = PythonHighlighter.tokenize('x = """a if')
+        self.assertEqual(BLOCK_STATE.TRI_DOUBLE, state)
+        self.assertEqual(('"""a if', 'string2'), get_styles('x = """a if')[-1])
+        spans, state = PythonHighlighter.tokenize('if', state)
+        self.assertEqual([(0, 2, 'string2')], spans)
+        self.assertEqual(BLOCK_STATE.TRI_DOUBLE, state)
+        text = 'b""" if'
+        spans, state = PythonHighlighter.tokenize(text, state)
+        self.assertEqual(BLOCK_STATE.NONE, state)
+        self.assertEqual([('b"""', 'string2'), ('if', 'keyword')],
+                         get_styles(text, BLOCK_STATE.TRI_DOUBLE))
+        # Other quotes don't close the string
+        _, state = PythonHighlighter.tokenize('"""', BLOCK_STATE.TRI_SINGLE)
+        self.assertEqual(BLOCK_STATE.TRI_SINGLE, state)
+        # Nor open one in a comment
+        _, state = PythonHighlighter.tokenize("# '''")
+        self.assertEqual(BLOCK_STATE.NONE, state)
+
+    def test_utf16_spans(self):
+        spans = [(0, 1, 'string'), (2, 2, 'keyword')]
+        self.assertIs(spans, to_utf16_spans('a if', spans))
+        self.assertEqual(spans, to_utf16_spans('\xe9 if', spans))
+        self.assertEqual([(0, 2, 'string'), (3, 2, 'keyword')],
+                         to_utf16_spans('\U0001f600 if', spans))
+
+    def test_large_code(self):
+        lines = (CODE * 300).split('\n')
+        best = None
+        for _ in range(3):
+            start = time.perf_counter()
+            state = BLOCK_STATE.NONE
+            states = []
+            for line in lines:
+                _, state = PythonHighlighter.tokenize(line, state)
+                states += [state]
+            duration = time.perf_counter() - start
+            if best is None or duration < best:
+                best = duration
+        print('Tokenized {} lines in {:.1f}ms'.format(len(lines),
+                                                     best * 1000))
+        self.assertEqual(300, states.count(BLOCK_STATE.TRI_DOUBLE))
+        self.assertEqual(BLOCK_STATE.NONE, state)
+
+
+class Highlighter(unittest.TestCase):
+
+    def test_block_states(self):
+        editor = QtWidgets.QPlainTextEdit()
+        highlighter = PythonHighlighter(editor.document())
+        editor.setPlainText("x = '''\nif\n'''\nif")
+        block = editor.document().begin()
+        states = []
+        while block.isValid():
+            states += [block.userState()]
+            block = block.next()
+        self.assertEqual([BLOCK_STATE.TRI_SINGLE, BLOCK_STATE.TRI_SINGLE,
+                          BLOCK_STATE.NONE, BLOCK_STATE.NONE], states)
+        formats = editor.document().lastBlock().layout().formats()
+        self.assertEqual([(0, 2)], [(f.start, f.length) for f in formats])
+        highlighter.setDocument(None)
+
+
+def get_block_formats(document):
+    formats = []
+    block = document.begin()
+    while block.isValid():
+        formats += [(block.userState(),
+                     [(f.start, f.length, f.format.foreground().color())
+                      for f in block.layout().formats()])]
+        block = block.next()
+    return formats
+
+
+class BackgroundHighlighter(unittest.TestCase):
+
+    def setUp(self):
+        self.editor = QtWidgets.QPlainTextEdit()
+        self.highlighter = PythonHighlighter(self.editor.document())
+        # Small code keeps the test fast, the threshold is what matters
+        self.highlighter.BACKGROUND_MIN_LINES = 2
+        self.code = CODE * 2
+
+    def tearDown(self):
+        self.highlighter.stop_worker()
+        self.highlighter.setDocument(None)
+
+    def set_code(self, code):
+        with self.highlighter.highlight_in_background(code):
+            self.editor.setPlainText(code)
+
+    def wait_for_job(self):
+        deadline = time.perf_counter() + 5
+        while (self.highlighter.job is not None and
+               time.perf_counter() < deadline):
+            app.processEvents()
+        self.assertIsNone(self.highlighter.job)
+
+    def get_expected_formats(self, code):
+        editor = QtWidgets.QPlainTextEdit()
+        highlighter = PythonHighlighter(editor.document())
+        editor.setPlainText(code)
+        formats = get_block_formats(editor.document())
+        highlighter.setDocument(None)
+        return formats
+
+    def test_text_shows_before_formats(self):
+        self.set_code(self.code)
+        document = self.editor.document()
+        self.assertEqual(self.code, self.editor.toPlainText())
+        self.assertEqual([], document.firstBlock().layout().formats())
+        self.assertEqual(document.blockCount(),
+                         len(self.highlighter.pending_blocks))
+        self.wait_for_job()
+        self.assertEqual(self.get_expected_formats(self.code),
+                         get_block_formats(document))
+
+    def test_small_code_is_synchronous(self):
+        self.highlighter.BACKGROUND_MIN_LINES = 100
+        self.set_code(self.code)
+        self.assertIsNone(self.highlighter.job)
+        self.assertEqual(self.get_expected_formats(self.code),
+                         get_block_formats(self.editor.document()))
+
+    def test_visible_blocks_first(self):
+        self.highlighter.get_visible_blocks = lambda: (10, 12)
+        self.set_code(self.code)
+        job = self.highlighter.job
+        while job.tokenized < len(job.lines):
+            time.sleep(.001)
+        self.assertEqual([10, 11, 12, 0, 1],
+                         list(self.highlighter.iter_pending_blocks())[:5])
+
+    def test_edit_restarts_job(self):
+        self.set_code(self.code)
+        job = self.highlighter.job
+        self.editor.textCursor().insertText('x = """\n')
+        self.assertTrue(job.cancelled)
+        self.assertIsNone(self.highlighter.job)
+        app.processEvents()
+        job = self.highlighter.job
+        self.assertIsNotNone(job)
+        code = self.editor.toPlainText()
+        self.assertEqual(code.split('\n'), job.lines)
+        self.wait_for_job()
+        self.assertEqual(self.get_expected_formats(code),
+                         get_block_formats(self.editor.document()))
+
+    def test_worker_restarts_after_stop(self):
+        self.set_code(self.code)
+        worker = self.highlighter.worker
+        self.highlighter.stop_worker()
+        self.assertTrue(worker.isFinished())
+        self.set_code(self.code)
+        self.assertIsNot(worker, self.highlighter.worker)
+        self.wait_for_job()
+
+    def test_worker_stops_with_highlighter(self):
+        editor = QtWidgets.QPlainTextEdit()
+        highlighter = PythonHighlighter(editor.document())
+        highlighter.BACKGROUND_MIN_LINES = 2
+        with highlighter.highlight_in_background(self.code):
+            editor.setPlainText(self.code)
+        worker = highlighter.worker
+        # Deleting the editor deletes its document and the highlighter
+        QtCompat.delete(editor)
+        self.assertTrue(worker.isFinished())
@@ -0,0 +1,158 @@
+# Builtin
+import gc
+import sys
+import time
+import unittest
+import os
+import shutil
+import tempfile
+
+# External
+from Qt import QtWidgets
+
+# Internal
+from nxt_editor import user_dir
+
+app = QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+
+class PrefFileCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'prefs.json')
+        self.pref = user_dir.JsonPref(self.path)
+
+    def tearDown(self):
+        self.pref.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_set_is_written(self):
+        self.pref['a'] = 1
+        self.pref.flush()
+        other = user_dir.JsonPref(self.path)
+        self.assertEqual(1, other['a'])
+
+    def test_unchanged_file_is_not_reread(self):
+        self.pref['a'] = 1
+        self.pref.flush()
+        read_count = self.pref.read_count
+        self.pref.refresh(force=True)
+        self.pref.refresh(force=True)
+        self.assertEqual(read_count, self.pref.read_count)
+
+    def test_external_change_is_read(self):
+        self.pref['a'] = 1
+        self.pref.flush()
+        other = user_dir.JsonPref(self.path)
+        other['a'] = 2
+        other.flush()
+        self.pref.invalidate()
+        self.assertEqual(2, self.pref['a'])
+
+    def count_writes(self):
+        writes = []
+        write = self.pref.write
+
+        def counted_write():
+            writes.append(dict(self.pref))
+            write()
+        self.pref.write = counted_write
+        return writes
+
+    def test_writes_are_debounced(self):
+        writes = self.count_writes()
+        self.pref['a'] = 1
+        self.pref['b'] = 2
+        self.pref.pop('a')
+        self.assertEqual([], writes)
+        app.processEvents()
+        self.assertEqual([{'b': 2}], writes)
+        app.processEvents()
+        self.assertEqual(1, len(writes))
+
+    def test_refresh_waits_for_stat_interval(self):
+        self.pref['a'] = 1
+        self.pref.flush()
+        other = user_dir.JsonPref(self.path)
+        other['a'] = 2
+        other.flush()
+        self.assertEqual(1, self.pref['a'])
+        self.pref._last_check = time.time() - user_dir.STAT_INTERVAL
+        self.assertEqual(2, self.pref['a'])
+
+    def test_refresh_keeps_pending_writes(self):
+        other = user_dir.JsonPref(self.path)
+        other['a'] = 2
+        other.flush()
+        self.pref['a'] = 1
+        self.pref.refresh(force=True)
+        self.assertEqual(1, self.pref['a'])
+        app.processEvents()
+        other.invalidate()
+        self.assertEqual(1, other['a'])
+
+    def test_flush_pref_files(self):
+        writes = self.count_writes()
+        self.pref['a'] = 1
+        user_dir.flush_pref_files()
+        self.assertEqual(1, len(writes))
+        self.assertFalse(self.pref._write_pending)
+        # Closed pref files are written once and then left alone
+        self.pref['a'] = 2
+        self.pref.close()
+        self.assertEqual(2, len(writes))
+        self.pref['a'] = 3
+        user_dir.flush_pref_files()
+        self.assertEqual(2, len(writes))
+
+    def test_flush_tolerates_unwritable_files(self):
+        missing_dir = os.path.join(self.temp_dir, 'missing')
+        os.mkdir(missing_dir)
+        pref = user_dir.JsonPref(os.path.join(missing_dir, 'prefs.json'))
+        shutil.rmtree(missing_dir)
+        pref['a'] = 1
+        self.pref['a'] = 1
+        user_dir.flush_pref_files()
+        self.assertFalse(self.pref._write_pending)
+
+    def test_dead_pref_files_are_forgotten(self):
+        pref = user_dir.JsonPref(os.path.join(self.temp_dir, 'other.json'))
+        key = id(pref)
+        self.assertIn(key, user_dir._pref_files)
+        del pref
+        gc.collect()
+        self.assertNotIn(key, user_dir._pref_files)
+
+
+class NodePathIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'breakpoints')
+        self.pref = user_dir.JsonPref(self.path)
+        self.index = user_dir.NodePathIndex(self.pref)
+
+    def tearDown(self):
+        self.pref.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_add_remove(self):
+        layer = '/layer.nxt'
+        self.assertEqual(['/a', '/b'], self.index.add(layer, ['/a', '/b']))
+        self.assertEqual([], self.index.add(layer, ['/a']))
+        self.assertTrue(self.index.contains(layer, '/a'))
+        self.assertEqual(['/a'], self.index.remove(layer, ['/a', '/c']))
+        self.assertFalse(self.index.contains(layer, '/a'))
+        self.assertEqual(['/b'], self.index.get(layer))
+
+    def test_persisted(self):
+        layer = '/layer.nxt'
+        self.index.add(layer, ['/b', '/a'])
+        self.pref.flush()
+        other = user_dir.NodePathIndex(user_dir.JsonPref(self.path))
+        self.assertEqual(['/b', '/a'], other.get(layer))
+        self.index.clear(layer)
+        self.pref.flush()
+        other.pref_file.invalidate()
+        self.assertEqual([], other.get(layer))
@@ -8,15 +8,23 @@ will be made that the user directory is a directory.
 # Built-in
 import os
 
+import atexit
 import json
 import logging
 import sys
+import tempfile
+import time
+import weakref
+from contextlib import contextmanager
 
 if sys.version_info[0] == 2:
     import cPickle as pickle
 else:
     import pickle
 
+# External
+from Qt import QtCore
+
 # Internal
 from nxt.constants import USER_DIR
 from nxt_editor.constants import PREF_DIR
@@ -31,8 +39,14 @@ BREAKPOINT_FILE = os.path.join(PREF_DIR, 'breakpoints')
 SKIPPOINT_FILE = os.path.join(PREF_DIR, 'skippoints')
 HOTKEYS_PREF = os.path.join(PREF_DIR, 'hotkeys.json')
 MAX_RECENT_FILES = 10
+# Minimum seconds between on-disk staleness checks of a cached pref file.
+STAT_INTERVAL = 1.0
 
 broken_files = {}
+# Every live PrefFile by id, see `flush_pref_files` and `watch_pref_files`.
+# Keyed by id as PrefFiles are dicts, which can't be hashed.
+_pref_files = weakref.WeakValueDictionary()
+_pref_watcher = None
 
 
 # Make sure the user dir is setup
@@ -88,6 +102,37 @@ class EDITOR_CACHE():
     NODE_PROPERTY_STATE = 'node_property_state'
 
 
+@contextmanager
+def _atomic_write(path, mode='w'):
+    """Yields a file object for a temp file next to `path` that replaces
+    `path` once the block exits cleanly, so other editor instances never
+    read a half written pref file.
+    """
+    pref_dir, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + name, dir=pref_dir)
+    try:
+        with os.fdopen(fd, mode) as fp:
+            yield fp
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _get_file_sig(path):
+    """Returns a tuple that changes whenever the file at `path` is
+    rewritten, or None if the file does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime, stat.st_size, stat.st_ino
+
+
 class PrefFile(dict):
     def __init__(self, path, handlers=None):
         """
@@ -99,14 +144,26 @@ class PrefFile(dict):
         handled completely differently than others. Handlers for
         specific preference keys can be installed into a prefs object
         using `self.set_handler(pref_key, handler)`.
+        The contents are cached in memory. The file is only re-read when
+        its mtime/size changes (checked at most every `STAT_INTERVAL`
+        seconds) or when `invalidate` is called. Writes made within one
+        event loop tick are batched into a single atomic write.
         """
         self.path = path
         self.handlers = handlers if handlers else {}
+        self._file_sig = None
+        self._last_check = 0.0
+        self._write_pending = False
+        # Incremented every time the file is actually re-read from disk.
+        self.read_count = 0
+        # Callables run just before the pref file is written.
+        self.before_write = []
+        super(PrefFile, self).__init__()
         if os.path.isfile(self.path):
-            self.read()
+            self.refresh()
         else:
-            self.write()
-        super(PrefFile, self).__init__()
+            self.flush()
+        _pref_files[id(self)] = self
 
     def set_handler(self, pref_key, handler):
         """
@@ -135,17 +192,89 @@ class PrefFile(dict):
         """
         raise NotImplementedError
 
-    def __setitem__(self, key, value):
+    def refresh(self, force=False):
+        """
+        Re-reads `self.path` if it changed on disk since it was last read
+        or written. Local changes that are waiting to be written are never
+        discarded by a refresh.
+        :param force: If True the file is stat'ed even if it was checked
+        less than `STAT_INTERVAL` seconds ago.
+        """
+        if self._write_pending:
+            return
+        now = time.time()
+        if not force and now - self._last_check < STAT_INTERVAL:
+            return
+        self._last_check = now
+        file_sig = _get_file_sig(self.path)
+        if file_sig is None or file_sig == self._file_sig:
+            return
+        self._file_sig = file_sig
         self.read()
+        self.read_count += 1
+
+    def invalidate(self):
+        """
+        Forces the next access to check `self.path` for changes. Used when
+        another editor instance signals that it changed the file.
+        """
+        self._last_check = 0.0
+
+    def flush(self):
+        """
+        Immediately writes any local prefs to `self.path`.
+        """
+        self._write_pending = False
+        for callback in self.before_write:
+            callback()
+        self.write()
+        self._file_sig = _get_file_sig(self.path)
+        self._last_check = time.time()
+
+    def close(self):
+        """
+        Writes any pending prefs and stops the pref file from being flushed
+        at exit or watched for changes.
+        """
+        if self._write_pending:
+            self.flush()
+        _pref_files.pop(id(self), None)
+        if _pref_watcher is None or self.path not in _pref_watcher.files():
+            return
+        if not any(p.path == self.path for p in _pref_files.values()):
+            _pref_watcher.removePath(self.path)
+
+    def schedule_write(self):
+        """
+        Requests a write at the end of the current event loop tick. Any
+        further changes made before then are included in the same write.
+        Outside of a running Qt event loop (or off the main thread) the
+        write happens immediately.
+        """
+        if self._write_pending:
+            return
+        app = QtCore.QCoreApplication.instance()
+        if app is None or QtCore.QThread.currentThread() != app.thread():
+            self.flush()
+            return
+        self._write_pending = True
+        QtCore.QTimer.singleShot(0, self._flush_pending)
+
+    def _flush_pending(self):
+        if self._write_pending:
+            self.flush()
+
+    def __setitem__(self, key, value):
+        self.refresh()
         if key in self.handlers:
             value = self.handlers.get(key).set_pref(value)
             if not value:
                 value = '<external>'
         super(PrefFile, self).__setitem__(key, value)
-        self.write()
+        self.schedule_write()
 
     def __getitem__(self, key):
-        self.read()
+        self.refresh()
         if key in self.handlers:
             return self.handlers.get(key).get_pref()
         return super(PrefFile, self).__getitem__(key)
@@ -157,8 +286,9 @@ class PrefFile(dict):
             return default
 
     def pop(self, key):
+        self.refresh()
         super(PrefFile, self).pop(key)
-        self.write()
+        self.schedule_write()
 
 
 class JsonPref(PrefFile):
@@ -170,7 +300,7 @@ class JsonPref(PrefFile):
     def write(self):
         out = {}
         out.update(self)
-        with open(self.path, 'w+') as fp:
+        with _atomic_write(self.path, 'w') as fp:
             json.dump(out, fp, indent=4, sort_keys=False,
                       separators=(',', ': '))
 
@@ -200,7 +330,7 @@ class PicklePref(PrefFile):
     def write(self):
         out = {}
         out.update(self)
-        with open(self.path, 'wb+') as fp:
+        with _atomic_write(self.path, 'wb') as fp:
             pickle.dump(out, fp, protocol=2)
 
     def read(self):
@@ -297,7 +427,7 @@ class MultiFilePref(object):
 
     def __getitem__(self, key):
         for pref_file in self.pref_files:
-            pref_file.read()
+            pref_file.refresh()
             if key in pref_file:
                 return pref_file[key]
         raise KeyError
@@ -314,16 +444,173 @@ class MultiFilePref(object):
     def keys(self):
         out_keys = set()
         for pref_file in self.pref_files:
-            pref_file.read()
+            pref_file.refresh()
             out_keys.union(list(pref_file.keys()))
         return out_keys
 
 
+class NodePathIndex(object):
+    def __init__(self, pref_file):
+        """
+        Per layer ordered sets of node paths (breakpoints, skippoints)
+        backed by a :class:`PrefFile` of `{layer_path: [node_path, ...]}`.
+        The pref file is only parsed when it changes on disk, membership
+        checks are set lookups with no I/O, and edits are applied in place
+        then persisted by the pref file's debounced write.
+        """
+        self.pref_file = pref_file
+        # {layer_path: {node_path: None}} dicts are used as ordered sets
+        self._layers = {}
+        self._dirty_layers = set()
+        self._read_count = None
+        pref_file.before_write.append(self._sync_pref_file)
+
+    def _ensure_loaded(self):
+        self.pref_file.refresh()
+        if self._read_count == self.pref_file.read_count:
+            return
+        self._read_count = self.pref_file.read_count
+        self._layers = {}
+        for layer_path, node_paths in dict.items(self.pref_file):
+            if isinstance(node_paths, list):
+                self._layers[layer_path] = dict.fromkeys(node_paths)
+
+    def _sync_pref_file(self):
+        for layer_path in self._dirty_layers:
+            node_paths = self._layers.get(layer_path)
+            if node_paths:
+                dict.__setitem__(self.pref_file, layer_path, list(node_paths))
+            else:
+                dict.pop(self.pref_file, layer_path, None)
+        self._dirty_layers.clear()
+
+    def _mark_dirty(self, layer_path):
+        self._dirty_layers.add(layer_path)
+        self.pref_file.schedule_write()
+
+    def contains(self, layer_path, node_path):
+        """
+        Returns True if `node_path` is in the set for `layer_path`.
+        """
+        self._ensure_loaded()
+        node_paths = self._layers.get(layer_path)
+        return node_paths is not None and node_path in node_paths
+
+    def get(self, layer_path):
+        """
+        Returns a new list of the node paths for `layer_path`, in the
+        order they were added.
+        """
+        self._ensure_loaded()
+        return list(self._layers.get(layer_path, ()))
+
+    def get_set(self, layer_path):
+        """
+        Returns a new set of the node paths for `layer_path`.
+        """
+        self._ensure_loaded()
+        return set(self._layers.get(layer_path, ()))
+
+    def add(self, layer_path, node_paths):
+        """
+        Adds `node_paths` to the set for `layer_path`.
+        :return: List of the node paths that were not already present.
+        """
+        self._ensure_loaded()
+        layer_set = self._layers.setdefault(layer_path, {})
+        added = [p for p in node_paths if p not in layer_set]
+        if added:
+            layer_set.update(dict.fromkeys(added))
+            self._mark_dirty(layer_path)
+        return added
+
+    def remove(self, layer_path, node_paths):
+        """
+        Removes `node_paths` from the set for `layer_path`.
+        :return: List of the node paths that were present.
+        """
+        self._ensure_loaded()
+        layer_set = self._layers.get(layer_path)
+        if not layer_set:
+            return []
+        removed = [p for p in node_paths if layer_set.pop(p, 0) is None]
+        if removed:
+            self._mark_dirty(layer_path)
+        return removed
+
+    def set(self, layer_path, node_paths):
+        """
+        Replaces the set for `layer_path` with `node_paths`.
+        """
+        self._ensure_loaded()
+        self._layers[layer_path] = dict.fromkeys(node_paths)
+        self._mark_dirty(layer_path)
+
+    def clear(self, layer_path):
+        """
+        Removes every node path for `layer_path`.
+        :return: List of the node paths that were present.
+        """
+        self._ensure_loaded()
+        layer_set = self._layers.pop(layer_path, None)
+        if layer_set is None:
+            return []
+        self._mark_dirty(layer_path)
+        return list(layer_set)
+
+
 user_prefs = JsonPref(USER_PREFS_PATH)
 hotkeys = JsonPref(HOTKEYS_PREF)
 breakpoints = JsonPref(BREAKPOINT_FILE)
 skippoints = JsonPref(SKIPPOINT_FILE)
+breakpoint_index = NodePathIndex(breakpoints)
+skippoint_index = NodePathIndex(skippoints)
 editor_cache = PicklePref(EDITOR_CACHE_PATH)
 editor_cache.set_handler(USER_PREF.LAST_OPEN, LastOpenedHandler)
+
+
+def flush_pref_files():
+    """Writes any pref files that have a pending scheduled write."""
+    for pref_file in _pref_files.values():
+        if not pref_file._write_pending:
+            continue
+        try:
+            pref_file.flush()
+        except (IOError, OSError):
+            logger.error('Failed to write pref file: '
+                         '{}'.format(pref_file.path))
+
+
+atexit.register(flush_pref_files)
+
+
+def _on_pref_file_changed(path):
+    for pref_file in _pref_files.values():
+        if pref_file.path == path:
+            pref_file.invalidate()
+    # Atomic replacement drops the path from the watcher on most platforms.
+    if os.path.isfile(path) and path not in _pref_watcher.files():
+        _pref_watcher.addPath(path)
+
+
+def watch_pref_files():
+    """Starts watching the pref files on disk so that changes made by other
+    editor instances invalidate our in memory cache immediately rather
+    than after `STAT_INTERVAL`. Requires a QCoreApplication.
+    """
+    global _pref_watcher
+    if _pref_watcher is not None:
+        return _pref_watcher
+    _pref_watcher = QtCore.QFileSystemWatcher()
+    paths = [p.path for p in _pref_files.values()
+             if os.path.isfile(p.path)]
+    if paths:
+        _pref_watcher.addPaths(paths)
+    _pref_watcher.fileChanged.connect(_on_pref_file_changed)
+    app = QtCore.QCoreApplication.instance()
+    if app is not None:
+        app.aboutToQuit.connect(flush_pref_files)
+    return _pref_watcher
+
 # TODO as a session starts(or ends?), let's create a symlink to
 #  its file output called last_session.log